@@ -1,9 +1,19 @@
+import importlib
+
 import streamlit as st
-from pages.home import render_home
-from pages.departments import render_departments
-from pages.aisle import render_aisle
-from pages.dashboard import render_dashboard
-from pages.about_us import render_about 
+from core import assets, profiling, warmup
+
+# Page modules are imported on first request, so HOME and ABOUT never pay
+# for pandas, plotly or the data layer: page -> (module, render function)
+ROUTES = {
+    "HOME": ("pages.home", "render_home"),
+    "DEPARTMENTS": ("pages.departments", "render_departments"),
+    "AISLE": ("pages.aisle", "render_aisle"),
+    "DASHBOARD": ("pages.dashboard", "render_dashboard"),
+    "RECOMMEND": ("pages.recommend", "render_recommend"),
+    "SIMULATION": ("pages.simulation", "render_simulation"),
+    "ABOUT": ("pages.about_us", "render_about"),
+}
 
 #  Page configuration
 st.set_page_config(page_title="Instacart Analytics", layout="wide")
@@ -18,9 +28,15 @@ section[data-testid="stSidebar"] {display: none;}
 # Router
 page = st.query_params.get("page", "HOME")
 
-# Load CSS
-with open("css/style.css") as f:
-    st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+# Rerun profiling: ?profile=1 records this rerun and shows the overlay below.
+# Unknown pages share one key, so arbitrary ?page= values cannot grow the aggregates
+show_profile = st.query_params.get("profile") == "1"
+profile_page = page if page in ROUTES else "NOT_FOUND"
+profile = profiling.start(profile_page, force=show_profile)
+
+# Load CSS (read once per process)
+with profiling.span("css"):
+    st.markdown(assets.stylesheet(), unsafe_allow_html=True)
 
 # Navigation bar with active state
 def active(p):
@@ -38,21 +54,26 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # Page routing logic 
-if page == "HOME":
-    render_home()
-
-elif page == "DEPARTMENTS":
-    render_departments()
-
-elif page == "AISLE":
-    render_aisle()
-
-elif page == "DASHBOARD":
-    render_dashboard()
+try:
+    with profiling.span("render"):
+        if page in ROUTES:
+            module, function = ROUTES[page]
+            getattr(importlib.import_module(module), function)()
+        else:
+            st.header("Page not found")
+finally:
+    profiling.finish()
 
-elif page == "ABOUT":
-    render_about()
+# Profiling overlay: this rerun's spans and counters, then this page's aggregates
+if show_profile and profile is not None:
+    import pandas as pd
 
-else:
-    st.header("Page not found")
+    with st.expander(f"⏱ Rerun profile · {profile.total_ms:.1f} ms", expanded=True):
+        spans = pd.DataFrame(profile.spans, columns=["span", "depth", "ms"])
+        st.dataframe(spans.round({"ms": 3}), hide_index=True, width="stretch")
+        st.json(dict(profile.counters))
+        stats = profiling.snapshot().get(profile_page, {"spans": {}})
+        st.dataframe(pd.DataFrame(stats["spans"]).T, width="stretch")
 
+# Preload the data layer in the background once the first page is drawn
+warmup.start()
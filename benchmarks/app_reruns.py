@@ -0,0 +1,165 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.report import write_json
+
+# Cost of app reruns, driven headlessly with Streamlit's AppTest.
+#
+#   python -m benchmarks.app_reruns --sessions 5 --output reruns.json 2>/dev/null
+#
+# (stderr gets a Streamlit warning per empty widget label on every rerun)
+#
+# startup: a fresh interpreter importing app.py and running the first
+#          script run of each page (what a new worker pays)
+# reruns:  seeded user sessions on the selection pages; every widget
+#          interaction is one rerun and is timed separately:
+#            open -> expand list -> tick 1-4 items -> submit -> search -> tick -> submit
+# Times are ms, reported as median / p95 / max per (page, action).
+
+PAGES = ["HOME", "DEPARTMENTS", "AISLE", "DASHBOARD", "RECOMMEND", "SIMULATION", "ABOUT"]
+SELECTION_PAGES = {
+    # page: (checkbox key prefix, expand button, submit button, search box)
+    "DEPARTMENTS": ("dep_", "toggle_list", "submit_departments", None),
+    "AISLE": ("aisle_", "toggle_aisle_list", "submit_aisles", "aisle_search"),
+}
+
+
+def new_app(page):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file("app.py", default_timeout=60)
+    at.query_params["page"] = page
+    return at
+
+
+def timed_run(at, timings, action):
+    start = time.perf_counter()
+    at.run()
+    timings.setdefault(action, []).append((time.perf_counter() - start) * 1000)
+    if at.exception:
+        raise RuntimeError(f"{action}: {at.exception[0].value}")
+
+
+def checkboxes(at, prefix):
+    return [cb for cb in at.checkbox if cb.key and cb.key.startswith(prefix)]
+
+
+def session(page, rng, timings):
+    """One user's visit to a selection page."""
+    prefix, expand, submit, search = SELECTION_PAGES[page]
+    at = new_app(page)
+    timed_run(at, timings, "open")
+
+    if any(b.key == expand for b in at.button):
+        at.button(key=expand).click()
+        timed_run(at, timings, "expand")
+
+    boxes = checkboxes(at, prefix)
+    for i in rng.choice(len(boxes), min(int(rng.integers(1, 5)), len(boxes)), replace=False):
+        checkboxes(at, prefix)[i].check()
+        timed_run(at, timings, "tick")
+    at.button(key=submit).click()
+    timed_run(at, timings, "submit")
+
+    if search:
+        labels = [cb.label for cb in checkboxes(at, prefix)]
+        word = str(rng.choice(labels)).split()[0].lower()
+        at.text_input(key=search).input(word)
+        timed_run(at, timings, "search")
+        boxes = checkboxes(at, prefix)
+        if boxes:
+            boxes[int(rng.integers(len(boxes)))].check()
+            timed_run(at, timings, "tick")
+        at.button(key=submit).click()
+        timed_run(at, timings, "submit")
+
+
+def summarize(page, timings):
+    rows = []
+    for action, values in timings.items():
+        values = np.array(values)
+        rows.append({
+            "page": page,
+            "action": action,
+            "runs": len(values),
+            "median_ms": round(float(np.median(values)), 2),
+            "p95_ms": round(float(np.percentile(values, 95)), 2),
+            "max_ms": round(float(values.max()), 2),
+        })
+    return rows
+
+
+def startup(page):
+    """Harness import and first-run time of app.py (its imports included) in this fresh interpreter."""
+    start = time.perf_counter()
+    at = new_app(page)
+    imported = time.perf_counter()
+    at.run()
+    done = time.perf_counter()
+    return {
+        "page": page,
+        "harness_ms": round((imported - start) * 1000, 2),
+        "first_run_ms": round((done - imported) * 1000, 2),
+        "errors": [e.value for e in at.exception],
+    }
+
+
+def run_startup(pages, repeat):
+    results = []
+    for page in pages:
+        runs = []
+        for _ in range(repeat):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.app_reruns", "--child", page],
+                check=True, capture_output=True, text=True,
+            )
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        results.append(min(runs, key=lambda r: r["first_run_ms"]))
+        print(json.dumps(results[-1]))
+    return results
+
+
+def run_sessions(pages, sessions, seed):
+    rng = np.random.default_rng(seed)
+    results = []
+    for page in pages:
+        timings = {}
+        # Warm the table caches once, as a running server would have
+        new_app(page).run()
+        for _ in range(sessions):
+            session(page, rng, timings)
+        for row in summarize(page, timings):
+            results.append(row)
+            print(json.dumps(row))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", nargs="+", choices=PAGES, default=PAGES, help="pages for the startup runs")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per startup page")
+    parser.add_argument("--sessions", type=int, default=5, help="user sessions per selection page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--child", choices=PAGES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(startup(args.child)))
+        return
+
+    results = {
+        "startup": run_startup(args.pages, args.repeat),
+        "reruns": run_sessions(list(SELECTION_PAGES), args.sessions, args.seed),
+    }
+    if args.output:
+        write_json(args.output, "app_reruns", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+# Startup time and memory of the app's tables: CSV parsing vs memory-mapped
+# columnar artifacts. Each format is measured in a fresh interpreter, so the
+# numbers reflect what a new Streamlit worker process pays.
+#
+#   python -m benchmarks.artifact_load [--repeat 5]
+
+
+def proc_status():
+    """RSS split into anonymous (private) and file-backed (shareable) kB, Linux only."""
+    status = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                status[key] = int(value.split()[0])
+    return status
+
+
+def measure(fmt):
+    import pandas as pd  # noqa: F401  imported before the baseline snapshot
+
+    from core import data_store
+    from core.artifacts import read_table
+
+    before = proc_status()
+    start = time.perf_counter()
+    frames = {}
+    for name in data_store.TABLES:
+        if fmt == "csv":
+            frames[name] = data_store.load_csv(name)
+        else:
+            frames[name] = read_table(data_store.artifact_path(name))
+    elapsed = time.perf_counter() - start
+
+    # Touch every column once, as the pages eventually do
+    for df in frames.values():
+        for col in df.columns:
+            series = df[col]
+            values = series.cat.codes if isinstance(series.dtype, pd.CategoricalDtype) else series
+            values.to_numpy().sum()
+    after = proc_status()
+
+    return {
+        "format": fmt,
+        "load_ms": round(elapsed * 1000, 2),
+        "rss_kb": after["VmRSS"] - before["VmRSS"],
+        "rss_anon_kb": after["RssAnon"] - before["RssAnon"],
+        "rss_file_kb": after["RssFile"] - before["RssFile"],
+    }
+
+
+def run(repeat):
+    results = []
+    for fmt in ("csv", "artifact"):
+        runs = []
+        for _ in range(repeat):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.artifact_load", "--child", fmt],
+                check=True, capture_output=True, text=True,
+            )
+            runs.append(json.loads(out.stdout))
+        best = min(runs, key=lambda r: r["load_ms"])
+        results.append(best)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", choices=["csv", "artifact"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return
+
+    results = run(args.repeat)
+    print(f"{'format':<10}{'load ms':>10}{'RSS kB':>10}{'anon kB':>10}{'file kB':>10}")
+    for r in results:
+        print(f"{r['format']:<10}{r['load_ms']:>10}{r['rss_kb']:>10}{r['rss_anon_kb']:>10}{r['rss_file_kb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipeline.mining import mine_rules, mine_rules_mlxtend
+
+# Native sparse engine vs the notebook's mlxtend path on the same orders.
+#
+#   python -m benchmarks.mining --raw-dir path/to/instacart --scales 50000 500000 0
+#
+# A scale of 0 means every order. The mlxtend path is skipped above
+# --mlxtend-max orders, where it runs out of memory or time.
+
+
+def load_order_products(raw_dir):
+    frames = [
+        pd.read_csv(f"{raw_dir}/{name}", usecols=["order_id", "product_id"], dtype="int32")
+        for name in ("order_products__prior.csv", "order_products__train.csv")
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def sample(order_products, n_orders, seed=42):
+    order_ids = order_products["order_id"].unique()
+    if n_orders and n_orders < len(order_ids):
+        keep = np.random.default_rng(seed).choice(order_ids, n_orders, replace=False)
+        order_products = order_products[order_products["order_id"].isin(keep)]
+    return order_products
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    rules = fn(*args)
+    return time.perf_counter() - start, len(rules[0])
+
+
+def run(raw_dir, scales, min_support, max_len, min_lift, mlxtend_max):
+    order_products = load_order_products(raw_dir)
+    results = []
+    for scale in scales:
+        subset = sample(order_products, scale)
+        args = (subset["order_id"].to_numpy(), subset["product_id"].to_numpy(), min_support, max_len, min_lift)
+        n_orders = subset["order_id"].nunique()
+        row = {"orders": int(n_orders), "rows": len(subset), "min_support": min_support, "max_len": max_len}
+        row["native_s"], row["native_rules"] = timed(mine_rules, *args)
+        if n_orders <= mlxtend_max:
+            row["mlxtend_s"], row["mlxtend_rules"] = timed(mine_rules_mlxtend, *args)
+        results.append(row)
+        print(json.dumps(row))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--raw-dir", required=True)
+    parser.add_argument("--scales", type=int, nargs="+", default=[50_000, 500_000, 0])
+    parser.add_argument("--min-support", type=float, default=0.003)
+    parser.add_argument("--max-len", type=int, default=2)
+    parser.add_argument("--min-lift", type=float, default=1.5)
+    parser.add_argument("--mlxtend-max", type=int, default=500_000)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.raw_dir, args.scales, args.min_support, args.max_len, args.min_lift, args.mlxtend_max)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import json
+
+import numpy as np
+
+from benchmarks.report import timed, write_json
+from core.neighbors import embeddings_path, read_embeddings
+
+# Query latency of the product neighbour index: exact blocked search vs the
+# approximate inverted-file mode at several n_probe, with its recall@k
+# against the exact answer.
+#
+#   python -m benchmarks.neighbors [--data-dir data] [--queries 500] --output neighbors.json
+
+
+def run(data_dir, n_queries, k, probes, seed=0):
+    index = read_embeddings(embeddings_path(data_dir))
+    rng = np.random.default_rng(seed)
+    queries = np.asarray(index.vectors[rng.choice(len(index), min(n_queries, len(index)), replace=False)])
+
+    results = []
+    seconds, exact = timed(lambda: [index.search(q, k)[0][0] for q in queries])
+    results.append({"mode": "exact", "products": len(index), "ms_per_query": round(seconds / len(queries) * 1e3, 3)})
+    print(json.dumps(results[-1]))
+
+    build_seconds, _ = timed(index.build_lists, seed=seed)
+    for n_probe in probes:
+        seconds, found = timed(lambda: [index.search_approximate(q, k, n_probe)[0][0] for q in queries])
+        recall = np.mean([len(np.intersect1d(a, b)) / len(a) for a, b in zip(exact, found)])
+        results.append({
+            "mode": "approximate", "n_probe": n_probe, "lists": len(index.lists[1]) - 1,
+            "build_s": round(build_seconds, 3),
+            "ms_per_query": round(seconds / len(queries) * 1e3, 3), f"recall_at_{k}": round(float(recall), 4),
+        })
+        print(json.dumps(results[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data-dir", default="data", help="directory with artifacts/embeddings/")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probes", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.data_dir, args.queries, args.k, args.probes)
+    if args.output:
+        write_json(args.output, "neighbors", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import tempfile
+
+from benchmarks.report import timed, write_json
+from core.simulation import DEFAULT_MARGIN, MARGIN_MAP, Simulator, scenario
+from pipeline import build, mining, segmentation, stages
+from pipeline.cache import StageCache
+from pipeline.cli import add_param_arguments
+from pipeline.config import DEFAULT_PARAMS
+from pipeline.synthetic import generate
+
+# Wall time of every pipeline stage, and of the main steps inside them, on
+# synthetic Instacart-shaped data of growing size (or on real raw files).
+#
+#   python -m benchmarks.pipeline_stages --scales 20000 200000 --output stages.json
+#
+# Each scale runs the full build with an empty stage cache, then re-times
+# the steps below on the cached stage inputs:
+#   transactions  order x product matrix for mining
+#   itemsets      frequent items and pairs (the FP-Growth step)
+#   rules         association rules from the itemsets
+#   svd, kmeans   the segmentation fit
+#   simulation    revenue/profit of --scenarios scenarios in one batch
+
+
+def stage_times(raw_dir, work_dir, params):
+    """Seconds per stage of a cold build, and the stage cache it leaves behind."""
+    times = {}
+    functions = build.stage_functions(raw_dir, os.path.join(work_dir, "out"))
+
+    def timer(name, fn):
+        def run(*args):
+            seconds, result = timed(fn, *args)
+            times[name] = round(seconds, 3)
+            return result
+        return run
+
+    cache_dir = os.path.join(work_dir, "cache")
+    build.run(raw_dir, out_dir=os.path.join(work_dir, "out"), cache_dir=cache_dir, params=params,
+              functions={name: timer(name, fn) for name, fn in functions.items()}, log=lambda message: None)
+    keys = build.stage_keys(params, raw_dir, os.path.join(work_dir, "out"))
+    cache = StageCache(cache_dir)
+    return times, {name: cache.open(name, keys[name]) for name in ("merge", "aggregate")}
+
+
+def step_times(outputs, params, n_scenarios):
+    merged = outputs["merge"]
+    data = stages.joined(merged, ["order_id", "product_id", "user_id", "aisle_id", "department_id"])
+    mined = stages.sample_orders(stages.select_transactions(data, params), params)
+    del data
+
+    times = {}
+    times["transactions"], (X, items) = timed(
+        mining.transaction_matrix, mined["order_id"].to_numpy(), mined["product_id"].to_numpy()
+    )
+    times["itemsets"], (itemsets, n) = timed(
+        mining.frequent_itemsets, X, items, params["support_point"], params["max_len"]
+    )
+    times["rules"], _ = timed(mining.association_rules, itemsets, n, params["min_lift"])
+    times["bundles"], _ = timed(stages.bundles_of_three, mined, params)
+
+    with tempfile.TemporaryDirectory() as shard_dir:
+        times["shards"], shards = timed(stages.order_shards, merged, params, shard_dir)
+        times["svd"], (components, _) = timed(
+            segmentation.streaming_svd, shards, params["n_components"], seed=params["seed"]
+        )
+        times["kmeans"], _ = timed(
+            segmentation.fit_kmeans, shards, components, params["K"], params["batch_size"],
+            params["kmeans_epochs"], params["seed"],
+        )
+
+    simulator = Simulator(outputs["aggregate"].frame("simulation_counts"), MARGIN_MAP, DEFAULT_MARGIN)
+    scenarios = [scenario(name=str(i), price_multiplier=1 + i / 100) for i in range(n_scenarios)]
+    times["simulation"], _ = timed(simulator.run, scenarios)
+    return {name: round(seconds, 3) for name, seconds in times.items()}
+
+
+def run(scales, params, raw_dir=None, seed=0, n_scenarios=10):
+    # Imported up front so the first scale does not pay for it
+    import sklearn.cluster  # noqa: F401
+
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as work_dir:
+            source = raw_dir
+            if source is None:
+                source = os.path.join(work_dir, "raw")
+                n_orders, n_lines = generate(source, scale, seed)
+            stage, outputs = stage_times(source, work_dir, params)
+            row = {"orders": scale if raw_dir is None else None, "stages": stage,
+                   "steps": step_times(outputs, params, n_scenarios)}
+            if raw_dir is None:
+                row["lines"] = n_lines
+            results.append(row)
+            print(json.dumps(row))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[20_000, 200_000],
+                        help="synthetic orders per run")
+    parser.add_argument("--raw-dir", help="time one run on these raw files instead of synthetic data")
+    parser.add_argument("--data-seed", type=int, default=0)
+    parser.add_argument("--scenarios", type=int, default=10)
+    parser.add_argument("--output", help="write results as JSON")
+    add_param_arguments(parser)
+    args = parser.parse_args()
+
+    params = {name: getattr(args, name) for name in DEFAULT_PARAMS}
+    scales = [None] if args.raw_dir else args.scales
+    results = run(scales, params, args.raw_dir, args.data_seed, args.scenarios)
+    if args.output:
+        write_json(args.output, "pipeline_stages", {**params, "scales": scales}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import json
+import os
+import platform
+import subprocess
+import time
+
+# JSON result files shared by the benchmarks: one object with the run's
+# environment and a list of result rows, so runs can be diffed over time.
+
+
+def environment():
+    """Commit, interpreter and machine a result was measured on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def write_json(path, benchmark, params, results):
+    with open(path, "w") as f:
+        json.dump(
+            {"benchmark": benchmark, "environment": environment(), "params": params, "results": results},
+            f, indent=1,
+        )
+
+
+def timed(fn, *args, **kwargs):
+    """(seconds, result) of one call."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Columnar table artifacts.
+# A table is a directory with one .npy file per column plus meta.json.
+# Integer columns use the narrowest dtype that fits, strings are dictionary
+# encoded (integer codes + a UTF-8 buffer with an offsets array), and every
+# array is opened with mmap_mode="r" so all Streamlit worker processes
+# share the same page-cache pages instead of each parsing its own copy.
+
+META_FILE = "meta.json"
+
+
+def narrow_int_dtype(values):
+    if len(values) == 0:
+        return np.dtype(np.int8)
+    lo, hi = int(values.min()), int(values.max())
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dtype)
+
+
+def codes_dtype(n_categories):
+    # Same rule pandas uses for Categorical codes, so from_codes keeps the mmap
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def encode_strings(strings):
+    """UTF-8 buffer and int64 offsets for a sequence of strings."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def decode_strings(buffer, offsets):
+    raw = bytes(buffer)
+    bounds = offsets.tolist()
+    text = raw.decode("utf-8")
+    if len(text) == len(raw):
+        # Pure ASCII: byte offsets are character offsets, slice the decoded text
+        return [text[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    return [raw[a:b].decode("utf-8") for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def write_table(df, path):
+    """Write df as a columnar artifact directory (replacing any previous one)."""
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    columns = []
+    for name in df.columns:
+        col = df[name]
+        if pd.api.types.is_bool_dtype(col):
+            kind = "bool"
+            np.save(os.path.join(tmp, f"{name}.npy"), col.to_numpy(dtype=np.bool_))
+        elif pd.api.types.is_integer_dtype(col):
+            kind = "int"
+            values = col.to_numpy()
+            np.save(os.path.join(tmp, f"{name}.npy"), values.astype(narrow_int_dtype(values)))
+        elif pd.api.types.is_float_dtype(col):
+            kind = "float"
+            np.save(os.path.join(tmp, f"{name}.npy"), col.to_numpy(dtype=np.float64))
+        else:
+            # Dictionary-encode strings (and categoricals); missing values get code -1
+            kind = "dict"
+            cat = col.astype(str).where(col.notna()).astype("category").cat
+            categories = [str(c) for c in cat.categories]
+            buffer, offsets = encode_strings(categories)
+            np.save(os.path.join(tmp, f"{name}.codes.npy"), cat.codes.to_numpy().astype(codes_dtype(len(categories))))
+            np.save(os.path.join(tmp, f"{name}.dict.npy"), buffer)
+            np.save(os.path.join(tmp, f"{name}.dict_offsets.npy"), offsets)
+        columns.append({"name": name, "kind": kind})
+
+    with open(os.path.join(tmp, META_FILE), "w") as f:
+        json.dump({"rows": len(df), "columns": columns}, f, indent=1)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+def meta_path(path):
+    return os.path.join(path, META_FILE)
+
+
+def read_table(path, columns=None):
+    """Open an artifact directory as a DataFrame backed by read-only memory maps."""
+    with open(meta_path(path)) as f:
+        meta = json.load(f)
+
+    data = {}
+    for spec in meta["columns"]:
+        name = spec["name"]
+        if columns is not None and name not in columns:
+            continue
+        if spec["kind"] == "dict":
+            codes = np.load(os.path.join(path, f"{name}.codes.npy"), mmap_mode="r")
+            categories = decode_strings(
+                np.load(os.path.join(path, f"{name}.dict.npy"), mmap_mode="r"),
+                np.load(os.path.join(path, f"{name}.dict_offsets.npy")),
+            )
+            data[name] = pd.Categorical.from_codes(codes, categories=categories, validate=False)
+        else:
+            data[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+    return pd.DataFrame(data, copy=False)
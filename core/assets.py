@@ -0,0 +1,25 @@
+import os
+import threading
+
+# Static files served through st.markdown (the stylesheet), read once per
+# process and kept in memory; a changed file (new mtime) is read again.
+
+_lock = threading.Lock()
+_cache = {}  # path -> (mtime_ns, text)
+
+
+def read_text(path):
+    mtime = os.stat(path).st_mtime_ns
+    entry = _cache.get(path)
+    if entry is None or entry[0] != mtime:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        with _lock:
+            entry = (mtime, text)
+            _cache[path] = entry
+    return entry[1]
+
+
+def stylesheet(path="css/style.css"):
+    """The stylesheet wrapped in a <style> tag, ready for st.markdown."""
+    return f"<style>{read_text(path)}</style>"
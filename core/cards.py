@@ -0,0 +1,209 @@
+import threading
+
+import pandas as pd
+
+from core import profiling
+from core.catalog import get_catalog
+from core.data_store import get_table
+from core.lookup import lookup, normalize_key
+from core.neighbors import get_index as get_neighbors
+
+# HTML fragments for bundle and bestseller cards.
+# Each group's cards are built in one vectorized pass over its pre-sorted
+# slice and memoized by (table, group key, row limit), so a rerun with the
+# same selection reuses the finished HTML. Bundle cards come back as one
+# fragment per column so each column is a single st.markdown call; bundles
+# of three are one full-width block under them; a group without bundles
+# can fall back to pairing its bestsellers with their nearest products in
+# the embedding space (core.neighbors). Bestsellers can come from
+# the all-time tables or from one slice (time window or segment) of the
+# top5_sliced tables.
+
+BESTSELLER_BADGE = '<span class="badge-bestseller">🔥 Bestseller</span>'
+
+_lock = threading.Lock()
+_fragments = {}  # table -> (source DataFrame, {(key, limit): fragment})
+
+
+def escape_html(series):
+    return (
+        series.astype(str)
+        .str.replace("&", "&amp;", regex=False)
+        .str.replace("<", "&lt;", regex=False)
+        .str.replace(">", "&gt;", regex=False)
+    )
+
+
+def bundle_cards(df):
+    """One bundle-row card pair per row of df, as a Series of HTML strings."""
+    return (
+        '<div class="bundle-row"><div class="bundle-card">'
+        + escape_html(df["product_name_base"])
+        + '</div><div class="bundle-card best-item"><span class="best-badge"></span>'
+        + escape_html(df["product_name_recommended"])
+        + "</div></div>"
+    )
+
+
+def bundle3_cards(df):
+    """One "base + 2 add-ons" card row per row of df, as a Series of HTML strings."""
+    plus = '<span class="bundle3-plus">+</span>'
+    return (
+        '<div class="bundle3-row"><div class="bundle-card">'
+        + escape_html(df["product_name_base"])
+        + "</div>" + plus + '<div class="bundle-card">'
+        + escape_html(df["product_name_addon_1"])
+        + "</div>" + plus + '<div class="bundle-card">'
+        + escape_html(df["product_name_addon_2"])
+        + "</div></div>"
+    )
+
+
+def product_cards(df):
+    """One product card per row of df, with the bestseller badge on the first row."""
+    badges = pd.Series("", index=df.index)
+    badges.iloc[:1] = BESTSELLER_BADGE
+    return (
+        '<div class="card-unit">'
+        + badges
+        + '<div class="bundle-card">'
+        + escape_html(df["product_name"])
+        + "</div></div>"
+    )
+
+
+def recommendation_cards(df):
+    """One card per recommended product, with its score and confidence underneath."""
+    return (
+        '<div class="card-unit"><div class="bundle-card best-item"><span class="best-badge"></span>'
+        + escape_html(df["product_name"])
+        + '</div><div class="rec-meta">lift '
+        + df["score"].map("{:.2f}".format)
+        + " · confidence "
+        + (df["confidence"] * 100).map("{:.0f}%".format)
+        + "</div></div>"
+    )
+
+
+def _memoize(name, key, build):
+    source = get_table(name)
+    entry = _fragments.get(name)
+    if entry is None or entry[0] is not source:
+        with _lock:
+            entry = _fragments.get(name)
+            if entry is None or entry[0] is not source:
+                entry = (source, {})
+                _fragments[name] = entry
+
+    cache = entry[1]
+    if key not in cache:
+        profiling.count("fragment_misses")
+        with profiling.span("build_html"):
+            cache[key] = build()
+    else:
+        profiling.count("fragment_hits")
+    return cache[key]
+
+
+def _columns(cards):
+    # Rows alternate three per column (0-2 left, 3-5 right, 6-8 left, ...)
+    left = "".join(card for i, card in enumerate(cards) if i % 6 < 3)
+    right = "".join(card for i, card in enumerate(cards) if i % 6 >= 3)
+    return left, right
+
+
+def bundle_columns(name, group, limit=None):
+    """(left, right) column HTML for a group's bundles, or None if it has none."""
+    key = normalize_key(group)
+
+    def build():
+        rows = lookup(name, key)
+        if limit is not None:
+            rows = rows.head(limit)
+        if rows.empty:
+            return None
+        return _columns(bundle_cards(rows).tolist())
+
+    return _memoize(name, (key, limit), build)
+
+
+def neighbor_columns(name, group, limit=6):
+    """(left, right) column HTML pairing each of a group's bestsellers (table
+    `name`) with its closest product in the embedding space, or None without
+    bestsellers or embeddings."""
+    index = get_neighbors()
+    if index is None:
+        return None
+    key = normalize_key(group)
+
+    def build():
+        bestsellers = lookup(name, key)["product_id"].tolist()
+        shown = set(bestsellers)
+        base, recommended = [], []
+        for product_id in bestsellers[:limit]:
+            for neighbor, _ in index.similar(product_id, k=len(shown) + 1):
+                if neighbor not in shown:
+                    base.append(product_id)
+                    recommended.append(neighbor)
+                    shown.add(neighbor)
+                    break
+        if not base:
+            return None
+        catalog = get_catalog()
+        rows = pd.DataFrame({
+            "product_name_base": catalog.names(base, "Unknown product"),
+            "product_name_recommended": catalog.names(recommended, "Unknown product"),
+        })
+        return _columns(bundle_cards(rows).tolist())
+
+    return _memoize(name, ("neighbors", key, limit, index), build)
+
+
+def bundle3_block(name, group, limit=3):
+    """Header and card rows for a group's bundles of three ('' if it has none
+    or the table was never built)."""
+    key = normalize_key(group)
+
+    def build():
+        rows = lookup(name, key)
+        if limit is not None:
+            rows = rows.head(limit)
+        if rows.empty:
+            return ""
+        return "<div class='dept-header'>Base + 2 add-ons</div>" + "".join(bundle3_cards(rows).tolist())
+
+    try:
+        return _memoize(name, (key, limit), build)
+    except FileNotFoundError:
+        return ""
+
+
+def bestseller_slices(name):
+    """Slices of a top5_sliced table in table order ([] if it was never built)."""
+    try:
+        return _memoize(name, "slices", lambda: pd.unique(get_table(name)["slice"].astype(str)).tolist())
+    except FileNotFoundError:
+        return []
+
+
+def bestseller_block(name, group, limit=5, slice_name=None):
+    """Header and product row HTML for a group's bestsellers ('' if it has none),
+    restricted to one slice of a top5_sliced table when given."""
+    key = normalize_key(group)
+
+    def build():
+        rows = lookup(name, key)
+        if slice_name is not None:
+            rows = rows[rows["slice"] == slice_name]
+        rows = rows.head(limit)
+        if rows.empty:
+            return ""
+        title = key.capitalize() if slice_name is None else f"{key.capitalize()} · {slice_name}"
+        return (
+            f"<div class='dept-header'>Bestsellers in {title}</div>"
+            + '<div class="product-row">'
+            + "".join(product_cards(rows).tolist())
+            + "</div>"
+        )
+
+    return _memoize(name, (key, limit, slice_name), build)
@@ -0,0 +1,215 @@
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from core.artifacts import decode_strings, encode_strings, narrow_int_dtype
+from core.data_store import DATA_DIR, artifact_path, get_table, load_csv
+
+# Compact product catalog shared by the app and the pipeline.
+# Every array is indexed directly by product id: aisle_id and department_id
+# in the narrowest integer dtype (0 for ids not in products.csv) and the
+# names as one UTF-8 buffer with an offsets array, so id -> name is two
+# offset reads and one slice instead of a dict or frame lookup. Aisle and
+# department names are small lists indexed by their own ids.
+# The pipeline writes the arrays to data/artifacts/catalog/; the app opens
+# them memory-mapped (all worker processes share the pages) and falls back
+# to building the catalog from the cached products table.
+
+CATALOG = "catalog"
+
+_lock = threading.Lock()
+_cache = {}  # CATALOG -> (artifact mtime or source tables, ProductCatalog)
+
+
+def _group_names(ids, names):
+    """Names indexed by id (None for unused ids)."""
+    ids = np.asarray(ids, dtype=np.int64)
+    table = np.full(int(ids.max()) + 1 if len(ids) else 1, None, dtype=object)
+    table[ids] = [str(n) for n in names]
+    return table
+
+
+def _names_of(table, ids):
+    # Group id 0 is never used, so table[0] is None and stands in for unknown ids
+    return table[np.where(ids < len(table), ids, 0)]
+
+
+class ProductCatalog:
+    """Product names, aisles and departments in arrays indexed by product id."""
+
+    __slots__ = ("aisle_id", "department_id", "name_buffer", "name_offsets", "aisle_names", "department_names")
+
+    def __init__(self, aisle_id, department_id, name_buffer, name_offsets, aisle_names, department_names):
+        self.aisle_id = aisle_id
+        self.department_id = department_id
+        self.name_buffer = name_buffer
+        self.name_offsets = name_offsets
+        self.aisle_names = aisle_names
+        self.department_names = department_names
+
+    @classmethod
+    def from_frame(cls, products, aisles=None, departments=None):
+        """Build from a products frame; names of aisles and departments come from
+        the aisles/departments frames or from aisle/department columns of products."""
+        ids = products["product_id"].to_numpy(dtype=np.int64)
+        size = int(ids.max()) + 1 if len(ids) else 1
+        names = [""] * size
+        for i, name in zip(ids.tolist(), products["product_name"].astype(str).tolist()):
+            names[i] = name
+        buffer, offsets = encode_strings(names)
+
+        columns = {}
+        for group in ("aisle", "department"):
+            values = np.zeros(size, dtype=np.int64)
+            values[ids] = products[f"{group}_id"].to_numpy(dtype=np.int64)
+            columns[group] = values.astype(narrow_int_dtype(values))
+
+        if aisles is None:
+            aisles = products[["aisle_id", "aisle"]].drop_duplicates("aisle_id")
+        if departments is None:
+            departments = products[["department_id", "department"]].drop_duplicates("department_id")
+        return cls(
+            columns["aisle"], columns["department"], buffer, offsets,
+            _group_names(aisles["aisle_id"], aisles["aisle"]),
+            _group_names(departments["department_id"], departments["department"]),
+        )
+
+    def __len__(self):
+        return int(np.count_nonzero(self.aisle_id))
+
+    def __contains__(self, product_id):
+        return 0 <= product_id < len(self.aisle_id) and self.aisle_id[product_id] != 0
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.aisle_id, self.department_id, self.name_buffer, self.name_offsets))
+
+    def _ids(self, product_ids):
+        """(ids clipped to the arrays, mask of ids in the catalog) for a batch."""
+        ids = np.asarray(product_ids, dtype=np.int64).ravel()
+        in_range = (ids >= 0) & (ids < len(self.aisle_id))
+        ids = np.where(in_range, ids, 0)
+        return ids, in_range & (self.aisle_id[ids] != 0)
+
+    def name(self, product_id, default=None):
+        if product_id not in self:
+            return default
+        start, end = self.name_offsets[product_id], self.name_offsets[product_id + 1]
+        return str(memoryview(self.name_buffer)[start:end], "utf-8")
+
+    def names(self, product_ids, default=None):
+        """Names of a batch of product ids (default for ids not in the catalog)."""
+        ids, known = self._ids(product_ids)
+        starts, ends = self.name_offsets[ids].tolist(), self.name_offsets[ids + 1].tolist()
+        buffer = memoryview(self.name_buffer)
+        names = [str(buffer[a:b], "utf-8") for a, b in zip(starts, ends)]
+        for i in np.flatnonzero(~known).tolist():
+            names[i] = default
+        return names
+
+    def aisle_ids(self, product_ids):
+        """aisle_id of a batch of product ids (0 for ids not in the catalog)."""
+        ids, known = self._ids(product_ids)
+        return np.where(known, self.aisle_id[ids], 0)
+
+    def department_ids(self, product_ids):
+        ids, known = self._ids(product_ids)
+        return np.where(known, self.department_id[ids], 0)
+
+    def aisles(self, product_ids):
+        """Aisle names of a batch of product ids, as an object array (None when unknown)."""
+        return _names_of(self.aisle_names, self.aisle_ids(product_ids))
+
+    def departments(self, product_ids):
+        return _names_of(self.department_names, self.department_ids(product_ids))
+
+    def groups(self, product_ids, group_col):
+        """aisles() or departments() by column name, for the per-group tables."""
+        return self.aisles(product_ids) if group_col == "aisle" else self.departments(product_ids)
+
+
+# ---------------------------------------------------------------- artifact
+
+
+def write_catalog(catalog, path):
+    """Save the catalog as a directory of .npy files (replacing any previous one)."""
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    arrays = {
+        "aisle_id": catalog.aisle_id,
+        "department_id": catalog.department_id,
+        "name_buffer": catalog.name_buffer,
+        "name_offsets": catalog.name_offsets,
+    }
+    for group in ("aisle", "department"):
+        table = getattr(catalog, f"{group}_names")
+        arrays[f"{group}_names"], arrays[f"{group}_names_offsets"] = encode_strings(
+            "" if n is None else n for n in table
+        )
+        arrays[f"{group}_names_known"] = np.array([n is not None for n in table])
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), values)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"products": len(catalog), "arrays": sorted(arrays)}, f, indent=1)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+def read_catalog(path):
+    """Open a saved catalog with its large arrays memory-mapped."""
+    def load(name, mmap_mode="r"):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+    groups = []
+    for group in ("aisle", "department"):
+        names = decode_strings(load(f"{group}_names"), load(f"{group}_names_offsets", None))
+        known = load(f"{group}_names_known", None).tolist()
+        groups.append(np.array([n if k else None for n, k in zip(names, known)], dtype=object))
+    return ProductCatalog(load("aisle_id"), load("department_id"), load("name_buffer"), load("name_offsets"), *groups)
+
+
+def catalog_path(data_dir=DATA_DIR):
+    return artifact_path(CATALOG, data_dir)
+
+
+def build_catalog(data_dir=DATA_DIR):
+    """Write data_dir/artifacts/catalog from products, aisles and departments CSVs; returns its path."""
+    catalog = ProductCatalog.from_frame(
+        load_csv("products", data_dir), load_csv("aisles", data_dir), load_csv("departments", data_dir)
+    )
+    path = catalog_path(data_dir)
+    write_catalog(catalog, path)
+    return path
+
+
+def get_catalog():
+    """The process-wide catalog: the saved artifact when present (reloaded when
+    rewritten), else built from the cached products, aisles and departments tables."""
+    path = catalog_path()
+    try:
+        version = os.stat(os.path.join(path, "meta.json")).st_mtime_ns
+    except FileNotFoundError:
+        # Keyed by the identity of the cached tables, like core.search
+        version = (get_table("products"), get_table("aisles"), get_table("departments"))
+
+    def fresh(entry):
+        if entry is None or type(entry[0]) is not type(version):
+            return False
+        if isinstance(version, tuple):
+            return all(a is b for a, b in zip(entry[0], version))
+        return entry[0] == version
+
+    entry = _cache.get(CATALOG)
+    if fresh(entry):
+        return entry[1]
+    with _lock:
+        entry = _cache.get(CATALOG)
+        if not fresh(entry):
+            catalog = ProductCatalog.from_frame(*version) if isinstance(version, tuple) else read_catalog(path)
+            entry = (version, catalog)
+            _cache[CATALOG] = entry
+        return entry[1]
@@ -0,0 +1,132 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core.data_store import DATA_DIR
+
+# Pre-aggregated order cube for the dashboard.
+# The pipeline counts every order once into orders[dow, hour, segment] and
+# every ordered product into lines[dow, hour, segment, department], and
+# saves both to data/dashboard_cube.npz (the last segment holds orders
+# without a segment). A few thousand cells, so any filter of the dashboard
+# is a boolean mask per axis and one sum.
+
+CUBE_FILE = "dashboard_cube.npz"
+DAYS = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]  # order_dow 0..6
+HOURS = list(range(24))
+
+_lock = threading.Lock()
+_cache = {}  # path -> (mtime_ns, OrderCube)
+
+
+def build_cube(order_ids, dow, hour, segments, department_codes, n_segments, n_departments):
+    """(orders, lines) count arrays from one row per ordered product.
+
+    segments are per row in 0..n_segments (n_segments = no segment),
+    department_codes in 0..n_departments-1.
+    """
+    dow = np.asarray(dow, dtype=np.int64)
+    hour = np.asarray(hour, dtype=np.int64)
+    segments = np.asarray(segments, dtype=np.int64)
+    cell = (dow * 24 + hour) * (n_segments + 1) + segments
+    n_cells = 7 * 24 * (n_segments + 1)
+
+    lines = np.bincount(cell * n_departments + np.asarray(department_codes, dtype=np.int64),
+                        minlength=n_cells * n_departments)
+    _, first = np.unique(np.asarray(order_ids), return_index=True)
+    orders = np.bincount(cell[first], minlength=n_cells)
+    return (
+        orders.reshape(7, 24, n_segments + 1).astype(np.int32),
+        lines.reshape(7, 24, n_segments + 1, n_departments).astype(np.int32),
+    )
+
+
+class OrderCube:
+    """Order and product counts by day, hour, segment and department."""
+
+    def __init__(self, orders, lines, segments, departments):
+        self.orders = np.asarray(orders)
+        self.lines = np.asarray(lines)
+        self.segments = [str(s) for s in segments]
+        self.departments = [str(d) for d in departments]
+
+    def masks(self, days=None, hours=None, segments=None, departments=None):
+        """One boolean mask per axis; None keeps the whole axis."""
+        def mask(labels, selected):
+            if selected is None:
+                return np.ones(len(labels), dtype=bool)
+            return np.isin(labels, list(selected))
+        return (
+            mask(DAYS, days), mask(HOURS, hours),
+            mask(self.segments, segments), mask(self.departments, departments),
+        )
+
+    def total(self, by, measure="orders", **filters):
+        """Counts per label of one axis ("day", "hour", "segment" or "department") under the filters.
+
+        The orders measure has no department axis and ignores a department filter.
+        """
+        day, hour, segment, department = self.masks(**filters)
+        axes = ["day", "hour", "segment", "department"]
+        if measure == "orders":
+            values = self.orders[np.ix_(day, hour, segment)]
+            axes = axes[:3]
+        else:
+            values = self.lines[np.ix_(day, hour, segment, department)]
+        keep = axes.index(by)
+        counts = values.sum(axis=tuple(i for i in range(len(axes)) if i != keep))
+        labels = {"day": DAYS, "hour": HOURS, "segment": self.segments, "department": self.departments}[by]
+        mask = {"day": day, "hour": hour, "segment": segment, "department": department}[by]
+        return pd.Series(counts, index=pd.Index(np.asarray(labels, dtype=object)[mask], name=by))
+
+    def profile(self, **filters):
+        """Share of each segment's products by department (segments x departments)."""
+        day, hour, segment, department = self.masks(**filters)
+        counts = self.lines[np.ix_(day, hour, segment, department)].sum(axis=(0, 1))
+        share = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+        return pd.DataFrame(
+            share,
+            index=pd.Index(np.asarray(self.segments, dtype=object)[segment], name="segment"),
+            columns=pd.Index(np.asarray(self.departments, dtype=object)[department], name="department"),
+        )
+
+
+def save_cube(path, orders, lines, segments, departments):
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(
+        tmp,
+        orders=np.asarray(orders, dtype=np.int32),
+        lines=np.asarray(lines, dtype=np.int32),
+        segments=np.asarray(segments, dtype=str),
+        departments=np.asarray(departments, dtype=str),
+    )
+    os.replace(tmp, path)
+
+
+def load_cube(path):
+    with np.load(path) as f:
+        return OrderCube(f["orders"], f["lines"], f["segments"].tolist(), f["departments"].tolist())
+
+
+def cube_path(data_dir=DATA_DIR):
+    return os.path.join(data_dir, CUBE_FILE)
+
+
+def get_cube(data_dir=DATA_DIR):
+    """The cached dashboard cube, reloaded when the file changes; None if it was never built."""
+    path = cube_path(data_dir)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    entry = _cache.get(path)
+    if entry is not None and entry[0] == mtime:
+        return entry[1]
+    with _lock:
+        entry = _cache.get(path)
+        if entry is None or entry[0] != mtime:
+            entry = (mtime, load_cube(path))
+            _cache[path] = entry
+        return entry[1]
@@ -0,0 +1,213 @@
+import os
+import threading
+
+import pandas as pd
+
+from core import profiling
+from core.artifacts import meta_path, read_table, write_table
+
+# Shared data layer: one parsed copy of each table per process.
+# Page renderers call get_table() on every rerun; the file is only loaded
+# on the first call and again when its mtime changes. Returned frames are
+# shared between sessions and must be treated as read-only.
+# When data/artifacts/<table>/ exists (see build_artifacts) the table is
+# opened memory-mapped from its columnar artifact instead of parsing the CSV,
+# unless the CSV was modified after the artifact was written; rerun
+# build_artifacts after editing a CSV by hand to get the artifact back.
+
+DATA_DIR = "data"
+
+
+def _clean_departments(df):
+    # departments.csv is a wide join dump; only the first rows hold departments
+    df = df.dropna(subset=["department_id", "department"])
+    df = df.astype({"department_id": "int16"})
+    df["department"] = df["department"].astype(str).astype("category")
+    return df.reset_index(drop=True)
+
+
+# Table registry: name -> (file name, read_csv arguments, post-processing)
+TABLES = {
+    "aisles": (
+        "aisles.csv",
+        {"dtype": {"aisle_id": "int16", "aisle": "category"}},
+        None,
+    ),
+    "departments": (
+        "departments.csv",
+        {"usecols": ["department_id", "department"]},
+        _clean_departments,
+    ),
+    "bundle_by_aisle": (
+        "bundle_top10_by_aisle.csv",
+        {"dtype": {"aisle": "category"}},
+        None,
+    ),
+    "bundle_by_department": (
+        "bundle_top10_by_department.csv",
+        {"dtype": {"department": "category"}},
+        None,
+    ),
+    "bundle3_by_aisle": (
+        "bundle3_top10_by_aisle.csv",
+        {"dtype": {"aisle": "category"}},
+        None,
+    ),
+    "bundle3_by_department": (
+        "bundle3_top10_by_department.csv",
+        {"dtype": {"department": "category"}},
+        None,
+    ),
+    "top5_by_aisle": (
+        "top5_selling_by_aisle.csv",
+        {"dtype": {"product_id": "int32", "total_orders": "int64", "aisle_id": "int16", "aisle": "category"}},
+        None,
+    ),
+    "top5_by_department": (
+        "top5_selling_by_department.csv",
+        {"dtype": {"product_id": "int32", "total_orders": "int64", "department_id": "int16", "department": "category"}},
+        None,
+    ),
+    "top5_sliced_by_aisle": (
+        "top5_sliced_by_aisle.csv",
+        {"dtype": {"slice": "category", "product_id": "int32", "total_orders": "int64", "error": "int64",
+                   "aisle_id": "int16", "aisle": "category"}},
+        None,
+    ),
+    "top5_sliced_by_department": (
+        "top5_sliced_by_department.csv",
+        {"dtype": {"slice": "category", "product_id": "int32", "total_orders": "int64", "error": "int64",
+                   "department_id": "int16", "department": "category"}},
+        None,
+    ),
+    "rules": (
+        "fpg_rules.csv",
+        {"usecols": ["antecedents", "consequents", "support", "confidence", "lift"]},
+        None,
+    ),
+    "dept_revenue": (
+        "dept_revenue.csv",
+        {"dtype": {"department": "category"}},
+        None,
+    ),
+    "user_segment_report": (
+        "user_segment_report.csv",
+        {"dtype": {"segment": "int16", "customers": "int64"}},
+        None,
+    ),
+    "simulation_counts": (
+        "simulation_counts.csv",
+        {"dtype": {"segment": "int8", "product_id": "int32", "department": "category",
+                   "units": "int64", "bundle_units": "int64"}},
+        None,
+    ),
+    "products": (
+        "products.csv",
+        {"dtype": {"product_id": "int32", "aisle_id": "int16", "department_id": "int8"}},
+        None,
+    ),
+}
+
+_lock = threading.Lock()
+_cache = {}   # name -> ((path, mtime_ns), DataFrame)
+_stats = {}   # name -> {"hits": int, "misses": int, "reloads": int}
+
+
+def table_path(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, TABLES[name][0])
+
+
+def artifact_path(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, "artifacts", name)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _source(name):
+    """(path, mtime) of the file backing a table: the artifact meta if present
+    and not older than the CSV, else the CSV."""
+    csv, meta = table_path(name), meta_path(artifact_path(name))
+    csv_mtime, meta_mtime = _mtime(csv), _mtime(meta)
+    if meta_mtime is not None and (csv_mtime is None or csv_mtime <= meta_mtime):
+        return meta, meta_mtime
+    if csv_mtime is None:
+        raise FileNotFoundError(csv)
+    return csv, csv_mtime
+
+
+def load_csv(name, data_dir=DATA_DIR):
+    _, read_kwargs, post = TABLES[name]
+    df = pd.read_csv(table_path(name, data_dir), **read_kwargs)
+    if post is not None:
+        df = post(df)
+    return df
+
+
+def _load(name, path):
+    if path.endswith(".csv"):
+        return load_csv(name)
+    return read_table(os.path.dirname(path))
+
+
+def get_table(name):
+    """Return the cached DataFrame for a registered table, (re)loading it if needed."""
+    version = _source(name)
+    entry = _cache.get(name)
+    counters = _stats.setdefault(name, {"hits": 0, "misses": 0, "reloads": 0})
+
+    if entry is not None and entry[0] == version:
+        counters["hits"] += 1
+        profiling.count("table_hits")
+        return entry[1]
+
+    profiling.count("table_misses")
+    with _lock:
+        # Another session may have loaded it while we waited
+        entry = _cache.get(name)
+        if entry is not None and entry[0] == version:
+            counters["hits"] += 1
+            return entry[1]
+
+        with profiling.span(f"load:{name}"):
+            df = _load(name, version[0])
+        counters["misses"] += 1
+        if entry is not None:
+            counters["reloads"] += 1
+        _cache[name] = (version, df)
+        return df
+
+
+def build_artifacts(data_dir=DATA_DIR):
+    """Convert every registered CSV present in data_dir into its columnar artifact."""
+    built = []
+    for name in TABLES:
+        if os.path.exists(table_path(name, data_dir)):
+            write_table(load_csv(name, data_dir), artifact_path(name, data_dir))
+            built.append(name)
+    return built
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+        _stats.clear()
+
+
+def cache_stats():
+    """Snapshot of hit/miss/reload counters per table."""
+    return {name: dict(counters) for name, counters in _stats.items()}
+
+
+def prometheus_text():
+    """Cache counters in Prometheus text exposition format."""
+    lines = []
+    for metric in ("hits", "misses", "reloads"):
+        lines.append(f"# TYPE data_store_{metric}_total counter")
+        for name, counters in sorted(_stats.items()):
+            lines.append(f'data_store_{metric}_total{{table="{name}"}} {counters[metric]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,70 @@
+import threading
+
+from core import profiling
+from core.data_store import get_table
+
+# Per-group lookup index over the cached tables.
+# Each table is grouped once by its normalized aisle/department key and each
+# group is pre-sorted by its ranking column, so a page lookup is a dict hit
+# returning a ready-to-render slice instead of a lowercase-and-scan of the
+# whole frame. The index is rebuilt whenever data_store reloads the table.
+
+# Indexed tables: name -> (group column, ranking column)
+INDEXES = {
+    "bundle_by_aisle": ("aisle", "lift"),
+    "bundle_by_department": ("department", "lift"),
+    "bundle3_by_aisle": ("aisle", "lift"),
+    "bundle3_by_department": ("department", "lift"),
+    "top5_by_aisle": ("aisle", "total_orders"),
+    "top5_by_department": ("department", "total_orders"),
+    "top5_sliced_by_aisle": ("aisle", "total_orders"),
+    "top5_sliced_by_department": ("department", "total_orders"),
+}
+
+_lock = threading.Lock()
+_indexes = {}  # name -> (source DataFrame, {key: DataFrame}, empty DataFrame)
+
+
+def normalize_key(value):
+    """Key used for every aisle/department comparison."""
+    return str(value).strip().lower()
+
+
+def build_index(df, group_col, sort_col):
+    """Group df by normalized group_col, each group sorted by sort_col descending."""
+    keys = df[group_col].astype(str).str.strip().str.lower()
+    ordered = (
+        df.assign(_key=keys)
+        .sort_values(["_key", sort_col], ascending=[True, False], kind="stable")
+    )
+    return {
+        key: group.drop(columns="_key").reset_index(drop=True)
+        for key, group in ordered.groupby("_key", sort=False)
+    }
+
+
+def _get_index(name):
+    df = get_table(name)
+    entry = _indexes.get(name)
+    if entry is not None and entry[0] is df:
+        return entry
+
+    with _lock:
+        entry = _indexes.get(name)
+        if entry is None or entry[0] is not df:
+            group_col, sort_col = INDEXES[name]
+            entry = (df, build_index(df, group_col, sort_col), df.iloc[0:0])
+            _indexes[name] = entry
+        return entry
+
+
+def lookup(name, key):
+    """Pre-sorted rows of table `name` for one aisle/department (empty frame if none)."""
+    _, index, empty = _get_index(name)
+    rows = index.get(normalize_key(key), empty)
+    profiling.count("rows_scanned", len(rows))
+    return rows
+
+
+def group_keys(name):
+    return list(_get_index(name)[1])
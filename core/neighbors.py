@@ -0,0 +1,192 @@
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from core.data_store import DATA_DIR, artifact_path
+
+# Nearest-neighbour index over the product embeddings.
+# The pipeline's embed stage takes the SVD of the order x product matrix
+# and saves one unit-length float32 vector per product to
+# data/artifacts/embeddings/, so the cosine of two products is a dot
+# product. Exact search scores the queries against the whole matrix in
+# blocks of BLOCK_ROWS vectors, keeping a running top-k, so a single
+# query is one matrix-vector product and a batch never materializes
+# queries x products. The approximate mode is an inverted file: spherical
+# k-means splits the vectors into about sqrt(n) lists, built on first use,
+# and a query only scores the lists whose centroids are closest to it.
+
+EMBEDDINGS = "embeddings"
+BLOCK_ROWS = 16_384   # vectors scored per matrix product
+QUERY_ROWS = 1_024    # queries scored together
+
+_lock = threading.Lock()
+_cache = {}  # path -> (meta mtime_ns, NeighborIndex)
+
+
+def top_k(scores, k):
+    """Column indices of the k largest scores of every row, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((len(scores), 0), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+class NeighborIndex:
+    """Cosine nearest neighbours of unit-length product vectors."""
+
+    def __init__(self, product_ids, vectors):
+        self.product_ids = np.asarray(product_ids, dtype=np.int64)
+        self.vectors = vectors  # float32, possibly memory-mapped
+        # Dense product id -> row lookup (-1 for products without a vector)
+        self.rows = np.full(int(self.product_ids.max(initial=-1)) + 1, -1, dtype=np.int64)
+        self.rows[self.product_ids] = np.arange(len(self.product_ids))
+        self.lists = None  # (centroids, indptr, members) of the approximate mode
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def __contains__(self, product_id):
+        return 0 <= product_id < len(self.rows) and self.rows[product_id] >= 0
+
+    def search(self, queries, k=10):
+        """(rows, scores) of the k vectors closest to every query vector, exactly."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        rows, scores = [], []
+        for q in range(0, len(queries), QUERY_ROWS):
+            batch = queries[q:q + QUERY_ROWS]
+            best_rows = np.empty((len(batch), 0), dtype=np.int64)
+            best_scores = np.empty((len(batch), 0), dtype=np.float32)
+            for start in range(0, len(self.vectors), BLOCK_ROWS):
+                block = batch @ self.vectors[start:start + BLOCK_ROWS].T
+                top = top_k(block, k)
+                best_rows = np.concatenate([best_rows, top + start], axis=1)
+                best_scores = np.concatenate([best_scores, np.take_along_axis(block, top, axis=1)], axis=1)
+                keep = top_k(best_scores, k)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+            rows.append(best_rows)
+            scores.append(best_scores)
+        if not rows:
+            return np.empty((0, 0), dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(scores)
+
+    def _nearest_list(self, vectors, centroids):
+        return np.concatenate([
+            np.argmax(vectors[start:start + BLOCK_ROWS] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), BLOCK_ROWS)
+        ])
+
+    def build_lists(self, n_lists=None, iterations=10, seed=0):
+        """Split the vectors into n_lists inverted lists (default sqrt(n)) by spherical k-means."""
+        vectors = np.asarray(self.vectors)
+        n = len(vectors)
+        n_lists = min(n_lists or max(1, int(np.sqrt(n))), n)
+        centroids = vectors[np.random.default_rng(seed).choice(n, n_lists, replace=False)]
+        for _ in range(iterations):
+            assign = self._nearest_list(vectors, centroids)
+            members = sparse.csr_matrix(
+                (np.ones(n, dtype=np.float32), (assign, np.arange(n))), shape=(n_lists, n)
+            )
+            sums = np.asarray(members @ vectors)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # An empty list keeps its centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, np.finfo(np.float32).tiny), centroids)
+
+        assign = self._nearest_list(vectors, centroids)
+        indptr = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=n_lists), out=indptr[1:])
+        self.lists = (centroids.astype(np.float32), indptr, np.argsort(assign, kind="stable"))
+
+    def search_approximate(self, queries, k=10, n_probe=32):
+        """Like search, but scoring only the vectors of the n_probe lists closest
+        to each query (rows of -1 pad a result with fewer than k candidates)."""
+        if self.lists is None:
+            with _lock:
+                if self.lists is None:
+                    self.build_lists()
+        centroids, indptr, members = self.lists
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for i, probe in enumerate(top_k(queries @ centroids.T, n_probe)):
+            candidates = np.sort(np.concatenate([members[indptr[c]:indptr[c + 1]] for c in probe]))
+            candidate_scores = (self.vectors[candidates] @ queries[i])[None]
+            top = top_k(candidate_scores, k)[0]
+            rows[i, :len(top)] = candidates[top]
+            scores[i, :len(top)] = candidate_scores[0, top]
+        return rows, scores
+
+    def similar(self, product_id, k=10, approximate=False):
+        """[(product_id, cosine), ...] of the k products closest to one product,
+        itself excluded ([] if it has no vector)."""
+        if product_id not in self:
+            return []
+        query = self.vectors[self.rows[product_id]]
+        search = self.search_approximate if approximate else self.search
+        rows, scores = search(query, k + 1)
+        return [
+            (int(self.product_ids[row]), float(score))
+            for row, score in zip(rows[0].tolist(), scores[0].tolist())
+            if row >= 0 and self.product_ids[row] != product_id
+        ][:k]
+
+
+# ---------------------------------------------------------------- artifact
+
+
+def write_embeddings(path, product_ids, vectors):
+    """Save product ids and their vectors as .npy files (replacing any previous ones)."""
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    np.save(os.path.join(tmp, "product_ids.npy"), np.asarray(product_ids, dtype=np.int64))
+    np.save(os.path.join(tmp, "vectors.npy"), vectors)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"products": len(vectors), "dimensions": int(vectors.shape[1])}, f, indent=1)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+def read_embeddings(path):
+    """A NeighborIndex over a saved embeddings directory, its vectors memory-mapped."""
+    return NeighborIndex(
+        np.load(os.path.join(path, "product_ids.npy")),
+        np.load(os.path.join(path, "vectors.npy"), mmap_mode="r"),
+    )
+
+
+def embeddings_path(data_dir=DATA_DIR):
+    return artifact_path(EMBEDDINGS, data_dir)
+
+
+def get_index(data_dir=DATA_DIR):
+    """The cached neighbour index, reloaded when the embeddings are rewritten; None if they were never built."""
+    path = embeddings_path(data_dir)
+    try:
+        mtime = os.stat(os.path.join(path, "meta.json")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    entry = _cache.get(path)
+    if entry is not None and entry[0] == mtime:
+        return entry[1]
+    with _lock:
+        entry = _cache.get(path)
+        if entry is None or entry[0] != mtime:
+            entry = (mtime, read_embeddings(path))
+            _cache[path] = entry
+        return entry[1]
+
+
+def similar(product_id, k=10, approximate=False):
+    """Products most similar to one product (see NeighborIndex.similar)."""
+    index = get_index()
+    if index is None:
+        raise FileNotFoundError(f"{embeddings_path()} not found; build it with python -m pipeline build")
+    return index.similar(product_id, k, approximate)
@@ -0,0 +1,198 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+# Rerun instrumentation.
+# app.py starts a Profile at the top of every rerun and finishes it at the
+# end; in between, pages and core modules open timed spans and bump
+# counters (table cache hits, rows scanned, HTML bytes). Each Streamlit
+# session runs its script in its own thread, so the current Profile lives in
+# a thread-local. When no Profile is active, span() returns a shared no-op
+# context manager and count() returns at once.
+#
+# A rerun is recorded when the URL has ?profile=1 (which also draws the
+# overlay) or when APP_PROFILE=1 is set for the whole server. Finished
+# reruns feed per-page windows of the last WINDOW durations, for p50/p99.
+# With APP_PROFILE_DUMP=path, a background thread writes path.json and
+# path.prom (Prometheus text format) every APP_PROFILE_INTERVAL seconds.
+
+WINDOW = 1000
+
+
+class _State(threading.local):
+    profile = None  # class default: reading it never raises in a new thread
+
+
+_local = _State()
+_lock = threading.Lock()
+_durations = defaultdict(lambda: deque(maxlen=WINDOW))  # (page, span) -> recent ms
+_counters = defaultdict(float)  # (page, counter) -> total
+_runs = defaultdict(int)  # page -> finished reruns
+_dumper = None
+
+
+class Profile:
+    """Spans and counters of one rerun."""
+
+    def __init__(self, page):
+        self.page = page
+        self.spans = []  # (name, depth, ms) in completion order
+        self.counters = defaultdict(float)
+        self.depth = 0
+        self.start = time.perf_counter()
+        self.total_ms = None
+
+
+class _Span:
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.profile.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        self.profile.depth -= 1
+        self.profile.spans.append((self.name, self.profile.depth, elapsed))
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def enabled_by_env():
+    return os.environ.get("APP_PROFILE") == "1"
+
+
+def start(page, force=False):
+    """Begin recording this rerun if forced or APP_PROFILE=1; returns the Profile or None."""
+    if not (force or enabled_by_env()):
+        _local.profile = None
+        return None
+    _local.profile = Profile(page)
+    dump_path = os.environ.get("APP_PROFILE_DUMP")
+    if dump_path and _dumper is None:
+        start_dumper(dump_path, float(os.environ.get("APP_PROFILE_INTERVAL", "60")))
+    return _local.profile
+
+
+def span(name):
+    """Context manager timing a block of the current rerun (no-op when not recording)."""
+    profile = _local.profile
+    if profile is None:
+        return _NO_SPAN
+    return _Span(profile, name)
+
+
+def count(name, value=1):
+    profile = _local.profile
+    if profile is not None:
+        profile.counters[name] += value
+
+
+def finish():
+    """Stop recording this rerun and add it to the per-page aggregates."""
+    profile = _local.profile
+    if profile is None:
+        return None
+    _local.profile = None
+    profile.total_ms = (time.perf_counter() - profile.start) * 1000
+    with _lock:
+        _runs[profile.page] += 1
+        _durations[(profile.page, "rerun")].append(profile.total_ms)
+        for name, _, ms in profile.spans:
+            _durations[(profile.page, name)].append(ms)
+        for name, value in profile.counters.items():
+            _counters[(profile.page, name)] += value
+    return profile
+
+
+def _quantile(ordered, q):
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def snapshot():
+    """{page: {"runs", "spans": {name: {"count", "p50_ms", "p99_ms"}}, "counters": {name: total}}}"""
+    with _lock:
+        durations = {key: sorted(values) for key, values in _durations.items()}
+        counters = dict(_counters)
+        runs = dict(_runs)
+    pages = {page: {"runs": n, "spans": {}, "counters": {}} for page, n in runs.items()}
+    for (page, name), ordered in durations.items():
+        pages[page]["spans"][name] = {
+            "count": len(ordered),
+            "p50_ms": round(_quantile(ordered, 0.5), 3),
+            "p99_ms": round(_quantile(ordered, 0.99), 3),
+        }
+    for (page, name), value in counters.items():
+        pages[page]["counters"][name] = value
+    return pages
+
+
+def _label(value):
+    """A label value escaped for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(pages=None):
+    """The snapshot in the Prometheus text exposition format."""
+    pages = snapshot() if pages is None else pages
+    lines = ["# TYPE app_span_ms summary"]
+    for page, stats in sorted(pages.items()):
+        for name, s in sorted(stats["spans"].items()):
+            labels = f'page="{_label(page)}",span="{_label(name)}"'
+            lines.append(f'app_span_ms{{{labels},quantile="0.5"}} {s["p50_ms"]}')
+            lines.append(f'app_span_ms{{{labels},quantile="0.99"}} {s["p99_ms"]}')
+            lines.append(f"app_span_ms_count{{{labels}}} {s['count']}")
+    lines.append("# TYPE app_counter_total counter")
+    for page, stats in sorted(pages.items()):
+        for name, value in sorted(stats["counters"].items()):
+            lines.append(f'app_counter_total{{page="{_label(page)}",counter="{_label(name)}"}} {value:g}')
+    lines.append("# TYPE app_reruns_total counter")
+    for page, stats in sorted(pages.items()):
+        lines.append(f'app_reruns_total{{page="{_label(page)}"}} {stats["runs"]}')
+    return "\n".join(lines) + "\n"
+
+
+def dump(path):
+    """Write path.json and path.prom with the current aggregates."""
+    pages = snapshot()
+    for suffix, text in ((".json", json.dumps(pages, indent=1)), (".prom", prometheus_text(pages))):
+        tmp = path + suffix + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path + suffix)
+
+
+def start_dumper(path, interval):
+    """Dump the aggregates every `interval` seconds from a daemon thread (once per process)."""
+    global _dumper
+    with _lock:
+        if _dumper is not None:
+            return _dumper
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                dump(path)
+
+        _dumper = threading.Thread(target=loop, name="profile-dump", daemon=True)
+        _dumper.start()
+        return _dumper
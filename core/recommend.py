@@ -0,0 +1,154 @@
+import threading
+
+import numpy as np
+
+from core.catalog import get_catalog
+from core.data_store import get_table
+
+# "Frequently bought with" index over fpg_rules.csv.
+# The frozenset strings are parsed once into integer product ids and the
+# single-item-antecedent rules are laid out as CSR adjacency: indptr is
+# indexed directly by product id and every row is sorted by lift, with
+# confidence and support stored alongside as float32. A one-product basket
+# is a slice; larger baskets sum the lift of every rule pointing at each
+# candidate. Rules with several antecedent items are kept in a small dict
+# and apply only when the basket contains all of them.
+
+_lock = threading.Lock()
+_built = {}  # slot -> (source DataFrame, built object)
+
+
+def parse_itemsets(series):
+    """frozenset({'1', '2'}) strings -> lists of int product ids."""
+    return [[int(x) for x in ids] for ids in series.astype(str).str.findall(r"\d+")]
+
+
+class RuleIndex:
+    """CSR adjacency antecedent product id -> consequents sorted by lift."""
+
+    def __init__(self, antecedents, consequents, support, confidence, lift):
+        single_ante, single_cons, single_rows = [], [], []
+        self.multi = {}  # frozenset of antecedent ids -> [(consequent, row), ...]
+        for row, (ante, cons) in enumerate(zip(antecedents, consequents)):
+            for c in cons:
+                if len(ante) == 1:
+                    single_ante.append(ante[0])
+                    single_cons.append(c)
+                    single_rows.append(row)
+                else:
+                    self.multi.setdefault(frozenset(ante), []).append((c, row))
+
+        lift = np.asarray(lift, dtype=np.float32)
+        confidence = np.asarray(confidence, dtype=np.float32)
+        support = np.asarray(support, dtype=np.float32)
+        self.rule_lift, self.rule_confidence, self.rule_support = lift, confidence, support
+
+        ante = np.asarray(single_ante, dtype=np.int64)
+        cons = np.asarray(single_cons, dtype=np.int32)
+        rows = np.asarray(single_rows, dtype=np.int64)
+        order = np.lexsort((-lift[rows], ante))
+        ante, cons, rows = ante[order], cons[order], rows[order]
+
+        self.n_products = int(ante.max(initial=-1)) + 1
+        self.indptr = np.zeros(self.n_products + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ante, minlength=self.n_products), out=self.indptr[1:])
+        self.consequents = cons
+        self.lift, self.confidence, self.support = lift[rows], confidence[rows], support[rows]
+
+    def __len__(self):
+        return len(self.consequents)
+
+    def antecedents(self):
+        """Product ids that have at least one rule."""
+        return np.nonzero(np.diff(self.indptr))[0]
+
+    def neighbors(self, product_id):
+        """(consequents, lift, confidence, support) of one product, best lift first."""
+        if not 0 <= product_id < self.n_products:
+            empty = np.empty(0, np.float32)
+            return np.empty(0, np.int32), empty, empty, empty
+        lo, hi = self.indptr[product_id], self.indptr[product_id + 1]
+        return self.consequents[lo:hi], self.lift[lo:hi], self.confidence[lo:hi], self.support[lo:hi]
+
+    def recommend(self, basket, k=10):
+        """Top-k products for a basket as (product_id, score, confidence, support) tuples.
+
+        score is the summed lift of the basket's rules pointing at a product;
+        confidence and support are those of its strongest single rule.
+        """
+        basket = [int(p) for p in basket]
+        parts = [self.neighbors(p) for p in basket]
+        basket_set = frozenset(basket)
+        for ante, targets in self.multi.items():
+            if ante <= basket_set:
+                ids, rows = zip(*targets)
+                rows = np.asarray(rows)
+                parts.append((np.asarray(ids, np.int32), self.rule_lift[rows],
+                              self.rule_confidence[rows], self.rule_support[rows]))
+
+        if len(parts) == 1:
+            # One product: its row is already sorted by lift
+            ids, lift, confidence, support = parts[0]
+            keep = ~np.isin(ids, basket)
+            ids, lift, confidence, support = ids[keep][:k], lift[keep][:k], confidence[keep][:k], support[keep][:k]
+            return list(zip(ids.tolist(), lift.tolist(), confidence.tolist(), support.tolist()))
+
+        ids = np.concatenate([p[0] for p in parts]) if parts else np.empty(0, np.int32)
+        if not len(ids):
+            return []
+        lift = np.concatenate([p[1] for p in parts])
+        confidence = np.concatenate([p[2] for p in parts])
+        support = np.concatenate([p[3] for p in parts])
+
+        unique, inverse = np.unique(ids, return_inverse=True)
+        score = np.bincount(inverse, weights=lift, minlength=len(unique))
+        score[np.isin(unique, basket)] = -1
+        # Strongest single rule per candidate (last in lift order), for its confidence and support
+        order = np.lexsort((lift, inverse))
+        best = order[np.r_[np.nonzero(np.diff(inverse[order]))[0], len(order) - 1]]
+
+        top = np.argsort(-score, kind="stable")[:k]
+        top = top[score[top] > 0]
+        return list(zip(
+            unique[top].tolist(), score[top].tolist(),
+            confidence[best[top]].tolist(), support[best[top]].tolist(),
+        ))
+
+
+def build_index(rules):
+    return RuleIndex(
+        parse_itemsets(rules["antecedents"]),
+        parse_itemsets(rules["consequents"]),
+        rules["support"].to_numpy(),
+        rules["confidence"].to_numpy(),
+        rules["lift"].to_numpy(),
+    )
+
+
+def _cached(slot, name, build):
+    """build(table) memoized per identity of the cached table, like core.lookup."""
+    table = get_table(name)
+    entry = _built.get(slot)
+    if entry is not None and entry[0] is table:
+        return entry[1]
+    with _lock:
+        entry = _built.get(slot)
+        if entry is None or entry[0] is not table:
+            entry = (table, build(table))
+            _built[slot] = entry
+        return entry[1]
+
+
+def get_index():
+    """The rule index of the cached rules table, rebuilt when the table reloads."""
+    return _cached("index", "rules", build_index)
+
+
+def product_names(product_ids):
+    """Names of product ids ("Unknown product" for ids not in products.csv)."""
+    return get_catalog().names(product_ids, "Unknown product")
+
+
+def recommend(basket, k=10):
+    """Top-k "frequently bought with" products for a basket of product ids."""
+    return get_index().recommend(basket, k)
@@ -0,0 +1,151 @@
+import threading
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from core.data_store import get_table
+
+# Type-ahead product search over products.csv.
+# Names are normalized (accents stripped, lowercase, single spaces) and the
+# products are numbered by rank: total_orders from the bestseller tables
+# (0 when unknown), then shorter name, then name. Two structures answer a
+# query without scanning the product table:
+#   - the normalized names in sorted order, where a prefix is one
+#     searchsorted range;
+#   - a byte-trigram index (CSR: trigram code -> sorted ranks), where a
+#     substring is the intersection of its trigrams' postings, confirmed
+#     on the few best-ranked candidates only.
+# Name-prefix matches come first, then other substring matches, each in
+# rank order. Queries shorter than three characters match prefixes only.
+
+_lock = threading.Lock()
+_index = None  # (source DataFrames, ProductSearch)
+
+
+def normalize_name(value):
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
+def trigram_codes(data):
+    """24-bit codes of every 3-byte window of a uint8 array."""
+    data = data.astype(np.int32)
+    return (data[:-2] << 16) | (data[1:-1] << 8) | data[2:]
+
+
+class ProductSearch:
+    """Prefix and substring search over product names, ranked by total_orders."""
+
+    def __init__(self, product_ids, names, total_orders):
+        normalized = [normalize_name(n) for n in names]
+        lengths = np.fromiter((len(n) for n in normalized), dtype=np.int64, count=len(normalized))
+        order = np.lexsort((np.asarray(normalized, dtype=object), lengths, -np.asarray(total_orders)))
+
+        self.product_ids = np.asarray(product_ids)[order]
+        self.names = np.asarray(names, dtype=object)[order]
+        self.total_orders = np.asarray(total_orders)[order]
+        self.normalized = [normalized[i] for i in order]
+
+        # Prefix structure: normalized names sorted, with their ranks
+        by_name = np.argsort(np.asarray(self.normalized, dtype=object), kind="stable")
+        self.sorted_names = [self.normalized[i] for i in by_name]
+        self.sorted_ranks = by_name
+
+        # Trigram postings over the UTF-8 bytes of every name (a 0 byte separates names)
+        encoded = [n.encode("utf-8") for n in self.normalized]
+        buffer = np.frombuffer(b"\0".join(encoded) + b"\0", dtype=np.uint8)
+        starts = np.zeros(len(encoded), dtype=np.int64)
+        starts[1:] = np.cumsum([len(e) + 1 for e in encoded])[:-1]
+        codes = trigram_codes(buffer)
+        windows = np.arange(len(codes))
+        keep = (buffer[:-2] != 0) & (buffer[1:-1] != 0) & (buffer[2:] != 0)
+        ranks = np.searchsorted(starts, windows[keep], side="right") - 1
+        pairs = np.unique((codes[keep].astype(np.int64) << 32) | ranks)
+        self.codes, counts = np.unique(pairs >> 32, return_counts=True)
+        self.indptr = np.zeros(len(self.codes) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.indptr[1:])
+        self.postings = (pairs & 0xFFFFFFFF).astype(np.int32)
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def prefix_ranks(self, query):
+        """Ranks of the names starting with query, best first."""
+        lo = bisect_left(self.sorted_names, query)
+        hi = bisect_left(self.sorted_names, query + "\U0010ffff")
+        return np.sort(self.sorted_ranks[lo:hi])
+
+    def substring_ranks(self, query, k, skip):
+        """Up to k ranks (not in skip) of names containing query, best first."""
+        codes = np.unique(trigram_codes(np.frombuffer(query.encode("utf-8"), dtype=np.uint8)))
+        pos = np.searchsorted(self.codes, codes)
+        if (pos >= len(self.codes)).any() or (self.codes[np.minimum(pos, len(self.codes) - 1)] != codes).any():
+            return np.empty(0, np.int32)
+        postings = sorted(
+            (self.postings[self.indptr[p]:self.indptr[p + 1]] for p in pos), key=len
+        )
+        candidates = postings[0]
+        for other in postings[1:]:
+            candidates = np.intersect1d(candidates, other, assume_unique=True)
+            if not len(candidates):
+                break
+
+        # Every trigram present does not guarantee the substring; confirm in rank order
+        found = []
+        for rank in candidates.tolist():
+            if rank not in skip and query in self.normalized[rank]:
+                found.append(rank)
+                if len(found) == k:
+                    break
+        return np.asarray(found, dtype=np.int32)
+
+    def search(self, query, k=10):
+        """Up to k (product_id, product_name, total_orders) matches for a query."""
+        query = normalize_name(query)
+        if not query:
+            return []
+        ranks = self.prefix_ranks(query)[:k]
+        if len(ranks) < k and len(query.encode("utf-8")) >= 3:
+            more = self.substring_ranks(query, k - len(ranks), set(ranks.tolist()))
+            ranks = np.concatenate([ranks, more])
+        return list(zip(
+            self.product_ids[ranks].tolist(), self.names[ranks].tolist(), self.total_orders[ranks].tolist(),
+        ))
+
+
+def product_orders(products, *bestsellers):
+    """total_orders per product from the bestseller tables (0 when not listed)."""
+    orders = pd.concat([t[["product_id", "total_orders"]] for t in bestsellers], ignore_index=True)
+    orders = orders.groupby("product_id")["total_orders"].max()
+    return orders.reindex(products["product_id"]).fillna(0).astype(np.int64).to_numpy()
+
+
+def build_index(products, *bestsellers):
+    return ProductSearch(
+        products["product_id"].to_numpy(),
+        products["product_name"].astype(str).to_numpy(),
+        product_orders(products, *bestsellers),
+    )
+
+
+def get_search():
+    """The search index of the cached products and bestseller tables, rebuilt when they reload."""
+    global _index
+    tables = (get_table("products"), get_table("top5_by_aisle"), get_table("top5_by_department"))
+    entry = _index
+    if entry is not None and all(a is b for a, b in zip(entry[0], tables)):
+        return entry[1]
+    with _lock:
+        entry = _index
+        if entry is None or not all(a is b for a, b in zip(entry[0], tables)):
+            entry = (tables, build_index(*tables))
+            _index = entry
+        return entry[1]
+
+
+def search_products(query, k=10):
+    """Up to k (product_id, product_name, total_orders) matches, prefix matches first."""
+    return get_search().search(query, k)
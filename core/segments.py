@@ -0,0 +1,136 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from core.data_store import DATA_DIR
+
+# Online segment assignment.
+# The pipeline's segment stage saves its fitted model to
+# data/segment_model.npz: the product vocabulary (one id per matrix column),
+# the SVD components (products x k), the KMeans centers (K x k) and the
+# segment names. Scoring a batch of orders is one sparse matrix build, one
+# projection and one nearest-center argmin, whatever the batch size.
+
+MODEL_FILE = "segment_model.npz"
+
+_lock = threading.Lock()
+_cache = {}  # path -> (mtime_ns, SegmentModel)
+
+
+class SegmentModel:
+    """Fitted vocabulary, projection and centers of the order segmentation."""
+
+    def __init__(self, vocabulary, components, centers, names):
+        self.vocabulary = np.asarray(vocabulary, dtype=np.int64)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.centers = np.asarray(centers, dtype=np.float32)
+        self.names = [str(n) for n in names]
+        self.center_norms = (self.centers ** 2).sum(axis=1)
+        # Dense product id -> column lookup (-1 for products outside the vocabulary)
+        self.columns = np.full(int(self.vocabulary.max(initial=-1)) + 1, -1, dtype=np.int64)
+        self.columns[self.vocabulary] = np.arange(len(self.vocabulary))
+
+    def order_matrix(self, order_ids, product_ids):
+        """Binary CSR (orders x vocabulary) and the sorted order ids of its rows."""
+        orders, rows = np.unique(np.asarray(order_ids), return_inverse=True)
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        known = (product_ids >= 0) & (product_ids < len(self.columns))
+        cols = np.full(len(product_ids), -1, dtype=np.int64)
+        cols[known] = self.columns[product_ids[known]]
+        used = cols >= 0
+        X = sparse.csr_matrix(
+            (np.ones(used.sum(), dtype=np.float32), (rows[used], cols[used])),
+            shape=(len(orders), len(self.vocabulary)),
+        )
+        X.sum_duplicates()
+        X.data[:] = 1
+        return X, orders
+
+    def predict(self, X):
+        """Segment of every row of a vocabulary-aligned binary matrix."""
+        projected = X @ self.components
+        return np.argmin(self.center_norms - 2 * projected @ self.centers.T, axis=1).astype(np.int8)
+
+    def score_orders(self, order_ids, product_ids):
+        """One row per order: order_id, segment and segment name."""
+        X, orders = self.order_matrix(order_ids, product_ids)
+        labels = self.predict(X)
+        return pd.DataFrame({
+            "order_id": orders,
+            "segment": labels,
+            "segment_name": np.asarray(self.names, dtype=object)[labels],
+        })
+
+    def score_users(self, user_ids, order_ids, product_ids):
+        """Each user's most frequent order segment (ties go to the lower segment)."""
+        scored = self.score_orders(order_ids, product_ids)
+        users = (
+            pd.DataFrame({"order_id": np.asarray(order_ids), "user_id": np.asarray(user_ids)})
+            .drop_duplicates("order_id")
+            .merge(scored, on="order_id")
+        )
+        counts = users.groupby(["user_id", "segment"]).size().reset_index(name="n_orders")
+        counts = counts.sort_values(["user_id", "n_orders", "segment"], ascending=[True, False, True], kind="stable")
+        top = counts.drop_duplicates("user_id").reset_index(drop=True)
+        top["segment_name"] = np.asarray(self.names, dtype=object)[top["segment"].to_numpy()]
+        return top[["user_id", "segment", "segment_name", "n_orders"]]
+
+    def mix(self, labels):
+        """Share of each segment (all segments, in order) among labels."""
+        counts = np.bincount(np.asarray(labels, dtype=np.int64), minlength=len(self.names))
+        return pd.DataFrame({
+            "segment": np.arange(len(self.names)),
+            "segment_name": self.names,
+            "orders": counts,
+            "share": counts / max(counts.sum(), 1),
+        })
+
+
+def save_model(path, vocabulary, components, centers, names):
+    tmp = path + ".tmp.npz"
+    np.savez(
+        tmp,
+        vocabulary=np.asarray(vocabulary, dtype=np.int64),
+        components=np.asarray(components, dtype=np.float32),
+        centers=np.asarray(centers, dtype=np.float32),
+        names=np.asarray(names, dtype=str),
+    )
+    os.replace(tmp, path)
+
+
+def load_model(path):
+    with np.load(path) as f:
+        return SegmentModel(f["vocabulary"], f["components"], f["centers"], f["names"].tolist())
+
+
+def model_path(data_dir=DATA_DIR):
+    return os.path.join(data_dir, MODEL_FILE)
+
+
+def get_model(data_dir=DATA_DIR):
+    """The cached segment model, reloaded when the file changes; None if it was never built."""
+    path = model_path(data_dir)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    entry = _cache.get(path)
+    if entry is not None and entry[0] == mtime:
+        return entry[1]
+    with _lock:
+        entry = _cache.get(path)
+        if entry is None or entry[0] != mtime:
+            entry = (mtime, load_model(path))
+            _cache[path] = entry
+        return entry[1]
+
+
+def score_orders(order_ids, product_ids):
+    """Segments of a batch of orders (see SegmentModel.score_orders)."""
+    model = get_model()
+    if model is None:
+        raise FileNotFoundError(f"{model_path()} not found; build it with python -m pipeline build")
+    return model.score_orders(order_ids, product_ids)
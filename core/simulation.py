@@ -0,0 +1,189 @@
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from core.data_store import get_table
+
+# Revenue and profit scenarios as one matrix operation.
+# The pipeline exports simulation_counts: one row per (segment, product)
+# with the product's department and synthetic price, the units sold in
+# prior orders (`units`) and the units bought together with the base
+# product of a recommended bundle (`bundle_units`). Segment -1 holds orders
+# without a segment; they count towards department revenue only.
+#
+# A scenario scales prices (globally and per department), sets department
+# margins and discounts bundled units. Quantities are held fixed, like the
+# notebook's simulation. For S scenarios every row gets S revenue values:
+#   price * multiplier[department, s] * (units - discount[s] * bundle_units)
+# and one sparse indicator product per report sums them by department or
+# segment, for all scenarios at once.
+
+# Department margins used by the profit simulation (overridable per scenario)
+MARGIN_MAP = {
+    "produce": 0.22,
+    "dairy eggs": 0.25,
+    "beverages": 0.30,
+    "snacks": 0.28,
+    "meat seafood": 0.20,
+    "household": 0.35,
+    "personal care": 0.40,
+    "babies": 0.30,
+    "pets": 0.32,
+    "alcohol": 0.38,
+}
+DEFAULT_MARGIN = 0.28
+
+_lock = threading.Lock()
+_built = {}  # "simulator" -> (counts frame, customers frame, margins, Simulator)
+
+SCENARIO_DEFAULTS = {
+    "name": "baseline",
+    "price_multiplier": 1.0,
+    "department_multipliers": {},
+    "margins": {},
+    "bundle_discount": 0.0,
+}
+
+
+def scenario(**overrides):
+    """A scenario dict with every key filled in."""
+    unknown = set(overrides) - set(SCENARIO_DEFAULTS)
+    if unknown:
+        raise ValueError(f"unknown scenario keys: {sorted(unknown)}")
+    return {**SCENARIO_DEFAULTS, **overrides}
+
+
+def load_scenarios(path):
+    """Scenarios from a JSON list of scenario dicts."""
+    with open(path) as f:
+        return [scenario(**s) for s in json.load(f)]
+
+
+def _indicator(codes, n_groups):
+    """Sparse groups x rows matrix with a 1 where row belongs to group (codes < 0 are dropped)."""
+    keep = codes >= 0
+    rows = np.nonzero(keep)[0]
+    return sparse.csr_matrix(
+        (np.ones(len(rows)), (codes[keep], rows)), shape=(n_groups, len(codes))
+    )
+
+
+class Simulator:
+    """Department and segment revenue/profit for batches of scenarios."""
+
+    def __init__(self, counts, margin_map, default_margin, customers=None):
+        """counts: simulation_counts rows; customers: segment -> customer count."""
+        dept_codes, self.departments = pd.factorize(counts["department"].astype(str), sort=True)
+        self.dept_codes = dept_codes
+        segments = counts["segment"].to_numpy().astype(np.int64)
+        self.segments = np.unique(segments[segments >= 0])
+        seg_codes = np.searchsorted(self.segments, segments)
+        seg_codes[segments < 0] = -1
+
+        self.price = counts["price"].to_numpy(dtype=np.float64)
+        self.units = counts["units"].to_numpy(dtype=np.float64)
+        self.bundle_units = counts["bundle_units"].to_numpy(dtype=np.float64)
+        self.by_department = _indicator(dept_codes, len(self.departments))
+        self.by_segment = _indicator(seg_codes, len(self.segments))
+        self.margin_map = margin_map
+        self.default_margin = default_margin
+        self.customers = customers
+
+    def department_matrix(self, scenarios, key, default):
+        """departments x scenarios matrix of a per-department setting."""
+        out = np.empty((len(self.departments), len(scenarios)))
+        for s, sc in enumerate(scenarios):
+            values = sc[key]
+            out[:, s] = [values.get(d, default(d)) for d in self.departments]
+        return out
+
+    def run(self, scenarios):
+        """(revenue, profit) by department and by segment, each groups x scenarios."""
+        multiplier = self.department_matrix(scenarios, "department_multipliers", lambda d: 1.0)
+        multiplier *= np.array([sc["price_multiplier"] for sc in scenarios])
+        margin = self.department_matrix(
+            scenarios, "margins", lambda d: self.margin_map.get(d, self.default_margin)
+        )
+        discount = np.array([sc["bundle_discount"] for sc in scenarios])
+
+        sold = self.units[:, None] - self.bundle_units[:, None] * discount
+        revenue = self.price[:, None] * multiplier[self.dept_codes] * sold
+        profit = revenue * margin[self.dept_codes]
+        return {
+            "department_revenue": self.by_department @ revenue,
+            "department_profit": self.by_department @ profit,
+            "segment_revenue": self.by_segment @ revenue,
+            "segment_profit": self.by_segment @ profit,
+        }
+
+    def reports(self, scenarios):
+        """Per scenario name: (dept_revenue, user_segment_report) frames, plus a summary frame."""
+        result = self.run(scenarios)
+        reports, summary = {}, []
+        for s, sc in enumerate(scenarios):
+            dept = pd.DataFrame({
+                "department": self.departments,
+                "department_revenue": result["department_revenue"][:, s].round(2),
+            })
+            dept["revenue_share"] = dept["department_revenue"] / dept["department_revenue"].sum()
+            dept["department_profit"] = result["department_profit"][:, s].round(2)
+
+            seg = pd.DataFrame({
+                "segment": self.segments,
+                "total_revenue": result["segment_revenue"][:, s],
+            })
+            if self.customers is not None:
+                customers = self.customers.reindex(self.segments).fillna(0).to_numpy()
+                seg["avg_customer_value"] = seg["total_revenue"] / np.maximum(customers, 1)
+                seg["customers"] = customers.astype(np.int64)
+            seg["revenue_share"] = seg["total_revenue"] / seg["total_revenue"].sum()
+            seg["total_profit"] = result["segment_profit"][:, s]
+
+            reports[sc["name"]] = (dept, seg)
+            summary.append({
+                "scenario": sc["name"],
+                "total_revenue": result["department_revenue"][:, s].sum(),
+                "total_profit": result["department_profit"][:, s].sum(),
+            })
+        return reports, pd.DataFrame(summary)
+
+
+def counts_from_dept_revenue(dept_revenue):
+    """simulation_counts-shaped rows from dept_revenue.csv alone (no segments, no bundles)."""
+    return pd.DataFrame({
+        "segment": -1,
+        "department": dept_revenue["department"].astype(str),
+        "price": dept_revenue["department_revenue"].to_numpy(dtype=np.float64),
+        "units": 1.0,
+        "bundle_units": 0.0,
+    })
+
+
+def get_simulator(margin_map, default_margin):
+    """Simulator over the current simulation_counts table, rebuilt when the table changes.
+
+    Falls back to department totals from dept_revenue when simulation_counts
+    was never built; the second value tells which one was used.
+    """
+    try:
+        counts, exact = get_table("simulation_counts"), True
+    except FileNotFoundError:
+        counts, exact = get_table("dept_revenue"), False
+    try:
+        customers = get_table("user_segment_report")
+    except FileNotFoundError:
+        customers = None
+    entry = _built.get("simulator")
+    if entry is None or entry[0] is not counts or entry[1] is not customers or entry[2] != margin_map:
+        with _lock:
+            entry = _built.get("simulator")
+            if entry is None or entry[0] is not counts or entry[1] is not customers or entry[2] != margin_map:
+                rows = counts if exact else counts_from_dept_revenue(counts)
+                by_segment = None if customers is None else customers.set_index("segment")["customers"]
+                entry = (counts, customers, dict(margin_map),
+                         Simulator(rows, margin_map, default_margin, by_segment))
+                _built["simulator"] = entry
+    return entry[3], exact
@@ -0,0 +1,37 @@
+import os
+import threading
+
+# Background warm-up of the data layer.
+# app.py calls start() at the end of every script run; the first call in a
+# process starts one daemon thread that imports pandas, loads every table
+# that exists and builds the catalog, lookup, recommendation, search and neighbour indexes, so
+# the first click on a data page finds them cached. Set APP_WARMUP=0 to
+# turn it off.
+
+_lock = threading.Lock()
+_thread = None
+
+
+def warm():
+    from core import catalog, data_store, lookup, neighbors, recommend, search
+
+    steps = [lambda name=name: data_store.get_table(name) for name in data_store.TABLES]
+    steps += [lambda name=name: lookup.lookup(name, "") for name in lookup.INDEXES]
+    steps += [catalog.get_catalog, recommend.get_index, search.get_search, neighbors.get_index]
+    for step in steps:
+        try:
+            step()
+        except FileNotFoundError:
+            pass  # table not built in this data/ directory
+
+
+def start():
+    """Start the warm-up thread once per process; returns it (None when disabled)."""
+    global _thread
+    if os.environ.get("APP_WARMUP") == "0":
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=warm, name="warmup", daemon=True)
+            _thread.start()
+        return _thread
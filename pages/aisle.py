@@ -1,5 +1,7 @@
 import streamlit as st
-import pandas as pd
+from core import profiling
+from core.data_store import get_table
+from core.cards import bundle_columns, bundle3_block, bestseller_block, bestseller_slices, neighbor_columns
 
 # Session state initialization for Aisle page
 def init_aisle_state():
@@ -17,7 +19,7 @@ def render_aisle():
 
     init_aisle_state()
 
-    df = pd.read_csv("data/aisles.csv")
+    df = get_table("aisles")
     aisles = df["aisle"].dropna().astype(str).tolist()
 
     left, right = st.columns([1, 1.2], gap="large")
@@ -73,23 +75,34 @@ def render_aisle():
         st.markdown('<div class="bundle-anchor"></div>', unsafe_allow_html=True)
         # Show bundle recommendations if aisles are selected and submitted
         if st.session_state.show_aisle_bundle and st.session_state.submitted_aisles:
-            # Load bundle recommendations data
-            bundle_df = pd.read_csv("data/bundle_top10_by_aisle.csv")
             # Get selected aisles from session state
             selected = st.session_state.submitted_aisles
             # Loop through selected aisles and display their bundle recommendations
             for aisle in selected:
 
-                aisle_key = aisle.strip().lower()
-
-                aisle_bundle = (
-                    bundle_df[bundle_df["aisle"].str.lower() == aisle_key]
-                    .sort_values("lift", ascending=False)
-                    .head(6)
-                )
-                # If no bundles found for the aisle, show info message and skip to next
-                if aisle_bundle.empty:
-                    st.info(f"No bundle recommendations found for {aisle.title()}. Explore top-selling products below.")
+                # Bundle card HTML for this aisle (top 6 by lift, one fragment per column)
+                columns = bundle_columns("bundle_by_aisle", aisle, limit=6)
+                # If no bundles found for the aisle, pair its bestsellers with the products bought in
+                # the most similar baskets (or show info message without embeddings) and skip to next
+                if columns is None:
+                    similar = neighbor_columns("top5_by_aisle", aisle)
+                    if similar is None:
+                        st.info(f"No bundle recommendations found for {aisle.title()}. Explore top-selling products below.")
+                        continue
+                    st.markdown(
+                        f"""
+                        <div class="dept-bundle-title">
+                            No bundles yet for <strong>{aisle.title()}</strong>, similar picks instead
+                        </div>
+                        """,
+                        unsafe_allow_html=True
+                    )
+                    col1, col2 = st.columns(2, gap="large")
+                    profiling.count("html_bytes", len(similar[0].encode()) + len(similar[1].encode()))
+                    with profiling.span("markdown"):
+                        col1.markdown(similar[0], unsafe_allow_html=True)
+                        if similar[1]:
+                            col2.markdown(similar[1], unsafe_allow_html=True)
                     continue
                     # If bundles found, display them in a styled format
                 st.markdown(
@@ -100,63 +113,51 @@ def render_aisle():
                     """,
                     unsafe_allow_html=True
                 )
-                # Create two columns for bundle display
+                # Create two columns for bundle display, one markdown call each
                 col1, col2 = st.columns(2, gap="large")
-
-                for i, (_, row) in enumerate(aisle_bundle.iterrows()):
-
-                    html = '<div class="bundle-row">'
-                    html += f'<div class="bundle-card">{row["product_name_base"]}</div>'
-                    html += f'''
-                        <div class="bundle-card best-item">
-                            <span class="best-badge"></span>
-                            {row["product_name_recommended"]}
-                        </div>
-                    '''
-                    html += '</div>'
-                    # Alternate rows between the two columns
-                    if i < 3:
-                        col1.markdown(html, unsafe_allow_html=True)
-                    else:
-                        col2.markdown(html, unsafe_allow_html=True)
+                profiling.count("html_bytes", len(columns[0].encode()) + len(columns[1].encode()))
+                with profiling.span("markdown"):
+                    col1.markdown(columns[0], unsafe_allow_html=True)
+                    if columns[1]:
+                        col2.markdown(columns[1], unsafe_allow_html=True)
+
+                # "Base + 2 add-ons" bundles, when the pipeline mined any
+                trio_html = bundle3_block("bundle3_by_aisle", aisle)
+                if trio_html:
+                    profiling.count("html_bytes", len(trio_html.encode()))
+                    with profiling.span("markdown"):
+                        st.markdown(trio_html, unsafe_allow_html=True)
 
         else:
             st.info("Select aisle(s) and click Submit")
 
     # Top products section (only shows after bundle recommendations are triggered)
     if st.session_state.show_aisle_bundle and st.session_state.submitted_aisles:
-        # Load top products data for aisles
-        product_df = pd.read_csv("data/top5_selling_by_aisle.csv")
         selected = st.session_state.submitted_aisles
 
+        # Time window / segment of the bestsellers, when the pipeline built the sliced tables
+        slices = bestseller_slices("top5_sliced_by_aisle")
+        window = None
+        if slices:
+            window = st.columns([1, 3])[0].selectbox("Bestsellers for", slices, key="aisle_bestseller_slice")
+
         html_output = """
         <div class="top-wrapper-main">
             <div class="top-title-main">Top 5 Best-Selling Products</div>
             <div class="top-subtitle">Based on your selected aisles</div>
         """
-        # Loop through selected aisles and append their top products to the HTML
+        # Append the cached bestseller block of each selected aisle
         for aisle in selected:
-
-            aisle_products = (
-                product_df[product_df["aisle"].str.lower() == aisle]
-                .sort_values("total_orders", ascending=False)
-                .head(5)
-            )
-            # If no products found for the aisle, skip to next
-            if aisle_products.empty:
-                continue
-
-            html_output += f"<div class='dept-header'>Bestsellers in {aisle.capitalize()}</div>"
-            html_output += '<div class="product-row">'
-            # Loop through top products for the aisle and create product cards, marking the top one as bestseller
-            for i, (_, row) in enumerate(aisle_products.iterrows()):
-                badge = '<span class="badge-bestseller">🔥 Bestseller</span>' if i == 0 else ''
-                html_output += f'<div class="card-unit">{badge}<div class="bundle-card">{row["product_name"]}</div></div>'
-
-            html_output += '</div>'
+            if window is None:
+                html_output += bestseller_block("top5_by_aisle", aisle)
+            else:
+                html_output += bestseller_block("top5_sliced_by_aisle", aisle, slice_name=window)
 
         html_output += "</div>"
 
-        st.markdown(html_output.replace('\n', ''), unsafe_allow_html=True)
+        html_output = html_output.replace('\n', '')
+        profiling.count("html_bytes", len(html_output.encode()))
+        with profiling.span("markdown"):
+            st.markdown(html_output, unsafe_allow_html=True)
 
 
@@ -1,6 +1,136 @@
+import os
+
+import pandas as pd
+import plotly.express as px
 import streamlit as st
-import streamlit.components.v1 as components
-from pathlib import Path
+from core import profiling
+from core.cube import DAYS, get_cube
+from core.data_store import DATA_DIR
+from core.segments import get_model
+
+RECENT_ORDERS = os.path.join(DATA_DIR, "recent_orders.csv")
+
+# Live segment mix of uploaded or recent orders, scored with the fitted segment model
+def render_live_mix():
+    st.markdown('<div class="dept-bundle-title">Live Segment Mix</div>', unsafe_allow_html=True)
+    model = get_model()
+    if model is None:
+        st.info("No segment model found. Build it with `python -m pipeline build` to score new orders.")
+        return
+
+    uploaded = st.file_uploader(
+        "Orders CSV with order_id and product_id columns", type="csv", key="live_mix_upload"
+    )
+    if uploaded is not None:
+        path, source = uploaded, uploaded.name
+    elif os.path.exists(RECENT_ORDERS):
+        path, source = RECENT_ORDERS, "recent_orders.csv"
+    else:
+        st.info("Upload orders (order_id, product_id) to see their segment mix.")
+        return
+    try:
+        orders = pd.read_csv(path)
+    except (ValueError, UnicodeDecodeError) as e:  # includes pandas' ParserError and EmptyDataError
+        st.error(f"{source} is not a readable CSV file: {e}")
+        return
+    if not {"order_id", "product_id"} <= set(orders.columns):
+        st.error("The file needs order_id and product_id columns.")
+        return
+
+    # Ids that are missing, not whole numbers or beyond int64 drop their row
+    ids = orders[["order_id", "product_id"]].apply(pd.to_numeric, errors="coerce")
+    valid = ((ids % 1 == 0) & (ids.abs() < 2**63)).all(axis=1)
+    if not valid.any():
+        st.error("No row of the file has integer order_id and product_id values.")
+        return
+    ids = ids[valid].astype("int64")
+    if not valid.all():
+        st.warning(f"Skipped {(~valid).sum():,} rows without integer order_id and product_id values.")
+
+    try:
+        with profiling.span("score_orders"):
+            scored = model.score_orders(ids["order_id"].to_numpy(), ids["product_id"].to_numpy())
+    except (ValueError, OverflowError) as e:
+        st.error(f"Could not score the orders: {e}")
+        return
+    profiling.count("rows_scanned", len(ids))
+    mix = model.mix(scored["segment"])
+    fig = px.bar(mix, x="segment_name", y="orders", text=mix["share"].map("{:.0%}".format),
+                 labels={"segment_name": "Segment", "orders": "Orders"})
+    st.plotly_chart(fig, width="stretch")
+    st.caption(f"{len(scored):,} orders from {source}")
+
+
+# Labels of the points clicked in a chart drawn with on_select
+def clicked(event, field="x"):
+    return [p[field] for p in event.selection.points] if event else []
+
+
+# Filters, then four charts computed from the pre-aggregated order cube.
+# Clicking a day drills the hour chart into that day; clicking a segment
+# drills the department profile into that segment.
+def render_cube_charts():
+    cube = get_cube()
+    if cube is None:
+        st.info("No dashboard cube found. Build it with `python -m pipeline build` to see the order charts.")
+        return
+
+    f1, f2, f3, f4 = st.columns([1.2, 1, 1.2, 1.2])
+    days = f1.multiselect("Days", DAYS, DAYS, key="dash_days")
+    hours = f2.slider("Hours", 0, 23, (0, 23), key="dash_hours")
+    segments = f3.multiselect("Segments", cube.segments, cube.segments, key="dash_segments")
+    departments = f4.multiselect("Departments", cube.departments, placeholder="All departments", key="dash_departments")
+    measure = st.radio("Count", ["orders", "lines"], horizontal=True, key="dash_measure",
+                       format_func=lambda m: "Orders" if m == "orders" else "Products ordered")
+    if measure == "orders" and departments:
+        st.caption("The department filter applies to products ordered only.")
+    label = "Total Orders" if measure == "orders" else "Products Ordered"
+
+    filters = {
+        "days": days,
+        "hours": range(hours[0], hours[1] + 1),
+        "segments": segments,
+        "departments": departments or None,
+    }
+
+    # Row 1: busiest days, then busiest hours of the clicked day(s)
+    col1, col2 = st.columns(2)
+    with col1:
+        by_day = cube.total("day", measure, **filters).reset_index(name=label)
+        fig = px.bar(by_day, x="day", y=label, title="Busiest Days of the Week", labels={"day": "Day"})
+        event = st.plotly_chart(fig, width="stretch", on_select="rerun", selection_mode="points", key="dash_day_chart")
+    drill_days = [d for d in clicked(event) if d in days] or days
+    with col2:
+        by_hour = cube.total("hour", measure, **{**filters, "days": drill_days}).reset_index(name=label)
+        title = "Busiest Hours of the Day" + ("" if drill_days == days else f" ({', '.join(drill_days)})")
+        fig = px.bar(by_hour, x="hour", y=label, title=title, labels={"hour": "Hour (24h format)"})
+        fig.update_traces(marker_color="gold")
+        st.plotly_chart(fig, width="stretch")
+
+    # Row 2: orders per segment, then the department profile of the clicked segment(s)
+    col3, col4 = st.columns(2)
+    with col3:
+        by_segment = cube.total("segment", measure, **filters).reset_index(name=label)
+        by_segment["share"] = (by_segment[label] / max(by_segment[label].sum(), 1) * 100).round(1)
+        fig = px.bar(by_segment, x="segment", y=label, text="share", color="segment",
+                     title="Order Distribution by Customer Segment", labels={"segment": "Customer Segment"})
+        fig.update_traces(texttemplate="%{text}%", textposition="outside")
+        fig.update_layout(showlegend=False, height=600)
+        event = st.plotly_chart(fig, width="stretch", on_select="rerun", selection_mode="points", key="dash_segment_chart")
+    drill_segments = [s for s in clicked(event) if s in segments]
+    with col4:
+        profile = cube.profile(**{**filters, "segments": drill_segments or segments}) * 100
+        if len(drill_segments) == 1:
+            share = profile.iloc[0].sort_values(ascending=False).reset_index(name="share")
+            fig = px.bar(share, x="department", y="share", title=f"Department Profile: {drill_segments[0]}",
+                         labels={"department": "Department", "share": "Purchase Share (%)"})
+        else:
+            fig = px.imshow(profile, aspect="auto", color_continuous_scale="YlOrRd",
+                            labels=dict(x="Department", y="Customer Segment", color="Purchase Share (%)"),
+                            title="Customer Segment Profiles by Department")
+        fig.update_layout(xaxis_tickangle=-45, height=600)
+        st.plotly_chart(fig, width="stretch")
+
 
 # Render function for Dashboard page
 def render_dashboard():
@@ -13,27 +143,6 @@ def render_dashboard():
     """,
     unsafe_allow_html=True
 )
-    # Path to pre-generated charts
-    charts_path = Path("charts")
+    render_live_mix()
 
-    # Dashboard layout with 2 rows and 2 columns each
-    col1, col2 = st.columns(2)
-    # Render charts in Row 1
-    with col1:
-        with open(charts_path / "busiest_hours.html", "r", encoding="utf-8") as f:
-            components.html(f.read(), height=500)
-    # Render second chart in Row 1
-    with col2:
-        with open(charts_path / "busiest_days.html", "r", encoding="utf-8") as f:
-            components.html(f.read(), height=500)
-
-    # Render charts in Row 2
-    col3, col4 = st.columns(2)
-    # Render first chart in Row 2
-    with col3:
-        with open(charts_path / "orders_per_cluster.html", "r", encoding="utf-8") as f:
-            components.html(f.read(), height=650)
-    # Render second chart in Row 2
-    with col4:
-        with open(charts_path / "cluster_department_profiles.html", "r", encoding="utf-8") as f:
-            components.html(f.read(), height=650)
\ No newline at end of file
+    render_cube_charts()
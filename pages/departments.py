@@ -1,5 +1,8 @@
 import streamlit as st
-import pandas as pd
+from core import profiling
+from core.data_store import get_table
+from core.cards import bundle_columns, bundle3_block, bestseller_block, bestseller_slices, neighbor_columns
+from core.lookup import lookup
 
 #Session state initialization for Departments page
 def init_dep_state():
@@ -17,7 +20,7 @@ def init_dep_state():
 def render_departments():
     init_dep_state()
     # Load department data
-    df = pd.read_csv("data/departments.csv")
+    df = get_table("departments")
     # Extract department list
     departments = df["department"].dropna().astype(str).tolist()
     # Create two columns for layout
@@ -83,21 +86,35 @@ def render_departments():
         st.markdown('<div class="bundle-anchor"></div>', unsafe_allow_html=True)
         # Check if we should show bundle recommendations
         if st.session_state.show_bundle and st.session_state.submitted_departments:
-            # Load bundle data
-            bundle_df = pd.read_csv("data/bundle_top10_by_department.csv")
             selected = st.session_state.submitted_departments
             # Loop through selected departments and display bundles
             for dept in selected:
 
                 dept_key = dept.strip().lower()
 
-                dept_bundle_full = (
-                    bundle_df[bundle_df["department"].str.lower() == dept_key]
-                    .sort_values("lift", ascending=False)
-                )
-                # If no bundles found, show info message
+                # Bundles for this department, already sorted by lift
+                dept_bundle_full = lookup("bundle_by_department", dept_key)
+                # If no bundles found, pair the bestsellers with the products bought in the most
+                # similar baskets, or show info message without embeddings
                 if dept_bundle_full.empty:
-                    st.info(f"No bundle recommendations found for {dept.title()}. Explore top-selling products below.")
+                    similar = neighbor_columns("top5_by_department", dept_key)
+                    if similar is None:
+                        st.info(f"No bundle recommendations found for {dept.title()}. Explore top-selling products below.")
+                        continue
+                    st.markdown(
+                        f"""
+                        <div class="dept-bundle-title">
+                            No bundles yet for <strong>{dept.title()}</strong>, similar picks instead
+                        </div>
+                        """,
+                        unsafe_allow_html=True
+                    )
+                    col1, col2 = st.columns(2, gap="large")
+                    profiling.count("html_bytes", len(similar[0].encode()) + len(similar[1].encode()))
+                    with profiling.span("markdown"):
+                        col1.markdown(similar[0], unsafe_allow_html=True)
+                        if similar[1]:
+                            col2.markdown(similar[1], unsafe_allow_html=True)
                     continue
                 # Department header
                 st.markdown(
@@ -115,37 +132,24 @@ def render_departments():
                 if toggle_key not in st.session_state:
                     st.session_state[toggle_key] = False
 
-                # Show first 6 or full list
-                if not st.session_state[toggle_key]:
-                    dept_bundle = dept_bundle_full.head(6)
-                else:
-                    dept_bundle = dept_bundle_full
+                # Bundle card HTML for the first 6 or the full list, one fragment per column
+                limit = None if st.session_state[toggle_key] else 6
+                left_html, right_html = bundle_columns("bundle_by_department", dept_key, limit=limit)
 
-                # Render bundle recommendations in two columns
+                # Render bundle recommendations in two columns (3-3 layout)
                 col1, col2 = st.columns(2, gap="large")
-
-                for i, (_, row) in enumerate(dept_bundle.iterrows()):
-
-                    html = '<div class="bundle-row">'
-
-                    # Base product
-                    html += f'<div class="bundle-card">{row["product_name_base"]}</div>'
-
-                    # Recommended product
-                    html += f'''
-                        <div class="bundle-card best-item">
-                            <span class="best-badge"></span>
-                            {row["product_name_recommended"]}
-                        </div>
-                    '''
-
-                    html += '</div>'
-
-                    # Alternate between columns (3-3 layout)
-                    if i % 6 < 3:
-                        col1.markdown(html, unsafe_allow_html=True)
-                    else:
-                        col2.markdown(html, unsafe_allow_html=True)
+                profiling.count("html_bytes", len(left_html.encode()) + len(right_html.encode()))
+                with profiling.span("markdown"):
+                    col1.markdown(left_html, unsafe_allow_html=True)
+                    if right_html:
+                        col2.markdown(right_html, unsafe_allow_html=True)
+
+                # "Base + 2 add-ons" bundles, when the pipeline mined any
+                trio_html = bundle3_block("bundle3_by_department", dept_key, limit=None if st.session_state[toggle_key] else 3)
+                if trio_html:
+                    profiling.count("html_bytes", len(trio_html.encode()))
+                    with profiling.span("markdown"):
+                        st.markdown(trio_html, unsafe_allow_html=True)
 
                 # Show toggle button if more than 6 bundles
                 
@@ -168,36 +172,33 @@ def render_departments():
             st.info("Select department(s) and click Submit")
     # Top products section (only shows after bundle recommendations are triggered)
     if st.session_state.show_bundle and st.session_state.submitted_departments:
-        # Load top products data
-        product_df = pd.read_csv("data/top5_selling_by_department.csv")
         selected = st.session_state.submitted_departments
 
+        # Time window / segment of the bestsellers, when the pipeline built the sliced tables
+        slices = bestseller_slices("top5_sliced_by_department")
+        window = None
+        if slices:
+            window = st.columns([1, 3])[0].selectbox("Bestsellers for", slices, key="dep_bestseller_slice")
+
         # Build entire HTML for top products section in one go to avoid Streamlit's multiple render issues
         html_output = f"""
         <div class="top-wrapper-main">
             <div class="top-title-main">Top 5 Best-Selling Products</div>
             <div class="top-subtitle">Based on your selected departments</div>
         """
-        # Loop through selected departments and append their top products to the HTML
+        # Append the cached bestseller block of each selected department
         for dept in selected:
-            dept_products = product_df[product_df["department"].str.lower() == dept].sort_values("total_orders", ascending=False).head(5)
-            if dept_products.empty: continue
-            # Department header
-            html_output += f"<div class='dept-header'>Bestsellers in {dept.capitalize()}</div>"
-            
-            # Product cards row
-            html_output += '<div class="product-row">'
-            
-            for i, (_, row) in enumerate(dept_products.iterrows()):
-                badge = '<span class="badge-bestseller ">🔥 Bestseller</span>' if i == 0 else ''
-                
-                html_output += f'<div class="card-unit">{badge}<div class="bundle-card">{row["product_name"]}</div></div>'
-                
-            html_output += '</div>' 
+            if window is None:
+                html_output += bestseller_block("top5_by_department", dept)
+            else:
+                html_output += bestseller_block("top5_sliced_by_department", dept, slice_name=window)
 
         html_output += "</div>" 
 
         # Render the entire section at once to ensure styles are applied correctly
-        st.markdown(html_output.replace('\n', ''), unsafe_allow_html=True)
+        html_output = html_output.replace('\n', '')
+        profiling.count("html_bytes", len(html_output.encode()))
+        with profiling.span("markdown"):
+            st.markdown(html_output, unsafe_allow_html=True)
 
 
@@ -53,6 +53,28 @@ def render_home():
     </a>
     """, unsafe_allow_html=True)
 
+    st.markdown("<br><br>", unsafe_allow_html=True)
 
+    # Navigation card 4 - Recommendations (full width)
+    st.markdown("""
+    <a href="?page=RECOMMEND" class="card-link">
+        <div class="card-box dashboard-wide">
+            <div style="font-size:64px">🛒</div>
+            <h3>Frequently Bought With</h3>
+            <p>Get product recommendations for any basket</p>
+        </div>
+    </a>
+    """, unsafe_allow_html=True)
 
+    st.markdown("<br><br>", unsafe_allow_html=True)
 
+    # Navigation card 5 - Revenue simulation (full width)
+    st.markdown("""
+    <a href="?page=SIMULATION" class="card-link">
+        <div class="card-box dashboard-wide">
+            <div style="font-size:64px">💹</div>
+            <h3>Pricing Scenarios</h3>
+            <p>Simulate revenue and profit under price, margin and bundle changes</p>
+        </div>
+    </a>
+    """, unsafe_allow_html=True)
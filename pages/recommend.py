@@ -0,0 +1,84 @@
+import time
+
+import pandas as pd
+import streamlit as st
+from core import profiling
+from core.cards import recommendation_cards
+from core.recommend import get_index, product_names, recommend
+from core.search import search_products
+
+# Render function for the "Frequently bought with" page
+def render_recommend():
+
+    index = get_index()
+    if "rec_basket" not in st.session_state:
+        st.session_state.rec_basket = []
+
+    left, right = st.columns([1, 1.2], gap="large")
+
+    # Left panel for building the basket
+    with left:
+        st.markdown('<div class="department-aisle-title">Your Basket</div>', unsafe_allow_html=True)
+        st.markdown('<div class="department-aisle-anchor"></div>', unsafe_allow_html=True)
+
+        # Type-ahead product search; each match can be added to the basket
+        search = st.text_input("Search products", placeholder="Search products ...", label_visibility="collapsed", key="rec_search")
+        if search:
+            start = time.perf_counter()
+            with profiling.span("search"):
+                matches = search_products(search, 8)
+            elapsed = (time.perf_counter() - start) * 1000
+            for product_id, name, _ in matches:
+                has_rules = len(index.neighbors(product_id)[0]) > 0
+                label = f"➕ {name}" + (" · bundles" if has_rules else "")
+                if st.button(label, key=f"rec_add_{product_id}") and product_id not in st.session_state.rec_basket:
+                    st.session_state.rec_basket = st.session_state.rec_basket + [product_id]
+            st.caption(f"{len(matches)} matches in {elapsed:.2f} ms" if matches else "No products found")
+
+        st.multiselect(
+            "In your basket",
+            st.session_state.rec_basket,
+            format_func=lambda p: product_names([p])[0],
+            key="rec_basket",
+        )
+        typed = st.text_input("Product ids", placeholder="e.g. 17948, 24489", key="rec_ids")
+        k = st.slider("Recommendations", 1, 20, 10, key="rec_k")
+
+    basket = list(st.session_state.rec_basket)
+    for token in typed.replace(",", " ").split():
+        # isdigit alone accepts "²" or "①", which int() rejects
+        if token.isascii() and token.isdigit() and int(token) not in basket:
+            basket.append(int(token))
+
+    # Right panel for the recommendations
+    with right:
+        st.markdown('<div class="bundle-title">Frequently Bought With</div>', unsafe_allow_html=True)
+        st.markdown('<div class="bundle-anchor"></div>', unsafe_allow_html=True)
+
+        if not basket:
+            st.info("Add products to your basket")
+            return
+
+        start = time.perf_counter()
+        with profiling.span("recommend"):
+            results = recommend(basket, k)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if not results:
+            st.info("No rules found for these products. Try adding other products.")
+            return
+
+        ids, scores, confidence, _ = zip(*results)
+        df = pd.DataFrame({
+            "product_name": product_names(ids),
+            "score": scores,
+            "confidence": confidence,
+        })
+        st.markdown(
+            f'<div class="dept-bundle-title">Based on <strong>{len(basket)}</strong> product(s) in your basket</div>',
+            unsafe_allow_html=True,
+        )
+        html = '<div class="rec-row">' + "".join(recommendation_cards(df).tolist()) + "</div>"
+        profiling.count("html_bytes", len(html.encode()))
+        st.markdown(html, unsafe_allow_html=True)
+        st.caption(f"{len(index)} rules · answered in {elapsed:.2f} ms")
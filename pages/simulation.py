@@ -0,0 +1,104 @@
+import time
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from core import profiling
+from core.simulation import DEFAULT_MARGIN, MARGIN_MAP, get_simulator, scenario
+
+
+# Scenario built from the current controls
+def draft_scenario(simulator):
+    name = st.text_input("Scenario name", "My scenario", key="sim_name")
+    price = st.slider("Price change (all products)", -30, 30, 0, format="%d%%", key="sim_price")
+    departments = st.multiselect("Departments to reprice", list(simulator.departments), key="sim_depts")
+    dept_price = st.slider("Price change (selected departments)", -30, 30, 0, format="%d%%", key="sim_dept_price")
+    discount = st.slider("Bundle discount", 0, 50, 0, format="%d%%", key="sim_discount")
+
+    defaults = pd.DataFrame({
+        "department": list(simulator.departments),
+        "margin": [MARGIN_MAP.get(d, DEFAULT_MARGIN) for d in simulator.departments],
+    })
+    with st.expander("Department margins"):
+        margins = st.data_editor(
+            defaults, hide_index=True, disabled=["department"], key="sim_margins",
+            column_config={"margin": st.column_config.NumberColumn(min_value=0.0, max_value=1.0, step=0.01)},
+        )
+        # A cleared cell is NaN; it falls back to the department's default margin
+        margins = margins.assign(margin=margins["margin"].fillna(defaults["margin"]))
+
+    return scenario(
+        name=name.strip() or "My scenario",
+        price_multiplier=1 + price / 100,
+        department_multipliers={d: 1 + dept_price / 100 for d in departments},
+        margins=dict(zip(margins["department"], margins["margin"])),
+        bundle_discount=discount / 100,
+    )
+
+
+# Render function for the revenue simulation page
+def render_simulation():
+    simulator, exact = get_simulator(MARGIN_MAP, DEFAULT_MARGIN)
+    if "sim_scenarios" not in st.session_state:
+        st.session_state.sim_scenarios = []
+
+    left, right = st.columns([1, 1.6], gap="large")
+
+    # Left panel for the scenario controls
+    with left:
+        st.markdown('<div class="department-aisle-title">Scenario</div>', unsafe_allow_html=True)
+        st.markdown('<div class="department-aisle-anchor"></div>', unsafe_allow_html=True)
+        if not exact:
+            st.info("simulation_counts.csv not found: simulating department totals only. "
+                    "Run `python -m pipeline build` for segment and bundle results.")
+        draft = draft_scenario(simulator)
+        add, clear = st.columns(2)
+        if add.button("Add scenario", key="sim_add"):
+            saved = [s for s in st.session_state.sim_scenarios if s["name"] != draft["name"]]
+            st.session_state.sim_scenarios = saved + [draft]
+        if clear.button("Clear scenarios", key="sim_clear"):
+            st.session_state.sim_scenarios = []
+
+    # Every scenario runs in one batch against the baseline
+    names = {"baseline"}
+    scenarios = [scenario()]
+    for sc in st.session_state.sim_scenarios + [draft]:
+        if sc["name"] not in names:
+            names.add(sc["name"])
+            scenarios.append(sc)
+    start = time.perf_counter()
+    with profiling.span("simulate"):
+        reports, summary = simulator.reports(scenarios)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    # Right panel for the comparison
+    with right:
+        st.markdown('<div class="bundle-title">Scenario Comparison</div>', unsafe_allow_html=True)
+        st.markdown('<div class="bundle-anchor"></div>', unsafe_allow_html=True)
+
+        base = summary.iloc[0]
+        summary["revenue_change"] = summary["total_revenue"] / base["total_revenue"] - 1
+        summary["profit_change"] = summary["total_profit"] / base["total_profit"] - 1
+        st.dataframe(
+            summary, hide_index=True, width="stretch",
+            column_config={
+                "total_revenue": st.column_config.NumberColumn("Revenue", format="$%.0f"),
+                "total_profit": st.column_config.NumberColumn("Profit", format="$%.0f"),
+                "revenue_change": st.column_config.NumberColumn("Δ revenue", format="percent"),
+                "profit_change": st.column_config.NumberColumn("Δ profit", format="percent"),
+            },
+        )
+
+        dept = pd.concat(
+            [frame.assign(scenario=name) for name, (frame, _) in reports.items()], ignore_index=True
+        )
+        metric = st.radio("Show", ["department_revenue", "department_profit"], horizontal=True,
+                          format_func=lambda m: m.split("_")[1].title(), key="sim_metric")
+        fig = px.bar(dept, x="department", y=metric, color="scenario", barmode="group",
+                     labels={"department": "Department", metric: metric.split("_")[1].title()})
+        st.plotly_chart(fig, width="stretch")
+
+        if exact:
+            chosen = st.selectbox("Segments for", list(reports), index=len(reports) - 1, key="sim_segments")
+            st.dataframe(reports[chosen][1], hide_index=True, width="stretch")
+        st.caption(f"{len(scenarios)} scenarios over {len(simulator.price):,} rows in {elapsed:.1f} ms")
@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+from core.cube import DAYS
+
+# Bestseller counts per time window and customer segment, in one pass.
+# Every ordered product counts once towards each slice it falls in: all
+# time, weekends or weekdays, its day of week, its daypart, its hour and
+# the segment of its customer. Chunks of (order, product) rows are added as
+# they are read, so the full history is never held as one frame.
+# Counts are exact by default: one dense slices x products array filled by
+# bincount. With a capacity, each (slice, aisle or department) cell keeps a
+# space-saving summary of at most `capacity` products instead (Metwally et
+# al.), whose counts overestimate the true ones by at most their `error`.
+
+WEEKEND = (0, 6)  # order_dow of Sun and Sat (see core.cube.DAYS)
+DAYPARTS = [("Night", 0, 6), ("Morning", 6, 12), ("Afternoon", 12, 18), ("Evening", 18, 24)]
+ALL_TIME = "All time"
+
+# Slice layout: all time, weekends, weekdays, 7 days, 4 dayparts, 24 hours, then segments
+DAY_SLICE = 3
+DAYPART_SLICE = DAY_SLICE + 7
+HOUR_SLICE = DAYPART_SLICE + len(DAYPARTS)
+SEGMENT_SLICE = HOUR_SLICE + 24
+
+_week_slice = np.array([1 if d in WEEKEND else 2 for d in range(7)])
+_daypart_slice = np.repeat(
+    np.arange(DAYPART_SLICE, HOUR_SLICE), [end - start for _, start, end in DAYPARTS]
+)
+
+
+def slice_labels(segment_names):
+    """Label of every slice, in slice order."""
+    return (
+        [ALL_TIME, "Weekends", "Weekdays"]
+        + list(DAYS)
+        + [f"{name} ({start}-{end - 1}h)" for name, start, end in DAYPARTS]
+        + [f"{h:02d}:00" for h in range(24)]
+        + [str(name) for name in segment_names]
+    )
+
+
+def line_slices(dow, hour, segments):
+    """(row, slice) of every slice each row falls in; segments < 0 have none."""
+    dow = np.asarray(dow, dtype=np.int64)
+    hour = np.asarray(hour, dtype=np.int64)
+    segments = np.asarray(segments, dtype=np.int64)
+    rows = np.arange(len(dow))
+    segmented = np.flatnonzero(segments >= 0)
+    return (
+        np.concatenate([rows, rows, rows, rows, rows, segmented]),
+        np.concatenate([
+            np.zeros(len(dow), dtype=np.int64), _week_slice[dow], DAY_SLICE + dow,
+            _daypart_slice[hour], HOUR_SLICE + hour, SEGMENT_SLICE + segments[segmented],
+        ]),
+    )
+
+
+class SpaceSaving:
+    """Approximate top items of many cells, kept in at most `capacity` counters per cell.
+
+    Batches are merged into the summaries as a whole: an item new to its cell
+    starts from the cell's floor (the largest count ever evicted from it),
+    which is also its error, so true <= count <= true + error for every kept
+    item and any item not kept was seen at most `floor` times.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.keys = np.zeros(0, dtype=np.int64)  # cell << 32 | item, sorted
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.errors = np.zeros(0, dtype=np.int64)
+        self.floor = np.zeros(0, dtype=np.int64)  # per cell
+
+    def add(self, cells, items):
+        cells = np.asarray(cells, dtype=np.int64)
+        batch, batch_counts = np.unique((cells << 32) | np.asarray(items, dtype=np.int64), return_counts=True)
+        if len(cells) and cells.max() >= len(self.floor):
+            self.floor = np.pad(self.floor, (0, int(cells.max()) + 1 - len(self.floor)))
+
+        keys, inverse = np.unique(np.concatenate([self.keys, batch]), return_inverse=True)
+        kept = inverse[:len(self.keys)]
+        counts = np.bincount(inverse, weights=np.concatenate([self.counts, batch_counts])).astype(np.int64)
+        errors = np.zeros(len(keys), dtype=np.int64)
+        errors[kept] = self.errors
+        new = np.ones(len(keys), dtype=bool)
+        new[kept] = False
+        start = self.floor[keys[new] >> 32]
+        counts[new] += start
+        errors[new] = start
+
+        # Keep the `capacity` largest counts of each cell, raising its floor to what is evicted
+        cell = keys >> 32
+        order = np.lexsort((-counts, cell))
+        first = np.searchsorted(cell[order], cell[order], side="left")
+        evicted = order[np.arange(len(order)) - first >= self.capacity]
+        np.maximum.at(self.floor, cell[evicted], counts[evicted])
+        keep = np.ones(len(keys), dtype=bool)
+        keep[evicted] = False
+        self.keys, self.counts, self.errors = keys[keep], counts[keep], errors[keep]
+
+    def items(self):
+        """(cells, items, counts, errors) of every kept counter."""
+        return self.keys >> 32, self.keys & 0xFFFFFFFF, self.counts, self.errors
+
+
+class BestsellerCounts:
+    """Orders of every product per slice, exact or per aisle/department space-saving summaries."""
+
+    def __init__(self, n_slices, catalog, capacity=0):
+        self.n_slices = n_slices
+        self.catalog = catalog
+        self.n_products = len(catalog.aisle_id)
+        # Group names indexed by aisle/department id ("None" for unknown ids, like catalog.groups)
+        self.group_names = {
+            "aisle": pd.Series(catalog.aisle_names).astype(str),
+            "department": pd.Series(catalog.department_names).astype(str),
+        }
+        if capacity:
+            self.sketches = {group_col: SpaceSaving(capacity) for group_col in self.group_names}
+            self.counts = None
+        else:
+            self.sketches = None
+            self.counts = np.zeros(n_slices * self.n_products, dtype=np.int64)
+
+    def _group_ids(self, product_ids, group_col):
+        ids = self.catalog.aisle_ids(product_ids) if group_col == "aisle" else self.catalog.department_ids(product_ids)
+        ids = ids.astype(np.int64)
+        return np.where(ids < len(self.group_names[group_col]), ids, 0)
+
+    def add(self, product_ids, slices):
+        """Count one chunk of (product, slice) memberships (see line_slices)."""
+        product_ids = np.asarray(product_ids, dtype=np.int64)
+        slices = np.asarray(slices, dtype=np.int64)
+        if self.counts is not None:
+            known = (product_ids >= 0) & (product_ids < self.n_products)
+            self.counts += np.bincount(
+                slices[known] * self.n_products + product_ids[known], minlength=len(self.counts)
+            )
+            return
+        for group_col, sketch in self.sketches.items():
+            n_groups = len(self.group_names[group_col])
+            sketch.add(slices * n_groups + self._group_ids(product_ids, group_col), product_ids)
+
+    def top(self, group_col, k):
+        """Top-k products of every slice and aisle/department: a frame of
+        slice, product_id, total_orders, error and {group_col}_id, sorted by
+        slice, group name, orders (descending) and product id."""
+        names = self.group_names[group_col]
+        if self.counts is None:
+            cells, product_ids, counts, errors = self.sketches[group_col].items()
+            slices = cells // len(names)
+        else:
+            nonzero = np.flatnonzero(self.counts)
+            slices, product_ids = np.divmod(nonzero, self.n_products)
+            counts = self.counts[nonzero]
+            errors = np.zeros(len(counts), dtype=np.int64)
+        group_ids = self._group_ids(product_ids, group_col)
+        name_rank = names.rank(method="dense").to_numpy()[group_ids]
+
+        order = np.lexsort((product_ids, -counts, name_rank, slices))
+        cell = slices[order] * len(names) + group_ids[order]
+        first = np.r_[0, np.flatnonzero(cell[1:] != cell[:-1]) + 1]
+        rank = np.arange(len(order)) - np.repeat(first, np.diff(np.r_[first, len(order)]))
+        order = order[rank < k]
+        return pd.DataFrame({
+            "slice": slices[order],
+            "product_id": product_ids[order],
+            "total_orders": counts[order],
+            "error": errors[order],
+            f"{group_col}_id": group_ids[order],
+        })
@@ -0,0 +1,88 @@
+import os
+import time
+from functools import partial
+
+from pipeline import stages
+from pipeline.cache import StageCache, file_fingerprint, stage_key
+from pipeline.config import DEFAULT_PARAMS, RAW_FILES, STAGE_PARAMS, STAGE_VERSIONS
+
+# Stage graph: name -> upstream stages, in execution order
+GRAPH = {
+    "load": [],
+    "merge": ["load"],
+    "mine": ["merge"],
+    "segment": ["merge"],
+    "embed": ["merge"],
+    "aggregate": ["merge", "mine", "segment"],
+    "export": ["merge", "mine", "segment", "embed", "aggregate"],
+}
+
+
+def stage_functions(raw_dir, out_dir):
+    return {
+        "load": partial(stages.load, raw_dir=raw_dir),
+        "merge": stages.merge,
+        "mine": stages.mine,
+        "segment": stages.segment,
+        "embed": stages.embed,
+        "aggregate": stages.aggregate,
+        "export": partial(stages.export, out_dir=out_dir),
+    }
+
+
+def stage_keys(params, raw_dir, out_dir):
+    """Cache key of every stage for the given parameters and raw inputs."""
+    inputs = {
+        "load": [file_fingerprint(os.path.join(raw_dir, f)) for f, _ in RAW_FILES.values()],
+        "export": os.path.abspath(out_dir),
+    }
+    keys = {}
+    for name, upstream in GRAPH.items():
+        keys[name] = stage_key(
+            name,
+            {p: params[p] for p in STAGE_PARAMS[name]},
+            [keys[u] for u in upstream],
+            inputs.get(name),
+            STAGE_VERSIONS.get(name, 1),
+        )
+    return keys
+
+
+def run(raw_dir, out_dir="data", cache_dir=".pipeline_cache", params=None, target="export",
+        force=(), functions=None, log=print):
+    """Run the pipeline up to `target`, reusing every cached stage whose key is unchanged.
+
+    Returns the StageOutput of the target stage.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    cache = StageCache(cache_dir)
+    keys = stage_keys(params, raw_dir, out_dir)
+    functions = functions or stage_functions(raw_dir, out_dir)
+    outputs = {}
+
+    def is_fresh(name):
+        if name in force or not cache.has(name, keys[name]):
+            return False
+        if name == "export":
+            # Re-export if someone deleted or replaced the written files
+            written = cache.open(name, keys[name]).object("files")
+            return all(os.path.exists(os.path.join(out_dir, f)) for f in written)
+        return True
+
+    def get(name):
+        if name in outputs:
+            return outputs[name]
+        if is_fresh(name):
+            log(f"[{name}] cached ({keys[name]})")
+            outputs[name] = cache.open(name, keys[name])
+            return outputs[name]
+
+        upstream = {u: get(u) for u in GRAPH[name]}
+        log(f"[{name}] running ({keys[name]})")
+        start = time.perf_counter()
+        result = functions[name](params, upstream)
+        outputs[name] = cache.save(name, keys[name], result)
+        log(f"[{name}] done in {time.perf_counter() - start:.1f}s")
+        return outputs[name]
+
+    return get(target)
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# On-disk stage cache.
+# A stage's key hashes its name, the parameters it depends on and the keys of
+# the stages it reads from, so a parameter change invalidates exactly that
+# stage and everything downstream of it. DataFrame outputs are stored as
+# Parquet so downstream stages read back only the columns they need; any
+# other output is pickled.
+
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def stage_key(stage, params, upstream=(), inputs=None, version=1):
+    payload = {
+        "stage": stage,
+        "version": version,
+        "params": params,
+        "upstream": list(upstream),
+        "inputs": inputs,
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()[:20]
+
+
+class StageOutput:
+    """Read access to one cached stage result."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def names(self):
+        return sorted(os.path.splitext(f)[0] for f in os.listdir(self.path))
+
+    def frame(self, name, columns=None):
+        return pd.read_parquet(os.path.join(self.path, f"{name}.parquet"), columns=columns)
+
+    def batches(self, name, columns=None, batch_size=1_000_000):
+        """A DataFrame output as frames of at most batch_size rows, read one at a time."""
+        with pq.ParquetFile(os.path.join(self.path, f"{name}.parquet")) as f:
+            for batch in f.iter_batches(batch_size=batch_size, columns=columns):
+                yield batch.to_pandas()
+
+    def object(self, name):
+        with open(os.path.join(self.path, f"{name}.pkl"), "rb") as f:
+            return pickle.load(f)
+
+    def get(self, name, columns=None):
+        if os.path.exists(os.path.join(self.path, f"{name}.parquet")):
+            return self.frame(name, columns)
+        return self.object(name)
+
+
+class StageCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}-{key}")
+
+    def has(self, stage, key):
+        return os.path.isdir(self.path(stage, key))
+
+    def open(self, stage, key):
+        return StageOutput(self.path(stage, key))
+
+    def save(self, stage, key, outputs):
+        # Write into a temp directory then rename, so an interrupted run
+        # never leaves a partial entry behind
+        final = self.path(stage, key)
+        tmp = final + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, value in outputs.items():
+            if isinstance(value, pd.DataFrame):
+                value.to_parquet(os.path.join(tmp, f"{name}.parquet"), index=False)
+            else:
+                with open(os.path.join(tmp, f"{name}.pkl"), "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        return StageOutput(final)
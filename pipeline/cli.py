@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+
+from core.catalog import build_catalog
+from core.artifacts import write_table
+from core.data_store import artifact_path, build_artifacts, load_csv
+from pipeline.build import GRAPH, run
+from pipeline.config import DEFAULT_PARAMS, RAW_FILES
+
+# Command line entry point: python -m pipeline <command> ...
+
+
+def add_param_arguments(parser):
+    """One --flag per build parameter, defaulting to DEFAULT_PARAMS."""
+    for name, default in DEFAULT_PARAMS.items():
+        flag = "--" + name.replace("_", "-")
+        if isinstance(default, list):
+            parser.add_argument(flag, dest=name, type=int, nargs="*", default=default)
+        else:
+            parser.add_argument(flag, dest=name, type=type(default), default=default)
+
+
+def cmd_build(args):
+    params = {name: getattr(args, name) for name in DEFAULT_PARAMS}
+    output = run(
+        args.raw_dir,
+        out_dir=args.out_dir,
+        cache_dir=args.cache_dir,
+        params=params,
+        target=args.target,
+        force=set(args.force),
+    )
+    if args.target == "export":
+        print(json.dumps(output.object("files"), indent=1))
+
+
+def cmd_convert(args):
+    for name in build_artifacts(args.data_dir):
+        print(f"{name} -> {artifact_path(name, args.data_dir)}")
+    print(f"catalog -> {build_catalog(args.data_dir)}")
+
+
+def cmd_incremental(args):
+    from core.catalog import ProductCatalog
+    from pipeline import incremental
+    from pipeline.stages import format_rules, rules_frame
+
+    catalog = ProductCatalog.from_frame(incremental.load_products(args.raw_dir)) if args.raw_dir else None
+    if args.command == "init":
+        batch = [os.path.join(args.raw_dir, RAW_FILES[name][0])
+                 for name in ("order_products_train", "order_products_prior")]
+        users = incremental.read_orders([os.path.join(args.raw_dir, RAW_FILES["orders"][0])])
+        changed = incremental.init_state(
+            args.state_dir, incremental.read_order_products(batch), users, catalog,
+            args.support_point, args.min_lift, args.top_bundles,
+            args.list_department_id, args.list_aisle_id, args.out_dir,
+        )
+    else:
+        changed = incremental.apply_batch(
+            args.state_dir, incremental.read_order_products(args.batch), incremental.read_orders(args.orders),
+            catalog, args.out_dir,
+        )
+    print(json.dumps({group_col: len(groups) for group_col, groups in changed.items()}))
+
+    if args.write_rules:
+        with open(os.path.join(args.state_dir, "meta.json")) as f:
+            meta = json.load(f)
+        store = incremental.PairCountStore.load(args.state_dir)
+        rules = rules_frame(*incremental.all_rules(store, meta["min_lift"]))
+        rules = format_rules(rules, incremental.load_catalog(args.state_dir))
+        rules_dir = args.out_dir or args.state_dir
+        rules.to_csv(os.path.join(rules_dir, "fpg_rules.csv"), index=False)
+        # The app reads the artifact when there is one (see core.data_store)
+        if os.path.isdir(artifact_path("rules", rules_dir)):
+            write_table(load_csv("rules", rules_dir), artifact_path("rules", rules_dir))
+
+
+def cmd_simulate(args):
+    import pandas as pd
+
+    from core.simulation import load_scenarios
+    from pipeline.simulation import write_scenarios
+
+    counts = pd.read_csv(os.path.join(args.data_dir, "simulation_counts.csv"))
+    customers = pd.read_csv(os.path.join(args.data_dir, "user_segment_report.csv")).set_index("segment")["customers"]
+    os.makedirs(args.out_dir, exist_ok=True)
+    written = write_scenarios(counts, customers, load_scenarios(args.scenarios), args.out_dir)
+    print(json.dumps(written, indent=1))
+
+
+def cmd_synthetic(args):
+    from pipeline.synthetic import generate
+
+    n_orders = args.orders or max(args.rows // args.mean_basket, 1)
+    orders, rows = generate(
+        args.out_dir, n_orders, seed=args.seed, data_dir=args.data_dir, n_products=args.products,
+        chunk_users=args.chunk_users, mean_basket=args.mean_basket, zipf=args.zipf,
+        log=lambda message: print(message, flush=True),
+    )
+    print(json.dumps({"orders": orders, "order_products": rows}))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m pipeline", description="Offline artifact build for the app's data/ files")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="run load -> merge -> mine/segment -> aggregate -> export")
+    build.add_argument("--raw-dir", required=True, help="directory with the raw Instacart CSV files")
+    build.add_argument("--out-dir", default="data")
+    build.add_argument("--cache-dir", default=".pipeline_cache")
+    build.add_argument("--target", choices=list(GRAPH), default="export", help="last stage to run")
+    build.add_argument("--force", nargs="*", choices=list(GRAPH), default=[], help="stages to rerun even if cached")
+    add_param_arguments(build)
+    build.set_defaults(func=cmd_build)
+
+    convert = sub.add_parser("convert", help="convert existing data/*.csv into columnar artifacts")
+    convert.add_argument("--data-dir", default="data")
+    convert.set_defaults(func=cmd_convert)
+
+    for name, help_text in (
+        ("init", "count item pairs over the full history for incremental updates"),
+        ("update", "absorb new order_products rows and refresh the changed bundle groups"),
+    ):
+        command = sub.add_parser(name, help=help_text)
+        if name == "init":
+            command.add_argument("--raw-dir", required=True, help="directory with the raw Instacart CSV files")
+        else:
+            command.add_argument("--raw-dir", help="re-read products.csv from here (for new products)")
+        command.add_argument("--out-dir", help="also rewrite the bundle tables here (e.g. data); by default only the state changes")
+        command.add_argument("--state-dir", default=".pipeline_state")
+        command.add_argument("--write-rules", action="store_true", help="also write fpg_rules.csv (full scan) to --out-dir or the state dir")
+        if name == "init":
+            for param in ("support_point", "min_lift", "top_bundles"):
+                flag = "--" + param.replace("_", "-")
+                command.add_argument(flag, dest=param, type=type(DEFAULT_PARAMS[param]), default=DEFAULT_PARAMS[param])
+            for param in ("list_department_id", "list_aisle_id"):
+                flag = "--" + param.replace("_", "-")
+                command.add_argument(flag, dest=param, type=int, nargs="*", default=DEFAULT_PARAMS[param])
+        else:
+            command.add_argument("--batch", nargs="+", required=True, help="order_products CSV files of new orders")
+            command.add_argument("--orders", nargs="+", required=True, help="orders CSV files with (at least) the batch's orders")
+        command.set_defaults(func=cmd_incremental)
+
+    simulate = sub.add_parser("simulate", help="revenue and profit reports for a batch of pricing scenarios")
+    simulate.add_argument("--scenarios", required=True, help="JSON list of scenarios (see core/simulation.py)")
+    simulate.add_argument("--data-dir", default="data", help="directory with simulation_counts.csv")
+    simulate.add_argument("--out-dir", default="data/scenarios")
+    simulate.set_defaults(func=cmd_simulate)
+
+    synthetic = sub.add_parser("synthetic", help="write synthetic raw Instacart files for scale tests")
+    synthetic.add_argument("--out-dir", required=True)
+    size = synthetic.add_mutually_exclusive_group(required=True)
+    size.add_argument("--orders", type=int, help="number of orders")
+    size.add_argument("--rows", type=int, help="approximate number of order_products rows")
+    synthetic.add_argument("--seed", type=int, default=0)
+    synthetic.add_argument("--data-dir", default="data", help="catalog source (products, aisles, departments)")
+    synthetic.add_argument("--products", type=int, help="make up a catalog of this many products instead")
+    synthetic.add_argument("--chunk-users", type=int, default=10_000, help="users generated and written per chunk")
+    synthetic.add_argument("--mean-basket", type=int, default=11, help="mean items drawn per order, before duplicates")
+    synthetic.add_argument("--zipf", type=float, default=0.8, help="exponent of the product popularity law")
+    synthetic.set_defaults(func=cmd_synthetic)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
@@ -0,0 +1,106 @@
+# Build parameters and business constants for the offline pipeline.
+# Defaults follow the notebook's "Input data" and modelling cells.
+
+DEFAULT_PARAMS = {
+    # Association rules
+    "support_point": 0.003,
+    "max_len": 2,
+    "min_lift": 1.5,
+    "bundle_support": 0.0005,  # support of the "base + 2 add-ons" bundles, 0 = none
+    "sample_orders": 0,        # mine every order; the notebook sampled 50_000
+    "engine": "native",        # or "mlxtend" for the notebook's TransactionEncoder + fpgrowth path
+    "partition": "none",       # "order", "department" or "aisle" mines partitions in a process pool
+    "workers": 0,              # pool size, 0 = one per CPU core
+    "list_department_id": [4, 16, 5, 8],
+    "list_aisle_id": [],
+    # Segmentation (n_components, min_df and chunk_orders also shape the product embeddings)
+    "K": 5,
+    "n_components": 100,
+    "min_df": 50,
+    "batch_size": 10_000,
+    "segment_engine": "streaming",  # or "sklearn" for the notebook's CountVectorizer + in-memory path
+    "chunk_orders": 100_000,   # orders per block of the sharded order matrix (SVD/KMeans passes)
+    "kmeans_epochs": 5,
+    # Pricing / reports
+    "top_bundles": 10,
+    "top_products": 5,
+    "bestseller_capacity": 0,  # bestseller counters per slice and aisle/department, 0 = exact counts
+    "seed": 42,
+}
+
+# Parameters each stage depends on (a change reruns that stage and everything downstream)
+STAGE_PARAMS = {
+    "load": [],
+    "merge": [],
+    "mine": [
+        "support_point", "max_len", "min_lift", "bundle_support", "top_bundles", "sample_orders", "engine",
+        "partition", "list_department_id", "list_aisle_id", "seed",
+    ],
+    "segment": [
+        "list_department_id", "list_aisle_id", "K", "n_components", "min_df", "batch_size",
+        "segment_engine", "chunk_orders", "kmeans_epochs", "seed",
+    ],
+    "embed": ["n_components", "min_df", "chunk_orders", "seed"],
+    "aggregate": ["top_bundles", "top_products", "bestseller_capacity", "seed"],
+    "export": [],
+}
+
+# Output format version per stage (bump when a stage's outputs change shape, default 1)
+STAGE_VERSIONS = {
+    "merge": 2,  # fact table + dimensions instead of the joined data
+    "mine": 2,  # also mines the bundles of three
+    "segment": 3,  # order matrix built from sharded blocks
+    "embed": 2,  # order matrix built from sharded blocks
+    "aggregate": 5,  # adds the bestsellers by time window and segment
+    "export": 4,  # also writes the product embeddings artifact
+}
+
+# Raw Instacart files and the only columns the pipeline reads from them
+RAW_FILES = {
+    "orders": ("orders.csv", {
+        "order_id": "int32", "user_id": "int32", "order_number": "int16",
+        "order_dow": "int8", "order_hour_of_day": "int8",
+    }),
+    "order_products_prior": ("order_products__prior.csv", {"order_id": "int32", "product_id": "int32"}),
+    "order_products_train": ("order_products__train.csv", {"order_id": "int32", "product_id": "int32"}),
+    "products": ("products.csv", {
+        "product_id": "int32", "product_name": "object", "aisle_id": "int16", "department_id": "int8",
+    }),
+    "aisles": ("aisles.csv", {"aisle_id": "int16", "aisle": "object"}),
+    "departments": ("departments.csv", {"department_id": "int8", "department": "object"}),
+}
+
+# Department-based price behaviour: (median_price, dispersion) of a lognormal
+DEPT_PRICING = {
+    "produce": (2.5, 0.45),
+    "dairy eggs": (3.5, 0.35),
+    "beverages": (4.0, 0.55),
+    "snacks": (3.0, 0.50),
+    "frozen": (4.5, 0.35),
+    "pantry": (3.0, 0.50),
+    "bakery": (3.5, 0.35),
+    "meat seafood": (8.0, 0.45),
+    "deli": (6.0, 0.35),
+    "breakfast": (4.0, 0.40),
+    "canned goods": (2.5, 0.40),
+    "dry goods pasta": (2.8, 0.40),
+    "international": (3.5, 0.45),
+    "household": (6.0, 0.60),
+    "personal care": (6.5, 0.60),
+    "babies": (10.0, 0.60),
+    "pets": (9.0, 0.55),
+    "alcohol": (12.0, 0.55),
+    "other": (4.0, 0.60),
+}
+DEFAULT_PRICING = (4.0, 0.60)
+MIN_PRICE = 0.49
+MAX_PRICE = 49.99
+
+# Business labels of the notebook's segments
+CLUSTER_NAMES = {
+    0: "Segment A - Fresh Focus",
+    1: "Segment B - Low Activity",
+    2: "Segment C - Balanced Buyers",
+    3: "Segment D - Household Focus",
+    4: "Segment E - High Value",
+}
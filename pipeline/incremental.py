@@ -0,0 +1,407 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from core.artifacts import write_table
+from core.catalog import ProductCatalog, read_catalog, write_catalog
+from core.data_store import artifact_path, load_csv
+from pipeline.config import RAW_FILES
+from pipeline.mining import min_count_for, transaction_matrix
+
+# Incremental maintenance of the 1-to-1 rules and bundle tables.
+#
+# PairCountStore keeps the number of orders, a dense per-product order count
+# and the co-occurrence count of every product pair seen so far. A batch of
+# new order_products rows is absorbed by counting only that batch (one sparse
+# Gram product over the batch's products) and merging the result into sorted
+# key arrays through a delta buffer (log-structured), so the cost per batch
+# stays proportional to the batch, amortized.
+#
+# Counts only grow and the support threshold only rises with the order
+# count, so a pair can become frequent only if the batch touched it. The
+# store therefore keeps the frequent pairs on the side and updates them from
+# the batch's pairs alone; rules and bundle rankings are computed from that
+# small set. Batches must contain new orders only.
+#
+# The store counts what the build mines (see pipeline.stages.select_transactions):
+# rows of the selected departments or aisles, and each (user, product) only
+# the first time that user buys it. The (user, product) keys seen so far are
+# kept as sorted runs (KeyRuns) so a batch drops repeats of earlier orders
+# without reading them all. The state directory also keeps its own product
+# catalog, and an update only reads the orders rows of its batch, so nothing
+# proportional to the history is read or rewritten per batch.
+
+
+def pair_keys(a, b):
+    return (np.asarray(a, dtype=np.int64) << 32) | np.asarray(b, dtype=np.int64)
+
+
+def split_keys(keys):
+    return keys >> 32, keys & 0xFFFFFFFF
+
+
+class SortedCounts:
+    """int64 key -> count map as sorted arrays with a delta buffer."""
+
+    def __init__(self, keys=None, counts=None):
+        self.keys = np.empty(0, np.int64) if keys is None else keys
+        self.counts = np.empty(0, np.int64) if counts is None else counts
+        self.delta_keys = np.empty(0, np.int64)
+        self.delta_counts = np.empty(0, np.int64)
+        self.compacted = False  # main arrays changed since they were last saved
+
+    @staticmethod
+    def _combine(keys, counts):
+        keys, inverse = np.unique(keys, return_inverse=True)
+        return keys, np.bincount(inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+
+    def add(self, keys, counts):
+        self.delta_keys, self.delta_counts = self._combine(
+            np.concatenate([self.delta_keys, keys]), np.concatenate([self.delta_counts, counts])
+        )
+        # Fold the delta into the main arrays once it is a fraction of them
+        if len(self.delta_keys) > len(self.keys) // 8 + 4096:
+            self.compact()
+
+    def compact(self):
+        if len(self.delta_keys):
+            self.keys, self.counts = self._combine(
+                np.concatenate([self.keys, self.delta_keys]), np.concatenate([self.counts, self.delta_counts])
+            )
+            self.delta_keys = np.empty(0, np.int64)
+            self.delta_counts = np.empty(0, np.int64)
+            self.compacted = True
+
+    def get(self, keys):
+        out = np.zeros(len(keys), dtype=np.int64)
+        for k, c in ((self.keys, self.counts), (self.delta_keys, self.delta_counts)):
+            if len(k):
+                pos = np.minimum(np.searchsorted(k, keys), len(k) - 1)
+                hit = k[pos] == keys
+                out[hit] += c[pos[hit]]
+        return out
+
+
+class KeyRuns:
+    """Set of int64 keys stored as sorted runs of .npy files, merged lazily.
+
+    Every add writes its keys as one more run; a run is merged into the one
+    before it while it is at least half that one's size, so there are
+    O(log n) runs, each key is rewritten O(log n) times, and a lookup is one
+    searchsorted per memory-mapped run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.names = sorted(f for f in os.listdir(path) if f.startswith("run-") and f.endswith(".npy"))
+        self.runs = [np.load(os.path.join(path, name), mmap_mode="r") for name in self.names]
+
+    def contains(self, keys):
+        found = np.zeros(len(keys), dtype=bool)
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            found |= run[pos] == keys
+        return found
+
+    def _write(self, name, keys):
+        tmp = os.path.join(self.path, "run.tmp.npy")
+        np.save(tmp, keys)
+        os.replace(tmp, os.path.join(self.path, name))
+
+    def add(self, keys):
+        """Add sorted unique keys that are not in the set yet."""
+        if not len(keys):
+            return
+        name = f"run-{int(self.names[-1][4:-4]) + 1 if self.names else 0:010d}.npy"
+        self._write(name, keys)
+        self.names.append(name)
+        self.runs.append(keys)
+        while len(self.runs) > 1 and 2 * len(self.runs[-1]) >= len(self.runs[-2]):
+            # A crash between these two steps only leaves keys in two runs
+            merged = np.union1d(self.runs[-2], self.runs[-1])
+            self._write(self.names[-2], merged)
+            os.remove(os.path.join(self.path, self.names.pop()))
+            self.runs.pop()
+            self.runs[-1] = merged
+
+
+class PairCountStore:
+    """Order, item and pair counts for the whole history, updated batch by batch."""
+
+    def __init__(self, min_support):
+        self.min_support = min_support
+        self.n_orders = 0
+        self.item_counts = np.zeros(0, dtype=np.int64)
+        self.pairs = SortedCounts()  # (a, b) with a < b
+        self.frequent_keys = np.empty(0, np.int64)
+        self.frequent_counts = np.empty(0, np.int64)
+
+    def min_count(self):
+        return min_count_for(self.min_support, self.n_orders)
+
+    def add_orders(self, order_ids, product_ids):
+        """Absorb a batch of new orders; returns the keys of the pairs it touched."""
+        X, items = transaction_matrix(order_ids, product_ids)
+        self.n_orders += X.shape[0]
+
+        if len(items) and items.max() >= len(self.item_counts):
+            grown = np.zeros(items.max() + 1, dtype=np.int64)
+            grown[:len(self.item_counts)] = self.item_counts
+            self.item_counts = grown
+        self.item_counts[items] += np.bincount(X.indices, minlength=X.shape[1])
+
+        gram = (X.T @ X).tocoo()
+        upper = gram.row < gram.col
+        keys = pair_keys(items[gram.row[upper]], items[gram.col[upper]])
+        self.pairs.add(keys, gram.data[upper].astype(np.int64))
+
+        # Old frequent pairs the batch missed keep their count; touched pairs are re-read
+        min_count = self.min_count()
+        old = ~np.isin(self.frequent_keys, keys, assume_unique=True)
+        old &= self.frequent_counts >= min_count
+        counts = self.pairs.get(keys)
+        new = counts >= min_count
+        frequent_keys = np.concatenate([self.frequent_keys[old], keys[new]])
+        frequent_counts = np.concatenate([self.frequent_counts[old], counts[new]])
+        order = np.argsort(frequent_keys, kind="stable")
+        self.frequent_keys, self.frequent_counts = frequent_keys[order], frequent_counts[order]
+        return keys
+
+    def rules(self, min_lift):
+        """Both directions of every frequent pair with lift >= min_lift, as arrays."""
+        n = self.n_orders
+        a, b = split_keys(self.frequent_keys)
+        ab = self.frequent_counts.astype(np.float64)
+        ca, cb = self.item_counts[a], self.item_counts[b]
+
+        ante = np.concatenate([a, b])
+        cons = np.concatenate([b, a])
+        count = np.concatenate([ab, ab])
+        confidence = count / np.concatenate([ca, cb])
+        lift = confidence / (np.concatenate([cb, ca]) / n)
+        keep = lift >= min_lift
+        return ante[keep], cons[keep], count[keep] / n, confidence[keep], lift[keep]
+
+    def save(self, state_dir):
+        """Write the small arrays every time and the main pair arrays only after a compaction."""
+        if self.pairs.compacted:
+            for name, values in (("pair_keys", self.pairs.keys), ("pair_counts", self.pairs.counts)):
+                tmp = os.path.join(state_dir, f"{name}.tmp.npy")
+                np.save(tmp, values)
+                os.replace(tmp, os.path.join(state_dir, f"{name}.npy"))
+            self.pairs.compacted = False
+        tmp = os.path.join(state_dir, "counts.tmp.npz")
+        np.savez(
+            tmp,
+            min_support=self.min_support,
+            n_orders=self.n_orders,
+            item_counts=self.item_counts,
+            delta_keys=self.pairs.delta_keys,
+            delta_counts=self.pairs.delta_counts,
+            frequent_keys=self.frequent_keys,
+            frequent_counts=self.frequent_counts,
+        )
+        os.replace(tmp, os.path.join(state_dir, "counts.npz"))
+
+    @classmethod
+    def load(cls, state_dir):
+        with np.load(os.path.join(state_dir, "counts.npz")) as f:
+            store = cls(float(f["min_support"]))
+            store.n_orders = int(f["n_orders"])
+            store.item_counts = f["item_counts"]
+            # Lookups only touch the pages searchsorted visits
+            store.pairs = SortedCounts(
+                np.load(os.path.join(state_dir, "pair_keys.npy"), mmap_mode="r"),
+                np.load(os.path.join(state_dir, "pair_counts.npy"), mmap_mode="r"),
+            )
+            store.pairs.delta_keys = f["delta_keys"]
+            store.pairs.delta_counts = f["delta_counts"]
+            store.frequent_keys = f["frequent_keys"]
+            store.frequent_counts = f["frequent_counts"]
+        return store
+
+
+def all_rules(store, min_lift):
+    """The store's rules as mine_rules lists, for fpg_rules.csv."""
+    ante, cons, support, confidence, lift = store.rules(min_lift)
+    return (
+        [[int(x)] for x in ante], [[int(x)] for x in cons],
+        list(support), list(confidence), list(lift),
+    )
+
+
+BUNDLE_COLUMNS = ["product_name_base", "product_name_recommended", "lift", "confidence", "support"]
+
+
+def top_bundles(store, catalog, group_col, min_lift, k):
+    """bundle_top10_by_<group>.csv rows from the store's current rules."""
+    ante, cons, support, confidence, lift = store.rules(min_lift)
+    top = pd.DataFrame({
+        group_col: catalog.groups(ante, group_col).astype(str),
+        "product_id": ante,
+        "recommended_product_id": cons,
+        "product_name_base": catalog.names(ante),
+        "product_name_recommended": catalog.names(cons),
+        "lift": lift,
+        "confidence": confidence,
+        "support": support,
+    })
+    top = top.sort_values([group_col, "lift", "confidence"], ascending=[True, False, False], kind="stable")
+    return top.groupby(group_col).head(k).reset_index(drop=True)
+
+
+def changed_groups(previous, current, group_col):
+    """Groups whose ranked (base, recommended) pairs differ between two bundle tables."""
+    def ranking(table):
+        if table is None:
+            return {}
+        pairs = pair_keys(table["product_id"], table["recommended_product_id"])
+        return pd.Series(pairs, index=table.index).groupby(table[group_col].to_numpy()).agg(tuple).to_dict()
+
+    before, after = ranking(previous), ranking(current)
+    return sorted(g for g in set(before) | set(after) if before.get(g) != after.get(g))
+
+
+# ---------------------------------------------------------------- state directory
+
+
+def load_products(raw_dir):
+    """Products with aisle and department names, from the raw Instacart files."""
+    frames = {}
+    for name in ("products", "aisles", "departments"):
+        file_name, dtypes = RAW_FILES[name]
+        frames[name] = pd.read_csv(os.path.join(raw_dir, file_name), usecols=list(dtypes), dtype=dtypes)
+    return (
+        frames["products"]
+        .merge(frames["aisles"], on="aisle_id", how="left")
+        .merge(frames["departments"], on="department_id", how="left")
+    )
+
+
+def read_orders(paths):
+    """order_id -> user_id of the orders in one or more orders CSV files."""
+    return pd.concat(
+        [pd.read_csv(path, usecols=["order_id", "user_id"], dtype="int32") for path in paths],
+        ignore_index=True,
+    ).set_index("order_id")["user_id"]
+
+
+def select_transactions(order_products, users, catalog, meta, seen):
+    """The rows the build would mine, and the sorted keys of the (user, product)
+    pairs they add to `seen` (a KeyRuns).
+
+    Rows outside meta's departments (or aisles) are dropped, then every
+    (user, product) already seen or earlier in the batch. Orders missing from
+    `users` count as one unknown user, like the build's NaN.
+    """
+    rows = order_products
+    for group_col, group_ids in (("department_id", catalog.department_ids), ("aisle_id", catalog.aisle_ids)):
+        wanted = meta["list_" + group_col]
+        if wanted:
+            rows = rows[np.isin(group_ids(rows["product_id"].to_numpy()), wanted)]
+            break
+    user_ids = users.reindex(rows["order_id"]).fillna(-1).to_numpy(np.int64)
+    keys, first = np.unique(pair_keys(user_ids, rows["product_id"]), return_index=True)
+    new = ~seen.contains(keys)
+    return rows.iloc[np.sort(first[new])], keys[new]
+
+
+def read_order_products(paths):
+    """(order_id, product_id) rows of one or more order_products CSV files."""
+    return pd.concat(
+        [pd.read_csv(path, usecols=["order_id", "product_id"], dtype="int32") for path in paths],
+        ignore_index=True,
+    )
+
+
+def _paths(state_dir):
+    return {
+        "meta": os.path.join(state_dir, "meta.json"),
+        "department": os.path.join(state_dir, "bundles_department.parquet"),
+        "aisle": os.path.join(state_dir, "bundles_aisle.parquet"),
+        "seen": os.path.join(state_dir, "seen"),
+        "catalog": os.path.join(state_dir, "catalog"),
+    }
+
+
+def _refresh(state_dir, store, seen, new_keys, catalog, meta, out_dir, previous):
+    """Rerank bundles from the frequent pairs, save the state and rewrite the
+    groups whose ranking changed (a table none of whose groups changed is left as is)."""
+    paths = _paths(state_dir)
+    table_names = {"department": "bundle_by_department", "aisle": "bundle_by_aisle"}
+    changed = {}
+    for group_col, name in table_names.items():
+        current = top_bundles(store, catalog, group_col, meta["min_lift"], meta["k"])
+        before = previous.get(group_col)
+        changed[group_col] = changed_groups(before, current, group_col)
+        if before is not None:
+            if not changed[group_col]:
+                continue
+            # Unchanged groups keep the rows (and figures) of their last change
+            current = pd.concat([
+                before[~before[group_col].isin(changed[group_col])],
+                current[current[group_col].isin(changed[group_col])],
+            ]).sort_values(group_col, kind="stable").reset_index(drop=True)
+        current.to_parquet(paths[group_col], index=False)
+        if out_dir:
+            current[[group_col] + BUNDLE_COLUMNS].to_csv(
+                os.path.join(out_dir, f"bundle_top10_by_{group_col}.csv"), index=False
+            )
+            if os.path.isdir(artifact_path(name, out_dir)):
+                write_table(load_csv(name, out_dir), artifact_path(name, out_dir))
+    seen.add(new_keys)
+    store.save(state_dir)
+    return changed
+
+
+def init_state(state_dir, order_products, users, catalog, min_support, min_lift, k=10,
+               list_department_id=(), list_aisle_id=(), out_dir=None):
+    """Count the full history once and rank every group."""
+    paths = _paths(state_dir)
+    os.makedirs(state_dir, exist_ok=True)
+    meta = {
+        "min_support": min_support, "min_lift": min_lift, "k": k,
+        "list_department_id": list(list_department_id), "list_aisle_id": list(list_aisle_id),
+    }
+    with open(paths["meta"], "w") as f:
+        json.dump(meta, f, indent=1)
+    write_catalog(catalog, paths["catalog"])
+    shutil.rmtree(paths["seen"], ignore_errors=True)
+
+    seen = KeyRuns(paths["seen"])
+    rows, new_keys = select_transactions(order_products, users, catalog, meta, seen)
+    store = PairCountStore(min_support)
+    store.add_orders(rows["order_id"].to_numpy(), rows["product_id"].to_numpy())
+    store.pairs.compact()
+    return _refresh(state_dir, store, seen, new_keys, catalog, meta, out_dir, {})
+
+
+def load_catalog(state_dir):
+    """The product catalog the state was last given."""
+    return read_catalog(_paths(state_dir)["catalog"])
+
+
+def apply_batch(state_dir, order_products, users, catalog=None, out_dir=None):
+    """Absorb new orders (users: order_id -> user_id of at least the batch's
+    orders); returns the aisle/department groups whose bundle ranking changed.
+    A catalog replaces the state's one, e.g. for new products."""
+    paths = _paths(state_dir)
+    with open(paths["meta"]) as f:
+        meta = json.load(f)
+    if "list_department_id" not in meta or not os.path.isdir(paths["seen"]):
+        raise ValueError(f"{state_dir} predates the current state layout; run init again")
+    if catalog is None:
+        catalog = load_catalog(state_dir)
+    else:
+        write_catalog(catalog, paths["catalog"])
+    previous = {group_col: pd.read_parquet(paths[group_col]) for group_col in ("department", "aisle")}
+
+    seen = KeyRuns(paths["seen"])
+    rows, new_keys = select_transactions(order_products, users, catalog, meta, seen)
+    store = PairCountStore.load(state_dir)
+    store.add_orders(rows["order_id"].to_numpy(), rows["product_id"].to_numpy())
+    return _refresh(state_dir, store, seen, new_keys, catalog, meta, out_dir, previous)
@@ -0,0 +1,291 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Frequent itemset and association rule mining on sparse integer arrays.
+# Transactions are a binary CSR order x item matrix built straight from
+# (order_id, product_id) codes. Items below the support threshold are
+# dropped before anything else is counted; pairs come from one sparse Gram
+# product X^T X, and larger itemsets are grown level by level: the itemsets
+# sharing a prefix are extended together by one Gram product over the
+# orders holding that prefix (Eclat-style order lists), so 3- and 4-item
+# levels cost one small matrix product per prefix. Lift pruning optionally
+# drops itemsets with an item that does not co-occur more than chance
+# before their supersets are counted.
+
+
+def transaction_matrix(order_ids, product_ids):
+    """Binary CSR matrix (orders x items) and the product id of each column."""
+    order_codes, _ = pd.factorize(np.asarray(order_ids), sort=False)
+    items, item_codes = np.unique(np.asarray(product_ids), return_inverse=True)
+    X = sparse.csr_matrix(
+        (np.ones(len(order_codes), dtype=np.int32), (order_codes, item_codes)),
+        shape=(order_codes.max() + 1 if len(order_codes) else 0, len(items)),
+    )
+    X.sum_duplicates()
+    X.data[:] = 1
+    return X, items
+
+
+def min_count_for(min_support, n_transactions):
+    return max(1, int(np.ceil(min_support * n_transactions)))
+
+
+def frequent_items(X, min_count):
+    """Column mask and counts of the items meeting min_count."""
+    counts = np.bincount(X.indices, minlength=X.shape[1])
+    return counts >= min_count, counts
+
+
+def frequent_pairs(X, min_count):
+    """(i, j, count) arrays of the item pairs with i < j meeting min_count."""
+    gram = sparse.triu(X.T @ X, k=1).tocoo()
+    keep = gram.data >= min_count
+    return gram.row[keep], gram.col[keep], gram.data[keep].astype(np.int64)
+
+
+def orders_with(Xc, itemset):
+    """Sorted row indices of the orders containing every column of itemset."""
+    cols = sorted(itemset, key=lambda j: Xc.indptr[j + 1] - Xc.indptr[j])
+    tids = Xc.indices[Xc.indptr[cols[0]]:Xc.indptr[cols[0] + 1]]
+    for j in cols[1:]:
+        tids = np.intersect1d(tids, Xc.indices[Xc.indptr[j]:Xc.indptr[j + 1]], assume_unique=True)
+    return tids
+
+
+def lifted(itemset, count, counts_of, n, min_lift):
+    """Whether every item of itemset is bought with the rest at least min_lift
+    times as often as chance predicts (False if a subset was pruned)."""
+    for i in range(len(itemset)):
+        rest = itemset[:i] + itemset[i + 1:]
+        if rest not in counts_of or count * n < min_lift * counts_of[rest] * counts_of[itemset[i:i + 1]]:
+            return False
+    return True
+
+
+def grow_level(X, Xc, level, counts_of, min_count, n=None, min_lift=None):
+    """Frequent (k+1)-itemsets extending the frequent k-itemsets in `level`.
+
+    Itemsets sharing their first k-1 items are grown together: one sparse
+    Gram product over the orders holding that prefix, restricted to the
+    prefix's last items in `level`, counts every prefix + (b, c) at once.
+    With min_lift only lifted() itemsets are kept.
+    """
+    last_items = {}
+    for itemset in level:
+        last_items.setdefault(itemset[:-1], []).append(itemset[-1])
+
+    grown = []
+    for prefix, last in last_items.items():
+        if len(last) < 2:
+            continue
+        candidates = np.array(sorted(last))
+        b, c, counts = frequent_pairs(X[orders_with(Xc, prefix)][:, candidates], min_count)
+        for j, l, count in zip(candidates[b].tolist(), candidates[c].tolist(), counts.tolist()):
+            itemset = prefix + (j, l)
+            if min_lift is None or lifted(itemset, count, counts_of, n, min_lift):
+                grown.append((itemset, count))
+    grown.sort()
+    return grown
+
+
+def frequent_itemsets(X, items, min_support, max_len=2, n_transactions=None, min_lift=None, bundles=None):
+    """Frequent itemsets of the binary CSR matrix X.
+
+    Returns a DataFrame with `itemsets` (tuple of product ids, sorted),
+    `count` and `support`, plus the number of transactions. Pass
+    n_transactions when X holds only part of the orders (e.g. one item
+    partition) so support stays relative to the whole history.
+    With min_lift, itemsets of two or more items are kept (and grown) only
+    if lifted(); bundles (a TopBundles) ranks each level of its size as soon
+    as it is mined.
+    """
+    n = X.shape[0] if n_transactions is None else n_transactions
+    min_count = min_count_for(min_support, n)
+
+    # Support threshold first: only frequent items take part in any counting
+    keep, item_counts = frequent_items(X, min_count)
+    cols = np.nonzero(keep)[0]
+    X = X[:, cols].tocsr()
+    item_counts = item_counts[cols]
+    items = np.asarray(items)[cols]
+
+    itemsets = [(int(i),) for i in range(len(cols))]
+    counts = [int(c) for c in item_counts]
+
+    if max_len >= 2 and len(cols) > 1:
+        counts_of = dict(zip(itemsets, counts))
+        a, b, pair_counts = frequent_pairs(X, min_count)
+        grown = list(zip(zip(a.tolist(), b.tolist()), pair_counts.tolist()))
+        if min_lift is not None:
+            grown = [(pair, count) for pair, count in grown if lifted(pair, count, counts_of, n, min_lift)]
+
+        # Level-wise growth so every subset is known before pruning
+        Xc = X.tocsc()
+        for size in range(2, max_len + 1):
+            if size > 2:
+                grown = grow_level(X, Xc, level, counts_of, min_count, n, min_lift)
+            if not grown:
+                break
+            level = [itemset for itemset, _ in grown]
+            counts_of.update(grown)
+            itemsets.extend(level)
+            counts.extend(count for _, count in grown)
+            if bundles is not None and size == bundles.size:
+                bundles.add(grown, counts_of, items, n)
+
+    counts = np.asarray(counts, dtype=np.int64)
+    return pd.DataFrame({
+        "itemsets": [tuple(int(items[i]) for i in s) for s in itemsets],
+        "count": counts,
+        "support": counts / n if n else counts.astype(float),
+    }), n
+
+
+class TopBundles:
+    """The k best "base + add-ons" bundles per aisle/department of the base product.
+
+    Fed one mined level of `size`-item itemsets at a time; every split of an
+    itemset into one base product and size-1 add-ons with lift >= min_lift
+    goes through a bounded heap per group, so no rule list is ever built.
+    groups maps each group column to a Series product_id -> group id.
+    """
+
+    def __init__(self, groups, k, size=3, min_lift=1.0):
+        self.groups = groups
+        self.k = k
+        self.size = size
+        self.min_lift = min_lift
+        self.heaps = {group_col: {} for group_col in groups}
+
+    def add(self, grown, counts_of, items, n):
+        group_ids = {col: groups.reindex(items).to_numpy() for col, groups in self.groups.items()}
+        for itemset, count in grown:
+            for i, base in enumerate(itemset):
+                addons = itemset[:i] + itemset[i + 1:]
+                confidence = count / counts_of[(base,)]
+                lift = confidence * n / counts_of[addons]
+                if lift < self.min_lift:
+                    continue
+                entry = (lift, confidence, count / n, int(items[base]), tuple(int(items[j]) for j in addons))
+                for col, ids in group_ids.items():
+                    if pd.isna(ids[base]):
+                        continue
+                    heap = self.heaps[col].setdefault(int(ids[base]), [])
+                    if len(heap) < self.k:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+
+    def frame(self):
+        """One row per kept bundle: group, group_id, product_id, addon_1.., support, confidence, lift."""
+        rows = []
+        for col, heaps in self.heaps.items():
+            for group_id, heap in heaps.items():
+                for lift, confidence, support, base, addons in heap:
+                    rows.append((col, group_id, base, *addons, support, confidence, lift))
+        addon_cols = [f"addon_{i}" for i in range(1, self.size)]
+        frame = pd.DataFrame(rows, columns=["group", "group_id", "product_id", *addon_cols, "support", "confidence", "lift"])
+        return frame.sort_values(
+            ["group", "group_id", "lift", "confidence"], ascending=[True, True, False, False], kind="stable"
+        ).reset_index(drop=True)
+
+
+def association_rules(itemsets, n_transactions, min_lift=1.0):
+    """All antecedent -> consequent splits of the frequent itemsets with lift >= min_lift.
+
+    Pairs are handled fully vectorized; larger itemsets enumerate their
+    proper subsets (all of which are frequent, so their counts are known).
+    """
+    n = n_transactions
+    count_of = dict(zip(itemsets["itemsets"], itemsets["count"]))
+    sizes = itemsets["itemsets"].map(len).to_numpy()
+
+    single = itemsets[sizes == 1]
+    single_count = pd.Series(single["count"].to_numpy(), index=[s[0] for s in single["itemsets"]])
+
+    pairs = itemsets[sizes == 2]
+    a = np.array([s[0] for s in pairs["itemsets"]], dtype=np.int64)
+    b = np.array([s[1] for s in pairs["itemsets"]], dtype=np.int64)
+    ab = pairs["count"].to_numpy(dtype=np.float64)
+    ca = single_count.reindex(a).to_numpy(dtype=np.float64)
+    cb = single_count.reindex(b).to_numpy(dtype=np.float64)
+
+    # Both directions of every pair
+    ante = np.concatenate([a, b])
+    cons = np.concatenate([b, a])
+    support = np.concatenate([ab, ab]) / n
+    confidence = np.concatenate([ab / ca, ab / cb])
+    lift = confidence / (np.concatenate([cb, ca]) / n)
+
+    keep = lift >= min_lift
+    antecedents = [[int(x)] for x in ante[keep]]
+    consequents = [[int(x)] for x in cons[keep]]
+    supports, confidences, lifts = list(support[keep]), list(confidence[keep]), list(lift[keep])
+
+    for itemset, count in zip(itemsets["itemsets"][sizes > 2], itemsets["count"][sizes > 2]):
+        k = len(itemset)
+        for mask in range(1, 2 ** k - 1):
+            lhs = tuple(itemset[i] for i in range(k) if mask >> i & 1)
+            rhs = tuple(itemset[i] for i in range(k) if not mask >> i & 1)
+            conf = count / count_of[lhs]
+            rule_lift = conf / (count_of[rhs] / n)
+            if rule_lift >= min_lift:
+                antecedents.append(list(lhs))
+                consequents.append(list(rhs))
+                supports.append(count / n)
+                confidences.append(conf)
+                lifts.append(rule_lift)
+
+    return antecedents, consequents, supports, confidences, lifts
+
+
+def mine_rules(order_ids, product_ids, min_support, max_len=2, min_lift=1.5):
+    """Association rules straight from (order_id, product_id) integer columns."""
+    X, items = transaction_matrix(order_ids, product_ids)
+    itemsets, n = frequent_itemsets(X, items, min_support, max_len)
+    return association_rules(itemsets, n, min_lift)
+
+
+def mine_bundles(order_ids, product_ids, min_support, groups, k, size=3, min_lift=1.5, prune_lift=1.0):
+    """Top-k bundles of `size` products per group (see TopBundles) with lift >= min_lift.
+
+    Itemsets are grown only while every item is lifted at least prune_lift
+    by the rest.
+    """
+    X, items = transaction_matrix(order_ids, product_ids)
+    bundles = TopBundles(groups, k, size, min_lift)
+    frequent_itemsets(X, items, min_support, size, min_lift=prune_lift, bundles=bundles)
+    return bundles.frame()
+
+
+def mine_rules_mlxtend(order_ids, product_ids, min_support, max_len=2, min_lift=1.5):
+    """The notebook's path (TransactionEncoder -> sparse DataFrame -> fpgrowth), for comparison."""
+    from mlxtend.frequent_patterns import association_rules as mlx_rules, fpgrowth
+    from mlxtend.preprocessing import TransactionEncoder
+
+    data = pd.DataFrame({"order_id": order_ids, "product_id": product_ids}).drop_duplicates()
+    n_orders = data["order_id"].nunique()
+    counts = data.groupby("product_id")["order_id"].nunique()
+    data = data[data["product_id"].isin(counts[counts >= min_count_for(min_support, n_orders)].index)]
+
+    transactions = data.groupby("order_id")["product_id"].apply(list).tolist()
+    te = TransactionEncoder()
+    te_ary = te.fit(transactions).transform(transactions, sparse=True)
+    df = pd.DataFrame.sparse.from_spmatrix(te_ary, columns=te.columns_)
+    df.columns = df.columns.astype(str)
+    df = df.astype(bool)
+
+    # fpgrowth's support is relative to the orders that kept at least one item
+    itemsets = fpgrowth(df, min_support=min_support * n_orders / len(df), use_colnames=True, max_len=max_len)
+    if itemsets.empty:
+        return [], [], [], [], []
+    itemsets["support"] *= len(df) / n_orders
+    rules = mlx_rules(itemsets, metric="lift", min_threshold=min_lift)
+    return (
+        rules["antecedents"].map(lambda s: sorted(int(x) for x in s)).tolist(),
+        rules["consequents"].map(lambda s: sorted(int(x) for x in s)).tolist(),
+        rules["support"].tolist(), rules["confidence"].tolist(), rules["lift"].tolist(),
+    )
@@ -0,0 +1,171 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from pipeline.mining import (
+    association_rules,
+    frequent_itemsets,
+    frequent_pairs,
+    min_count_for,
+    orders_with,
+    transaction_matrix,
+)
+
+# Partitioned rule mining across CPU cores.
+#
+# partition="order": orders are split into shards and every level is counted
+#   in parallel (item counts, pair Gram products, prefix extensions). Shard
+#   counts are summed before thresholding, so the result is exactly the
+#   single-pass result.
+# partition="department" / "aisle": items are split by group and each group
+#   is mined on its own, against the global order count. Item and within-group
+#   itemset counts are exact, so support, confidence and lift match a
+#   single-pass run; rules spanning two groups are not produced.
+
+PARTITIONS = ("order", "department", "aisle")
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+# ---------------------------------------------------------------- workers
+
+
+def _item_counts(X):
+    return np.bincount(X.indices, minlength=X.shape[1])
+
+
+def _pair_counts(X):
+    a, b, counts = frequent_pairs(X, 1)
+    return a, b, counts
+
+
+def _extension_counts(X, level):
+    """Sparse (prefix index, item, count) of every extension j > last of each prefix."""
+    Xc = X.tocsc()
+    rows, cols, counts = [], [], []
+    for p, prefix in enumerate(level):
+        ext = np.bincount(X[orders_with(Xc, prefix)].indices, minlength=X.shape[1])
+        j = np.nonzero(ext[prefix[-1] + 1:])[0] + prefix[-1] + 1
+        rows.append(np.full(len(j), p))
+        cols.append(j)
+        counts.append(ext[j])
+    if not rows:
+        return np.empty(0, int), np.empty(0, int), np.empty(0, int)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(counts)
+
+
+def _mine_group(X, items, min_support, max_len, min_lift, n_transactions):
+    itemsets, n = frequent_itemsets(X, items, min_support, max_len, n_transactions)
+    return association_rules(itemsets, n, min_lift)
+
+
+# ---------------------------------------------------------------- order shards
+
+
+def _sum_sparse(parts, shape):
+    rows = np.concatenate([p[0] for p in parts])
+    cols = np.concatenate([p[1] for p in parts])
+    data = np.concatenate([p[2] for p in parts]).astype(np.int64)
+    total = sparse.coo_matrix((data, (rows, cols)), shape=shape).tocsr()
+    total.sum_duplicates()
+    return total.tocoo()
+
+
+def mine_order_shards(X, items, min_support, max_len, min_lift, pool, n_shards):
+    n = X.shape[0]
+    min_count = min_count_for(min_support, n)
+    bounds = np.linspace(0, n, n_shards + 1).astype(int)
+    shards = [X[a:b] for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    # Level 1: exact global item counts, then drop infrequent items everywhere
+    item_counts = sum(pool.map(_item_counts, shards))
+    cols = np.nonzero(item_counts >= min_count)[0]
+    shards = [s[:, cols].tocsr() for s in shards]
+    itemsets = [(int(i),) for i in range(len(cols))]
+    counts = item_counts[cols].tolist()
+
+    if max_len >= 2 and len(cols) > 1:
+        pairs = _sum_sparse(list(pool.map(_pair_counts, shards)), (len(cols), len(cols)))
+        keep = pairs.data >= min_count
+        level = list(zip(pairs.row[keep].tolist(), pairs.col[keep].tolist()))
+        itemsets.extend(level)
+        counts.extend(pairs.data[keep].tolist())
+        counts_of = dict(zip(itemsets, counts))
+
+        for _ in range(3, max_len + 1):
+            if not level:
+                break
+            ext = _sum_sparse(
+                list(pool.map(_extension_counts, shards, [level] * len(shards))),
+                (len(level), len(cols)),
+            )
+            grown = []
+            for p, j, c in zip(ext.row.tolist(), ext.col.tolist(), ext.data.tolist()):
+                if c < min_count:
+                    continue
+                itemset = level[p] + (j,)
+                if all(itemset[:i] + itemset[i + 1:] in counts_of for i in range(len(itemset) - 1)):
+                    grown.append((itemset, c))
+            grown.sort()
+            level = [itemset for itemset, _ in grown]
+            counts_of.update(grown)
+            itemsets.extend(level)
+            counts.extend(c for _, c in grown)
+
+    counts = np.asarray(counts, dtype=np.int64)
+    frame = pd.DataFrame({
+        "itemsets": [tuple(int(items[cols[i]]) for i in s) for s in itemsets],
+        "count": counts,
+        "support": counts / n,
+    })
+    return association_rules(frame, n, min_lift)
+
+
+# ---------------------------------------------------------------- item groups
+
+
+def mine_item_groups(X, items, groups, min_support, max_len, min_lift, pool):
+    n = X.shape[0]
+    item_groups = pd.Series(groups).reindex(items).to_numpy()
+    tasks = []
+    for group in pd.unique(item_groups[pd.notna(item_groups)]):
+        cols = np.nonzero(item_groups == group)[0]
+        sub = X[:, cols].tocsr()
+        # Orders without any item of the group cannot support its itemsets
+        sub = sub[np.diff(sub.indptr) > 0]
+        tasks.append((sub, items[cols]))
+
+    futures = [
+        pool.submit(_mine_group, sub, sub_items, min_support, max_len, min_lift, n)
+        for sub, sub_items in tasks
+    ]
+    merged = ([], [], [], [], [])
+    for future in futures:
+        for acc, part in zip(merged, future.result()):
+            acc.extend(part)
+    return merged
+
+
+def mine_rules_parallel(order_ids, product_ids, min_support, max_len=2, min_lift=1.5,
+                        partition="order", groups=None, workers=None):
+    """Association rules mined in a process pool.
+
+    groups maps product_id -> department or aisle and is required for the
+    item-group partitions. Returns the same tuple of lists as mine_rules.
+    """
+    if partition not in PARTITIONS:
+        raise ValueError(f"partition must be one of {PARTITIONS}, got {partition!r}")
+    if partition != "order" and groups is None:
+        raise ValueError(f"partition={partition!r} needs a product_id -> {partition} mapping")
+
+    X, items = transaction_matrix(order_ids, product_ids)
+    workers = workers or default_workers()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if partition == "order":
+            return mine_order_shards(X, items, min_support, max_len, min_lift, pool, workers)
+        return mine_item_groups(X, items, groups, min_support, max_len, min_lift, pool)
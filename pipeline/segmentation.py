@@ -0,0 +1,200 @@
+import os
+
+import numpy as np
+from scipy import sparse
+
+# Out-of-core order segmentation.
+#
+# The notebook joins each order's product ids into a string, re-tokenizes it
+# with CountVectorizer, and runs TruncatedSVD and MiniBatchKMeans on the full
+# in-memory matrices. Here the binary order x product matrix is never held
+# whole: OrderShards spreads the order lines over shard files on disk (all
+# lines of a user, or of an order, in the same shard) and turns every shard
+# into one CSR block of about chunk_orders orders, sorted by order id.
+# Everything downstream loads one block at a time:
+#   - SVD: a randomized range finder with power iterations on X^T X, where
+#     every product X^T (X Q) is accumulated block by block, followed by a
+#     Rayleigh-Ritz step on the small (k + p) x (k + p) matrix;
+#   - KMeans: MiniBatchKMeans.partial_fit over shuffled batches of each
+#     block's projection, for a few epochs;
+#   - labels: one predict per block.
+# Memory is one block plus O(products x n_components) and the per-order
+# labels, instead of the whole matrix and the dense n_orders x n_components
+# projection.
+# The same SVD over every order gives the product embeddings: each
+# product's row of the right singular vectors, scaled by the singular values.
+
+
+class OrderShards:
+    """The binary orders x products matrix as row blocks of complete orders on disk.
+
+    append() adds order lines, in history order, to the file of shard
+    `group % n_shards`, where the group is the user when a (user, product)
+    only counts at its first purchase, or else the order. build() then
+    deduplicates every shard, drops products in fewer than min_df orders
+    and saves each shard as a CSR block. Blocks are indexed like a list and
+    loaded on access.
+    """
+
+    def __init__(self, path, n_shards):
+        self.path = path
+        self.n_shards = max(1, n_shards)
+        self.sizes = []  # orders per block
+        self.vocabulary = None  # product id of each column
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, shard, kind):
+        return os.path.join(self.path, f"shard-{shard:05d}.{kind}")
+
+    def append(self, order_ids, product_ids, groups):
+        groups = np.asarray(groups, dtype=np.int64)
+        lines = np.stack([order_ids, product_ids, groups], axis=1).astype(np.int32)
+        shards = groups % self.n_shards
+        order = np.argsort(shards, kind="stable")
+        bounds = np.searchsorted(shards[order], np.arange(self.n_shards + 1))
+        for shard in np.flatnonzero(np.diff(bounds)).tolist():
+            with open(self._file(shard, "bin"), "ab") as f:
+                lines[order[bounds[shard]:bounds[shard + 1]]].tofile(f)
+
+    def _pairs(self, shard):
+        """Sorted order << 32 | product keys of a shard: the first line of every
+        (group, product), then every distinct (order, product)."""
+        path = self._file(shard, "bin")
+        if not os.path.exists(path):
+            return np.zeros(0, dtype=np.int64)
+        lines = np.fromfile(path, dtype=np.int32).reshape(-1, 3).astype(np.int64)
+        _, first = np.unique((lines[:, 2] << 32) | lines[:, 1], return_index=True)
+        lines = lines[first]
+        return np.unique((lines[:, 0] << 32) | lines[:, 1])
+
+    def build(self, min_df=1):
+        # Document frequency on distinct (order, product) pairs, like CountVectorizer(binary=True)
+        df = np.zeros(0, dtype=np.int64)
+        for shard in range(self.n_shards):
+            pairs = self._pairs(shard)
+            np.save(self._file(shard, "npy"), pairs)
+            counts = np.bincount(pairs & 0xFFFFFFFF)
+            df = np.pad(df, (0, max(0, len(counts) - len(df))))
+            df[:len(counts)] += counts
+            if os.path.exists(self._file(shard, "bin")):
+                os.remove(self._file(shard, "bin"))
+
+        keep = df >= max(min_df, 1)
+        self.vocabulary = np.flatnonzero(keep)
+        columns = np.full(len(df), -1, dtype=np.int64)
+        columns[keep] = np.arange(keep.sum())
+        for shard in range(self.n_shards):
+            pairs = np.load(self._file(shard, "npy"))
+            os.remove(self._file(shard, "npy"))
+            orders, rows = np.unique(pairs >> 32, return_inverse=True)
+            cols = columns[pairs & 0xFFFFFFFF]
+            used = cols >= 0
+            X = sparse.csr_matrix(
+                (np.ones(used.sum(), dtype=np.float32), (rows[used], cols[used])),
+                shape=(len(orders), len(self.vocabulary)),
+            )
+            np.save(self._file(shard, "orders.npy"), orders)
+            sparse.save_npz(self._file(shard, "npz"), X, compressed=False)
+            self.sizes.append(len(orders))
+        return self
+
+    @property
+    def shape(self):
+        return sum(self.sizes), len(self.vocabulary)
+
+    def __len__(self):
+        return self.n_shards
+
+    def __getitem__(self, shard):
+        return sparse.load_npz(self._file(shard, "npz"))
+
+    def order_ids(self):
+        """Order id of every row, block after block (every order, including
+        those left without a column)."""
+        return np.concatenate([np.load(self._file(shard, "orders.npy")) for shard in range(self.n_shards)])
+
+
+def gram_product(blocks, M):
+    """X^T (X M), accumulated over the row blocks of X."""
+    out = np.zeros((blocks.shape[1], M.shape[1]))
+    for i in range(len(blocks)):
+        Xc = blocks[i]
+        out += Xc.T @ (Xc @ M)
+    return out
+
+
+def streaming_svd(blocks, n_components, n_iter=5, n_oversamples=10, seed=0):
+    """Top right singular vectors (products x k) and singular values of the
+    matrix split into row blocks, in passes over the blocks."""
+    n_products = blocks.shape[1]
+    n_components = min(n_components, n_products)
+    width = min(n_components + n_oversamples, n_products)
+    rng = np.random.default_rng(seed)
+
+    Q, _ = np.linalg.qr(gram_product(blocks, rng.standard_normal((n_products, width))))
+    for _ in range(n_iter):
+        Q, _ = np.linalg.qr(gram_product(blocks, Q))
+
+    # Rayleigh-Ritz: eigenvectors of (XQ)^T (XQ) rotate Q onto the singular vectors
+    small = np.zeros((width, width))
+    for i in range(len(blocks)):
+        P = blocks[i] @ Q
+        small += P.T @ P
+    eigenvalues, eigenvectors = np.linalg.eigh(small)
+    top = np.argsort(eigenvalues)[::-1][:n_components]
+    return Q @ eigenvectors[:, top], np.sqrt(np.clip(eigenvalues[top], 0, None))
+
+
+def product_vectors(components, singular_values):
+    """Unit-length product embeddings (rows of V * s), so a dot product is the cosine."""
+    vectors = (components * singular_values).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def fit_kmeans(blocks, components, K, batch_size, epochs=5, seed=0):
+    """MiniBatchKMeans fitted with partial_fit on the block-wise projections X @ components."""
+    from sklearn.cluster import MiniBatchKMeans
+
+    kmeans = MiniBatchKMeans(n_clusters=K, batch_size=batch_size, random_state=seed, n_init="auto")
+    components = components.astype(np.float32)
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        for i in rng.permutation(len(blocks)):
+            projected = blocks[i] @ components
+            order = rng.permutation(len(projected))
+            for b in range(0, len(order), batch_size):
+                batch = projected[order[b:b + batch_size]]
+                # The first call initializes the centers and needs at least K rows
+                if len(batch) >= K or hasattr(kmeans, "cluster_centers_"):
+                    kmeans.partial_fit(batch)
+    return kmeans
+
+
+def assign_segments(blocks, components, centers):
+    """Nearest center of every row's projection, one block at a time."""
+    components = components.astype(np.float32)
+    centers = np.asarray(centers, dtype=np.float32)
+    center_norms = (centers ** 2).sum(axis=1)
+    labels = []
+    for i in range(len(blocks)):
+        projected = blocks[i] @ components
+        # argmin ||p - c||^2 = argmin (||c||^2 - 2 p.c)
+        labels.append(np.argmin(center_norms - 2 * projected @ centers.T, axis=1).astype(np.int8))
+    return np.concatenate(labels)
+
+
+def segment_orders(shards, n_components, K, batch_size, epochs=5, seed=0):
+    """Segment label per order (sorted by order id), plus the fitted vocabulary, components and centers."""
+    components, _ = streaming_svd(shards, n_components, seed=seed)
+    kmeans = fit_kmeans(shards, components, K, batch_size, epochs, seed)
+    labels = assign_segments(shards, components, kmeans.cluster_centers_)
+    order_ids = shards.order_ids()
+    order = np.argsort(order_ids, kind="stable")
+    return {
+        "order_ids": order_ids[order],
+        "labels": labels[order],
+        "vocabulary": shards.vocabulary,
+        "components": components,
+        "centers": kmeans.cluster_centers_,
+    }
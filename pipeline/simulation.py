@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from core.simulation import DEFAULT_MARGIN, MARGIN_MAP, Simulator
+
+# Inputs and batch outputs of the scenario simulation (engine: core.simulation).
+# simulation_counts collapses the prior order lines to one row per
+# (segment, product); whether a line belongs to a bundle is decided per
+# order with one sparse product X @ R, where X is the order x product matrix
+# and R maps each bundle's base product to its recommended product.
+
+
+def bundled_lines(order_ids, product_ids, pairs):
+    """Mask of the order lines whose product is recommended for a base product in the same order."""
+    orders, order_codes = np.unique(np.asarray(order_ids), return_inverse=True)
+    items, item_codes = np.unique(np.asarray(product_ids), return_inverse=True)
+    X = sparse.csr_matrix(
+        (np.ones(len(order_codes)), (order_codes, item_codes)), shape=(len(orders), len(items))
+    )
+
+    def positions(ids):
+        pos = np.minimum(np.searchsorted(items, ids), len(items) - 1)
+        return pos, items[pos] == ids
+
+    base, base_known = positions(pairs["product_id"].to_numpy())
+    rec, rec_known = positions(pairs["recommended_product_id"].to_numpy())
+    known = base_known & rec_known
+    R = sparse.csr_matrix(
+        (np.ones(known.sum()), (base[known], rec[known])), shape=(len(items), len(items))
+    )
+
+    hits = (X @ R).multiply(X).tocoo()
+    hit = hits.data > 0
+    hit_keys = (hits.row[hit].astype(np.int64) << 32) | hits.col[hit]
+    return np.isin((order_codes.astype(np.int64) << 32) | item_codes, hit_keys)
+
+
+def simulation_counts(order_ids, product_ids, line_segments, products, pairs):
+    """One row per (segment, product): department, price, units and bundled units."""
+    lines = pd.DataFrame({
+        "segment": np.asarray(line_segments, dtype=np.int8),
+        "product_id": np.asarray(product_ids),
+        "bundled": bundled_lines(order_ids, product_ids, pairs),
+    })
+    counts = (
+        lines.groupby(["segment", "product_id"], sort=True)
+        .agg(units=("bundled", "size"), bundle_units=("bundled", "sum"))
+        .reset_index()
+    )
+    info = products.set_index("product_id")
+    counts["department"] = info["department"].reindex(counts["product_id"]).astype(str).to_numpy()
+    counts["price"] = info["synthetic_price"].reindex(counts["product_id"]).to_numpy()
+    counts = counts[counts["price"].notna()]
+    return counts[["segment", "product_id", "department", "price", "units", "bundle_units"]].reset_index(drop=True)
+
+
+def write_scenarios(counts, customers, scenarios, out_dir):
+    """dept_revenue.csv and user_segment_report.csv per scenario, plus summary.csv.
+    Each scenario's name is its directory under out_dir, so it must be a plain
+    file name, unique even on a case-insensitive file system."""
+    seen = set()
+    for sc in scenarios:
+        name = sc["name"]
+        if (not isinstance(name, str) or name in ("", ".", "..") or ".." in name
+                or "/" in name or "\\" in name or os.path.splitdrive(name)[0]):
+            raise ValueError(f"scenario name {name!r} is not a plain directory name")
+        if name.casefold() in seen:
+            raise ValueError(f"duplicate scenario name {name!r}")
+        seen.add(name.casefold())
+    simulator = Simulator(counts, MARGIN_MAP, DEFAULT_MARGIN, customers)
+    reports, summary = simulator.reports(scenarios)
+    written = []
+    for name, (dept, seg) in reports.items():
+        scenario_dir = os.path.join(out_dir, name)
+        os.makedirs(scenario_dir, exist_ok=True)
+        dept.to_csv(os.path.join(scenario_dir, "dept_revenue.csv"), index=False)
+        seg.to_csv(os.path.join(scenario_dir, "user_segment_report.csv"), index=False)
+        written += [os.path.join(name, "dept_revenue.csv"), os.path.join(name, "user_segment_report.csv")]
+    summary.to_csv(os.path.join(out_dir, "summary.csv"), index=False)
+    return written + ["summary.csv"]
@@ -0,0 +1,578 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from core.catalog import ProductCatalog, build_catalog
+from core.cube import CUBE_FILE, build_cube, save_cube
+from core.data_store import build_artifacts
+from core.neighbors import embeddings_path, write_embeddings
+from core.segments import MODEL_FILE, save_model
+from pipeline.bestsellers import ALL_TIME, BestsellerCounts, line_slices, slice_labels
+from pipeline.config import (
+    CLUSTER_NAMES,
+    DEFAULT_PRICING,
+    DEPT_PRICING,
+    MAX_PRICE,
+    MIN_PRICE,
+    RAW_FILES,
+)
+from pipeline.mining import TopBundles, mine_bundles, mine_rules, mine_rules_mlxtend
+from pipeline.parallel import mine_rules_parallel
+from pipeline.segmentation import OrderShards, product_vectors, segment_orders, streaming_svd
+from pipeline.simulation import simulation_counts
+from pipeline.star import Dimension, Star
+
+# Pipeline stages: load -> merge -> mine / segment / embed -> aggregate -> export.
+# Every stage takes the build parameters and a dict of upstream StageOutput
+# handles, reads only the columns it needs from them, and returns a dict of
+# named outputs for the stage cache.
+
+BESTSELLER_CHUNK = 1_000_000  # fact rows per chunk of the bestseller pass
+SHARD_CHUNK = 1_000_000       # fact rows per chunk of the order sharding pass
+
+
+# ---------------------------------------------------------------- load
+
+
+def load(params, inputs, raw_dir):
+    """Read the raw Instacart files with compact dtypes and only the used columns."""
+    outputs = {}
+    for name, (file_name, dtypes) in RAW_FILES.items():
+        outputs[name] = pd.read_csv(
+            os.path.join(raw_dir, file_name),
+            usecols=list(dtypes),
+            dtype=dtypes,
+        )
+    return outputs
+
+
+# ---------------------------------------------------------------- merge
+
+
+def merge(params, inputs):
+    """Ordered products as a fact table of integer codes, plus the order and
+    product dimensions it is joined with on demand (see joined())."""
+    raw = inputs["load"]
+    products = Star(
+        {name: values.to_numpy() for name, values in raw.frame("products").items()},
+        {
+            "aisle_id": Dimension(raw.frame("aisles"), "aisle_id"),
+            "department_id": Dimension(raw.frame("departments"), "department_id"),
+        },
+    ).frame(["product_id", "product_name", "aisle_id", "department_id", "aisle", "department"])
+
+    # train first, then prior, like the notebook's concat; `prior` marks the
+    # rows used by the revenue simulation
+    train, prior = raw.frame("order_products_train"), raw.frame("order_products_prior")
+    fact = pd.DataFrame({
+        "order_id": np.concatenate([train["order_id"].to_numpy(), prior["order_id"].to_numpy()]),
+        "product_id": np.concatenate([train["product_id"].to_numpy(), prior["product_id"].to_numpy()]),
+        "prior": np.repeat([False, True], [len(train), len(prior)]),
+    })
+
+    return {
+        "fact": fact,
+        "orders": raw.frame("orders"),
+        "products": products,
+        "aisles": raw.frame("aisles"),
+        "departments": raw.frame("departments"),
+    }
+
+
+def joined(merged, columns):
+    """The requested columns of every ordered product with its order, product,
+    aisle and department attributes, gathered from the merge stage's tables."""
+    fact = {
+        name: (lambda name=name: merged.frame("fact", columns=[name])[name].to_numpy())
+        for name in ("order_id", "product_id", "prior")
+    }
+    star = Star(fact, {
+        "order_id": Dimension(merged.frame("orders"), "order_id"),
+        "product_id": Dimension(merged.frame("products", columns=["product_id", "aisle_id", "department_id"]), "product_id"),
+        "aisle_id": Dimension(merged.frame("aisles"), "aisle_id"),
+        "department_id": Dimension(merged.frame("departments"), "department_id"),
+    })
+    return star.frame(columns)
+
+
+# ---------------------------------------------------------------- mine
+
+
+def selected_lines(department_ids, aisle_ids, params):
+    """Mask of the lines in the selected departments, else aisles (all lines if neither is set)."""
+    if params["list_department_id"]:
+        return np.isin(department_ids, params["list_department_id"])
+    if params["list_aisle_id"]:
+        return np.isin(aisle_ids, params["list_aisle_id"])
+    return np.ones(len(department_ids), dtype=bool)
+
+
+def select_transactions(data, params):
+    """The notebook's rule-mining input: one row per (user, product), optionally
+    restricted to the selected departments or aisles."""
+    data = data.drop_duplicates(subset=["user_id", "product_id"])
+    return data[selected_lines(data["department_id"].to_numpy(), data["aisle_id"].to_numpy(), params)]
+
+
+def sample_orders(data, params):
+    n = params["sample_orders"]
+    order_ids = data["order_id"].drop_duplicates()
+    if n and n < len(order_ids):
+        order_ids = order_ids.sample(n, random_state=params["seed"])
+        data = data[data["order_id"].isin(order_ids)]
+    return data.drop_duplicates(["order_id", "product_id"])
+
+
+def mine(params, inputs):
+    """Frequent itemsets and association rules over the selected transactions."""
+    data = joined(inputs["merge"], ["order_id", "product_id", "user_id", "aisle_id", "department_id"])
+    data_fp = sample_orders(select_transactions(data, params), params)
+    del data
+
+    args = (
+        data_fp["order_id"].to_numpy(),
+        data_fp["product_id"].to_numpy(),
+        params["support_point"],
+        params["max_len"],
+        params["min_lift"],
+    )
+    partition = params["partition"]
+    if partition == "none":
+        engine = mine_rules_mlxtend if params["engine"] == "mlxtend" else mine_rules
+        rules = engine(*args)
+    else:
+        groups = None
+        if partition != "order":
+            products = inputs["merge"].frame("products", columns=["product_id", f"{partition}_id"])
+            groups = products.set_index("product_id")[f"{partition}_id"]
+        rules = mine_rules_parallel(*args, partition=partition, groups=groups, workers=params["workers"] or None)
+    return {"rules": rules_frame(*rules), "bundles": bundles_of_three(data_fp, params)}
+
+
+def bundles_of_three(data_fp, params):
+    """Top "base + 2 add-ons" bundles per department and aisle of the base product,
+    mined at bundle_support (always with the native engine, unpartitioned)."""
+    groups = data_fp[["product_id", "department_id", "aisle_id"]].drop_duplicates("product_id").set_index("product_id")
+    groups = {"department": groups["department_id"], "aisle": groups["aisle_id"]}
+    if not params["bundle_support"]:
+        return TopBundles(groups, params["top_bundles"]).frame()
+    return mine_bundles(
+        data_fp["order_id"].to_numpy(), data_fp["product_id"].to_numpy(), params["bundle_support"],
+        groups, params["top_bundles"], size=3, min_lift=params["min_lift"],
+    )
+
+
+def rules_frame(antecedents, consequents, support, confidence, lift):
+    """Rules as list-of-product-id columns, sorted like the notebook (lift, then support)."""
+    rules = pd.DataFrame({
+        "antecedents": list(antecedents),
+        "consequents": list(consequents),
+        "support": np.asarray(support, dtype=np.float64),
+        "confidence": np.asarray(confidence, dtype=np.float64),
+        "lift": np.asarray(lift, dtype=np.float64),
+    })
+    return rules.sort_values(["lift", "support"], ascending=False, kind="stable").reset_index(drop=True)
+
+
+# ---------------------------------------------------------------- segment
+
+
+def order_shards(merged, params, path, select=True):
+    """OrderShards of the fact table, in one pass over it in chunks, with about
+    chunk_orders orders per block. With select, only the lines of
+    select_transactions: the selected departments or aisles, each (user,
+    product) at its first purchase."""
+    orders = Dimension(merged.frame("orders", columns=["order_id", "user_id"]), "order_id")
+    products = Dimension(merged.frame("products", columns=["product_id", "aisle_id", "department_id"]), "product_id")
+    shards = OrderShards(path, -(-int(orders.valid.sum()) // params["chunk_orders"]))
+    for chunk in merged.batches("fact", columns=["order_id", "product_id"], batch_size=SHARD_CHUNK):
+        order_ids, product_ids = chunk["order_id"].to_numpy(), chunk["product_id"].to_numpy()
+        if not select:
+            shards.append(order_ids, product_ids, order_ids)
+            continue
+        keep = selected_lines(
+            products.take("department_id", product_ids), products.take("aisle_id", product_ids), params
+        )
+        # Orders missing from orders.csv share one unknown user, like the NaN of a left join
+        users = np.nan_to_num(orders.take("user_id", order_ids[keep]), nan=-1)
+        shards.append(order_ids[keep], product_ids[keep], users)
+    return shards.build(params["min_df"])
+
+
+def segment(params, inputs):
+    """Order segments: binary order x product matrix -> TruncatedSVD -> MiniBatchKMeans."""
+    if params["segment_engine"] == "sklearn":
+        data = joined(inputs["merge"], ["order_id", "product_id", "user_id", "aisle_id", "department_id"])
+        data_clean = select_transactions(data, params).drop_duplicates(subset=["order_id", "product_id"])
+        del data
+        result = segment_orders_sklearn(data_clean, params)
+    else:
+        with tempfile.TemporaryDirectory() as shard_dir:
+            result = segment_orders(
+                order_shards(inputs["merge"], params, shard_dir),
+                n_components=params["n_components"],
+                K=params["K"],
+                batch_size=params["batch_size"],
+                epochs=params["kmeans_epochs"],
+                seed=params["seed"],
+            )
+
+    # The fitted model, for scoring new orders in the app (core.segments)
+    model = {name: result[name] for name in ("vocabulary", "components", "centers")}
+    model["names"] = [CLUSTER_NAMES.get(i, f"Segment {i}") for i in range(len(result["centers"]))]
+    return {
+        "order_segments": pd.DataFrame({
+            "order_id": result["order_ids"].astype(np.int64),
+            "segment": result["labels"].astype(np.int8),
+        }),
+        "model": model,
+    }
+
+
+def segment_orders_sklearn(data_clean, params):
+    """The notebook's path (product-id strings -> CountVectorizer -> in-memory SVD/KMeans), for comparison."""
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    order_docs = (
+        data_clean
+        .groupby("order_id")["product_id"]
+        .apply(lambda s: " ".join(map(str, s.values)))
+    )
+    vectorizer = CountVectorizer(token_pattern=r"\b\d+\b", binary=True, min_df=params["min_df"])
+    X = vectorizer.fit_transform(order_docs)
+
+    svd = TruncatedSVD(n_components=params["n_components"], random_state=params["seed"])
+    X_reduced = svd.fit_transform(X)
+
+    kmeans = MiniBatchKMeans(
+        n_clusters=params["K"], batch_size=params["batch_size"], random_state=params["seed"], n_init="auto"
+    )
+    return {
+        "order_ids": order_docs.index.to_numpy(),
+        "labels": kmeans.fit_predict(X_reduced),
+        "vocabulary": vectorizer.get_feature_names_out().astype(np.int64),
+        "components": svd.components_.T,
+        "centers": kmeans.cluster_centers_,
+    }
+
+
+# ---------------------------------------------------------------- embed
+
+
+def embed(params, inputs):
+    """Product embeddings: the SVD of the order x product matrix over every
+    order (no department filter), one unit-length vector per product."""
+    with tempfile.TemporaryDirectory() as shard_dir:
+        shards = order_shards(inputs["merge"], params, shard_dir, select=False)
+        components, singular_values = streaming_svd(shards, params["n_components"], seed=params["seed"])
+    vectors = product_vectors(components, singular_values)
+    return {"embeddings": {"product_ids": shards.vocabulary, "vectors": vectors}}
+
+
+# ---------------------------------------------------------------- aggregate
+
+
+def synthetic_prices(products, seed):
+    """Lognormal price per product from its department, with a +/-8% aisle factor.
+
+    Vectorized version of the notebook's per-row draw; the same seed gives
+    a deterministic price list (not bit-identical to the notebook's).
+    """
+    rng = np.random.default_rng(seed)
+    dept = products["department"].astype(str).str.strip().str.lower()
+    pricing = dept.map(DEPT_PRICING)
+    median = np.array([p[0] if isinstance(p, tuple) else DEFAULT_PRICING[0] for p in pricing])
+    sigma = np.array([p[1] if isinstance(p, tuple) else DEFAULT_PRICING[1] for p in pricing])
+    price = np.clip(rng.lognormal(mean=np.log(median), sigma=sigma), MIN_PRICE, MAX_PRICE).round(2)
+
+    aisle_codes, aisle_values = pd.factorize(products["aisle"])
+    aisle_multiplier = rng.uniform(0.92, 1.08, size=len(aisle_values))
+    factor = np.where(aisle_codes >= 0, aisle_multiplier[aisle_codes], 1.0)
+    return np.clip(price * factor, MIN_PRICE, MAX_PRICE).round(2)
+
+
+def ranked_bundles(rules, catalog, group_col, k):
+    """Top-k 1-to-1 rules per aisle or department of the base product, with product ids."""
+    single = rules[(rules["antecedents"].map(len) == 1) & (rules["consequents"].map(len) == 1)]
+    top = pd.DataFrame({
+        "product_id": single["antecedents"].map(lambda x: x[0]).astype(int).to_numpy(),
+        "recommended_product_id": single["consequents"].map(lambda x: x[0]).astype(int).to_numpy(),
+        "lift": single["lift"].to_numpy(),
+        "confidence": single["confidence"].to_numpy(),
+        "support": single["support"].to_numpy(),
+    })
+    top[group_col] = catalog.groups(top["product_id"], group_col).astype(str)
+    top["product_name_base"] = catalog.names(top["product_id"])
+    top["product_name_recommended"] = catalog.names(top["recommended_product_id"])
+    top = top.sort_values([group_col, "lift", "confidence"], ascending=[True, False, False], kind="stable")
+    return top.groupby(group_col).head(k)
+
+
+def top_bundles(rules, catalog, group_col, k):
+    """Top-k 1-to-1 rules per aisle or department, in the bundle_top10 CSV layout."""
+    top = ranked_bundles(rules, catalog, group_col, k)
+    return top[[group_col, "product_name_base", "product_name_recommended", "lift", "confidence", "support"]]
+
+
+def top_bundles3(bundles, catalog, group_col):
+    """The mined "base + 2 add-ons" bundles of one group column, in the bundle3_top10 CSV layout."""
+    rows = bundles[bundles["group"] == group_col]
+    top = pd.DataFrame({
+        group_col: catalog.groups(rows["product_id"], group_col).astype(str),
+        "product_name_base": catalog.names(rows["product_id"]),
+        "product_name_addon_1": catalog.names(rows["addon_1"]),
+        "product_name_addon_2": catalog.names(rows["addon_2"]),
+        "lift": rows["lift"].to_numpy(),
+        "confidence": rows["confidence"].to_numpy(),
+        "support": rows["support"].to_numpy(),
+    })
+    return top.sort_values([group_col, "lift", "confidence"], ascending=[True, False, False], kind="stable")
+
+
+def bestsellers(merged, orders, segment_of_user, catalog, segment_names, params):
+    """Bestseller counts of every slice (see pipeline.bestsellers), from one
+    pass over the fact table in chunks."""
+    counts = BestsellerCounts(len(slice_labels(segment_names)), catalog, params["bestseller_capacity"])
+    for chunk in merged.batches("fact", columns=["order_id", "product_id"], batch_size=BESTSELLER_CHUNK):
+        order_ids = chunk["order_id"].to_numpy()
+        users = orders.take("user_id", order_ids)
+        segments = np.where(
+            users < len(segment_of_user), segment_of_user[np.minimum(users, len(segment_of_user) - 1)], -1
+        )
+        rows, slices = line_slices(
+            orders.take("order_dow", order_ids), orders.take("order_hour_of_day", order_ids), segments
+        )
+        counts.add(chunk["product_id"].to_numpy()[rows], slices)
+    return counts
+
+
+def top_sliced(counts, catalog, group_col, k, labels):
+    """Top-k products per slice and aisle or department, with their names."""
+    id_col = f"{group_col}_id"
+    top = counts.top(group_col, k)
+    ids = top["product_id"]
+    return pd.DataFrame({
+        "slice": np.asarray(labels, dtype=object)[top["slice"].to_numpy()],
+        "product_id": ids,
+        "total_orders": top["total_orders"],
+        "error": top["error"],
+        "product_name": catalog.names(ids),
+        id_col: top[id_col],
+        group_col: catalog.groups(ids, group_col).astype(str),
+    })
+
+
+def top_products(sliced, group_col):
+    """Top-k most ordered products per aisle or department, of all time."""
+    top = sliced[sliced["slice"] == ALL_TIME]
+    return top[["product_id", "total_orders", "product_name", f"{group_col}_id", group_col]]
+
+
+def dashboard_cube(data, order_segments, departments, segment_names):
+    """Order and product counts by dow x hour x segment x department, for the dashboard."""
+    departments = departments.sort_values("department_id")
+    n_segments = len(segment_names)
+    segment = Dimension(order_segments, "order_id").take("segment", data["order_id"].to_numpy())
+    line_segments = np.nan_to_num(segment, nan=n_segments)
+    orders, lines = build_cube(
+        data["order_id"].to_numpy(),
+        data["order_dow"].to_numpy(),
+        data["order_hour_of_day"].to_numpy(),
+        line_segments,
+        np.searchsorted(departments["department_id"].to_numpy(), data["department_id"].to_numpy()),
+        n_segments,
+        len(departments),
+    )
+    return {
+        "orders": orders,
+        "lines": lines,
+        "segments": list(segment_names) + ["No segment"],
+        "departments": departments["department"].astype(str).tolist(),
+    }
+
+
+def aggregate(params, inputs):
+    """Synthetic prices, revenue reports and the app's bundle / bestseller tables."""
+    merged = inputs["merge"]
+    products = merged.frame("products")
+    products["synthetic_price"] = synthetic_prices(products, params["seed"])
+
+    data = joined(merged, ["order_id", "product_id", "prior"])
+    order_segments = inputs["segment"].frame("order_segments")
+    rules = inputs["mine"].frame("rules")
+    bundles = inputs["mine"].frame("bundles")
+    catalog = ProductCatalog.from_frame(products)
+    orders = Dimension(
+        merged.frame("orders", columns=["order_id", "user_id", "order_dow", "order_hour_of_day"]), "order_id"
+    )
+    priced = Dimension(products[["product_id", "synthetic_price", "department"]], "product_id")
+
+    # Revenue simulation over prior orders
+    prior = data[data["prior"]]
+    prior_orders = prior["order_id"].to_numpy()
+    prior_price = priced.take("synthetic_price", prior["product_id"].to_numpy())
+
+    # Segmented orders with their user and revenue, by dense order id
+    per_order = pd.Series(prior_price).groupby(prior_orders).sum()
+    order_revenue = np.zeros(orders.size)
+    order_revenue[per_order.index.to_numpy()] = per_order.to_numpy()
+    segment_orders_ids = order_segments["order_id"].to_numpy()
+    orders_with_seg = pd.DataFrame({
+        "order_id": segment_orders_ids,
+        "user_id": orders.take("user_id", segment_orders_ids),
+        "segment": order_segments["segment"].to_numpy(),
+        "order_revenue": order_revenue[segment_orders_ids],
+    })
+    user_segment_report = segment_report(orders_with_seg)
+
+    # Prior lines by the segment of their customer (-1 outside the segmented orders)
+    user_segment = user_segments(orders_with_seg)
+    segment_of_user = np.full(int(user_segment.index.to_numpy().max(initial=0)) + 1, -1, dtype=np.int64)
+    segment_of_user[user_segment.index.to_numpy()] = user_segment.to_numpy()
+    segmented = np.zeros(orders.size, dtype=bool)
+    segmented[segment_orders_ids] = True
+    prior_users = orders.take("user_id", prior_orders)
+    line_segments = np.where(
+        segmented[prior_orders] & (prior_users < len(segment_of_user)),
+        segment_of_user[np.minimum(prior_users, len(segment_of_user) - 1)], -1,
+    )
+    bundle_pairs = pd.concat([
+        ranked_bundles(rules, catalog, group_col, params["top_bundles"])[["product_id", "recommended_product_id"]]
+        for group_col in ("department", "aisle")
+    ]).drop_duplicates()
+    counts = simulation_counts(
+        prior["order_id"].to_numpy(), prior["product_id"].to_numpy(), line_segments, products, bundle_pairs
+    )
+
+    prior_department = priced.take("department", prior["product_id"].to_numpy())
+    dept_revenue = (
+        pd.Series(prior_price).groupby(prior_department, observed=True).sum()
+        .rename_axis("department").reset_index(name="department_revenue")
+    )
+    dept_revenue["department"] = dept_revenue["department"].astype(str)
+    dept_revenue["department_revenue"] = dept_revenue["department_revenue"].round(2)
+    dept_revenue["revenue_share"] = dept_revenue["department_revenue"] / dept_revenue["department_revenue"].sum()
+
+    # Bestsellers by time window and customer segment, after dropping the prior lines
+    del data, prior, prior_orders, prior_price, prior_users, line_segments, prior_department
+    segment_names = inputs["segment"].object("model")["names"]
+    sales = bestsellers(merged, orders, segment_of_user, catalog, segment_names, params)
+    sliced = {
+        group_col: top_sliced(sales, catalog, group_col, params["top_products"], slice_labels(segment_names))
+        for group_col in ("department", "aisle")
+    }
+    del sales
+
+    cube = dashboard_cube(
+        joined(merged, ["order_id", "order_dow", "order_hour_of_day", "department_id"]),
+        order_segments, merged.frame("departments"), segment_names,
+    )
+    return {
+        "dashboard_cube": cube,
+        "products_priced": products[["product_id", "synthetic_price"]],
+        "user_segment_report": user_segment_report,
+        "dept_revenue": dept_revenue,
+        "simulation_counts": counts,
+        "bundle_top10_by_department": top_bundles(rules, catalog, "department", params["top_bundles"]),
+        "bundle_top10_by_aisle": top_bundles(rules, catalog, "aisle", params["top_bundles"]),
+        "bundle3_top10_by_department": top_bundles3(bundles, catalog, "department"),
+        "bundle3_top10_by_aisle": top_bundles3(bundles, catalog, "aisle"),
+        "top5_selling_by_department": top_products(sliced["department"], "department"),
+        "top5_selling_by_aisle": top_products(sliced["aisle"], "aisle"),
+        "top5_sliced_by_department": sliced["department"],
+        "top5_sliced_by_aisle": sliced["aisle"],
+    }
+
+
+def user_segments(orders_with_seg):
+    """Each user's most frequent order segment, as a Series indexed by user_id."""
+    return (
+        orders_with_seg.groupby(["user_id", "segment"]).size().reset_index(name="n_orders")
+        .sort_values(["user_id", "n_orders"], ascending=[True, False], kind="stable")
+        .drop_duplicates("user_id")
+        .set_index("user_id")["segment"]
+    )
+
+
+def segment_report(orders_with_seg):
+    """Per-segment revenue, with each user assigned to their most frequent segment."""
+    customer_revenue = (
+        orders_with_seg.groupby("user_id")["order_revenue"].sum()
+        .reset_index(name="total_customer_revenue")
+    )
+    user_segment = user_segments(orders_with_seg).reset_index()
+    financials = customer_revenue.merge(user_segment, on="user_id", how="left")
+    report = (
+        financials.groupby("segment")
+        .agg(
+            total_revenue=("total_customer_revenue", "sum"),
+            avg_customer_value=("total_customer_revenue", "mean"),
+            customers=("user_id", "count"),
+        )
+        .reset_index()
+    )
+    report["revenue_share"] = report["total_revenue"] / report["total_revenue"].sum()
+    return report
+
+
+# ---------------------------------------------------------------- export
+
+
+def format_rules(rules, catalog):
+    """fpg_rules.csv layout: stringified frozensets plus product names."""
+    def itemset(ids):
+        return "frozenset({" + ", ".join(f"'{i}'" for i in ids) + "})"
+
+    def names(ids):
+        return str(catalog.names(ids, "UNKNOWN_PRODUCT"))
+
+    return pd.DataFrame({
+        "antecedents": rules["antecedents"].map(itemset),
+        "Source_of_antecedents": rules["antecedents"].map(names),
+        "consequents": rules["consequents"].map(itemset),
+        "Source_of_consequents": rules["consequents"].map(names),
+        "support": rules["support"],
+        "confidence": rules["confidence"],
+        "lift": rules["lift"],
+    })
+
+
+def export(params, inputs, out_dir):
+    """Write the app's CSV files and their columnar artifacts to out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    merged, aggregated = inputs["merge"], inputs["aggregate"]
+    products = merged.frame("products")
+
+    tables = {
+        "fpg_rules.csv": format_rules(inputs["mine"].frame("rules"), ProductCatalog.from_frame(products)),
+        "order_segments.csv": inputs["segment"].frame("order_segments"),
+        "aisles.csv": merged.frame("aisles"),
+        "departments.csv": merged.frame("departments"),
+        "products.csv": products[["product_id", "product_name", "aisle_id", "department_id"]],
+    }
+    for name in (
+        "user_segment_report", "dept_revenue", "simulation_counts",
+        "bundle_top10_by_department", "bundle_top10_by_aisle",
+        "bundle3_top10_by_department", "bundle3_top10_by_aisle",
+        "top5_selling_by_department", "top5_selling_by_aisle",
+        "top5_sliced_by_department", "top5_sliced_by_aisle",
+    ):
+        tables[f"{name}.csv"] = aggregated.frame(name)
+
+    for file_name, df in tables.items():
+        # Written in row chunks so the order-level tables never build one huge string
+        df.to_csv(os.path.join(out_dir, file_name), index=False, chunksize=500_000)
+
+    save_model(os.path.join(out_dir, MODEL_FILE), **inputs["segment"].object("model"))
+    save_cube(os.path.join(out_dir, CUBE_FILE), **aggregated.object("dashboard_cube"))
+    write_embeddings(embeddings_path(out_dir), **inputs["embed"].object("embeddings"))
+
+    # Columnar, memory-mappable copies of the tables the app reads
+    artifacts = [os.path.join("artifacts", name, "meta.json") for name in build_artifacts(out_dir)]
+    artifacts.append(os.path.relpath(os.path.join(build_catalog(out_dir), "meta.json"), out_dir))
+    artifacts.append(os.path.relpath(os.path.join(embeddings_path(out_dir), "meta.json"), out_dir))
+    return {"files": sorted(tables) + [MODEL_FILE, CUBE_FILE] + artifacts}
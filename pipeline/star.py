@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# Star-schema joins by array gathers.
+# The merge stage keeps the ordered products as a fact table of integer
+# codes only (order_id, product_id, prior). Orders, products, aisles and
+# departments all have dense integer keys, so each is stored as arrays
+# indexed directly by its key, and an attribute for every fact row is one
+# np.take of the key column: no hash join, no copy of the other columns.
+# Attributes are gathered on demand, only the ones a stage asks for, and
+# string attributes come back as categoricals (the codes are gathered, the
+# categories are shared). A key missing from its dimension gives NaN, like
+# a left merge.
+
+
+class Dimension:
+    """A table with a dense integer key, as attribute arrays indexed by key."""
+
+    def __init__(self, frame, key):
+        keys = frame[key].to_numpy(dtype=np.int64)
+        self.key = key
+        self.size = int(keys.max()) + 1 if len(keys) else 0
+        self.valid = np.zeros(self.size, dtype=bool)
+        self.valid[keys] = True
+        self.columns = {}  # name -> array, or (codes, categories) for strings
+        for name in frame.columns:
+            if name == key:
+                continue
+            values = frame[name]
+            if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object:
+                cat = values.astype("category").cat
+                codes = np.full(self.size, -1, dtype=cat.codes.dtype)
+                codes[keys] = cat.codes.to_numpy()
+                self.columns[name] = (codes, cat.categories)
+            else:
+                column = np.zeros(self.size, dtype=values.dtype)
+                column[keys] = values.to_numpy()
+                self.columns[name] = column
+
+    def take(self, name, keys):
+        """Attribute `name` of every key in the integer array `keys`."""
+        keys = np.asarray(keys)
+        in_range = (keys >= 0) & (keys < self.size)
+        found = in_range.all() and self.valid[keys].all()
+        if not found:
+            missing = ~in_range
+            missing[in_range] = ~self.valid[keys[in_range]]
+            keys = np.where(missing, 0, keys)
+
+        column = self.columns[name]
+        if isinstance(column, tuple):
+            codes = column[0][keys] if found else np.where(missing, -1, column[0][keys])
+            return pd.Categorical.from_codes(codes, categories=column[1], validate=False)
+        values = column[keys]
+        if not found:
+            values = np.where(missing, np.nan, values.astype(np.float64))
+        return values
+
+
+class Star:
+    """Fact columns plus the dimensions their keys point into.
+
+    fact maps each fact column to its array, or to a function returning it
+    (called once, on first use); dimensions maps a key column of the fact
+    table or of another dimension (e.g. aisle_id of products) to the
+    Dimension it indexes.
+    """
+
+    def __init__(self, fact, dimensions):
+        self.fact = dict(fact)
+        self.dimensions = dimensions
+
+    def column(self, name):
+        if name in self.fact:
+            if callable(self.fact[name]):
+                self.fact[name] = self.fact[name]()
+            return self.fact[name]
+        for key, dimension in self.dimensions.items():
+            if name in dimension.columns:
+                return dimension.take(name, self.column(key))
+        raise KeyError(name)
+
+    def frame(self, columns):
+        """DataFrame of the requested fact and dimension columns, one row per fact row."""
+        return pd.DataFrame({name: self.column(name) for name in columns}, copy=False)
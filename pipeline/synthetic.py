@@ -0,0 +1,189 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Synthetic raw files in the Instacart layout, for benchmarks and scale tests
+# of the pipeline without the real data.
+#
+# The catalog (products, aisles, departments) is copied from data/, or made
+# up with --products. Orders are generated per block of users and appended
+# to the CSV files, so memory stays at one block whatever the scale; every
+# block has its own random stream, so a (seed, chunk_users) pair always
+# writes the same files. Shapes follow the notebook's EDA:
+#   - product popularity is a Zipf law over a shuffled catalog,
+#   - order_dow and order_hour_of_day follow the weekly and daily profiles
+#     below (weekend peak, late-morning to afternoon peak),
+#   - users place 4-100 orders (geometric), the last one in `train`,
+#   - basket sizes are negative binomial around `mean_basket` items,
+#   - each user has a set of staple products that make up about
+#     `reorder_rate` of their later baskets, so `reordered` comes out
+#     naturally,
+#   - every product has a fixed companion product that joins it in a basket
+#     with probability `pair_rate`, which gives the rule miner real pairs.
+
+DOW_WEIGHTS = [0.19, 0.17, 0.13, 0.12, 0.12, 0.13, 0.14]  # Sun..Sat
+HOUR_WEIGHTS = [
+    0.7, 0.4, 0.2, 0.2, 0.2, 0.3, 0.9, 2.8, 5.3, 7.6, 8.5, 8.5,
+    8.2, 8.1, 8.3, 8.2, 7.9, 6.7, 5.2, 3.9, 3.0, 2.4, 1.9, 1.3,
+]
+MIN_ORDERS, MAX_ORDERS = 4, 100
+MAX_BASKET = 145
+
+
+def load_catalog(data_dir="data"):
+    """(products, aisles, departments) frames of the raw files."""
+    products = pd.read_csv(os.path.join(data_dir, "products.csv"))
+    aisles = pd.read_csv(os.path.join(data_dir, "aisles.csv"))
+    # departments.csv in data/ carries the notebook's side-by-side preview columns
+    departments = pd.read_csv(os.path.join(data_dir, "departments.csv"), usecols=["department_id", "department"])
+    departments = departments.dropna().astype({"department_id": "int64"})
+    return products, aisles, departments
+
+
+def make_catalog(n_products, seed=0, n_aisles=134, n_departments=21):
+    """A made-up catalog of n_products products over Instacart's aisle and department counts."""
+    rng = np.random.default_rng([seed, 1])
+    departments = pd.DataFrame({
+        "department_id": np.arange(1, n_departments + 1),
+        "department": [f"department {i}" for i in range(1, n_departments + 1)],
+    })
+    aisle_department = rng.integers(1, n_departments + 1, n_aisles)
+    aisles = pd.DataFrame({"aisle_id": np.arange(1, n_aisles + 1), "aisle": [f"aisle {i}" for i in range(1, n_aisles + 1)]})
+    aisle_id = rng.integers(1, n_aisles + 1, n_products)
+    products = pd.DataFrame({
+        "product_id": np.arange(1, n_products + 1),
+        "product_name": [f"Product {i}" for i in range(1, n_products + 1)],
+        "aisle_id": aisle_id,
+        "department_id": aisle_department[aisle_id - 1],
+    })
+    return products, aisles, departments
+
+
+def orders_per_user(n_orders, seed, mean_orders):
+    """Order count of every user, summing to exactly n_orders."""
+    rng = np.random.default_rng([seed, 0])
+    p = 1 / max(mean_orders - MIN_ORDERS + 1, 1)
+    counts = np.minimum(MIN_ORDERS - 1 + rng.geometric(p, n_orders // MIN_ORDERS + 1), MAX_ORDERS)
+    total = np.cumsum(counts)
+    n_users = int(np.searchsorted(total, n_orders)) + 1
+    counts = counts[:n_users]
+    counts[-1] -= total[n_users - 1] - n_orders
+    return counts
+
+
+def order_id_map(n_orders, seed):
+    """A bijection of 0..n-1 onto order ids 1..n that looks shuffled (i * a + b mod n)."""
+    rng = np.random.default_rng([seed, 2])
+    a = int(rng.integers(n_orders // 3, n_orders)) if n_orders > 3 else 1
+    while np.gcd(a, n_orders) != 1:
+        a += 1
+    b = int(rng.integers(n_orders))
+    return lambda i: (np.asarray(i, dtype=np.int64) * a + b) % n_orders + 1
+
+
+def generate_block(rng, counts, first_user, first_order, popularity, companion, mean_basket, reorder_rate,
+                   n_staples, pair_rate):
+    """(orders, order_products) of one block of users; product ids are popularity ranks."""
+    n_users, n_orders = len(counts), int(counts.sum())
+    user_id = np.repeat(np.arange(first_user, first_user + n_users), counts)
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    order_number = np.arange(n_orders) - np.repeat(starts, counts) + 1
+    first = order_number == 1
+
+    weekly = rng.random(n_orders) < 0.25
+    days = np.where(weekly, 7, np.minimum(rng.geometric(0.09, n_orders), 30)).astype(float)
+    days[first] = np.nan
+    orders = pd.DataFrame({
+        "order_index": np.arange(first_order, first_order + n_orders),
+        "user_id": user_id,
+        "eval_set": np.where(np.r_[order_number[1:] == 1, True], "train", "prior"),
+        "order_number": order_number,
+        "order_dow": rng.choice(7, n_orders, p=np.asarray(DOW_WEIGHTS) / sum(DOW_WEIGHTS)),
+        "order_hour_of_day": rng.choice(24, n_orders, p=np.asarray(HOUR_WEIGHTS) / sum(HOUR_WEIGHTS)),
+        "days_since_prior_order": days,
+    })
+
+    # Basket sizes: negative binomial with dispersion 2, at least one item
+    sizes = np.clip(rng.negative_binomial(2, 2 / (2 + mean_basket - 1), n_orders) + 1, 1, MAX_BASKET)
+    line_order = np.repeat(np.arange(n_orders), sizes)
+    line_user = user_id[line_order] - first_user
+
+    # Each item is one of the user's staples (later orders only) or a fresh popularity draw
+    staples = rng.choice(len(popularity), (n_users, n_staples), p=popularity)
+    from_staples = (rng.random(len(line_order)) < reorder_rate) & ~first[line_order]
+    product = rng.choice(len(popularity), len(line_order), p=popularity)
+    pick = rng.integers(0, n_staples, from_staples.sum())
+    product[from_staples] = staples[line_user[from_staples], pick]
+    paired = rng.random(len(line_order)) < pair_rate
+    line_order = np.r_[line_order, line_order[paired]]
+    product = np.r_[product, companion[product[paired]]]
+
+    lines = pd.DataFrame({"order": line_order, "product": product}).drop_duplicates()
+    lines["add_to_cart_order"] = lines.groupby("order").cumcount() + 1
+    # reordered: the user bought the product in an earlier order
+    by_user = pd.DataFrame({
+        "user": user_id[lines["order"].to_numpy()], "product": lines["product"].to_numpy(),
+        "order": lines["order"].to_numpy(),
+    }).sort_values(["user", "product", "order"], kind="stable")
+    reordered = np.empty(len(lines), dtype=np.int8)
+    reordered[by_user.index.to_numpy()] = by_user.duplicated(["user", "product"]).to_numpy()
+    lines["reordered"] = reordered
+    return orders, lines
+
+
+def generate(out_dir, n_orders, seed=0, data_dir="data", n_products=None, chunk_users=10_000,
+             mean_orders=16, mean_basket=11, reorder_rate=0.75, n_staples=20, pair_rate=0.1, zipf=0.8,
+             log=None):
+    """Write the six raw CSV files for n_orders synthetic orders to out_dir.
+
+    Returns (orders, order_products rows) written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if n_products:
+        products, aisles, departments = make_catalog(n_products, seed)
+    else:
+        products, aisles, departments = load_catalog(data_dir)
+    products.to_csv(os.path.join(out_dir, "products.csv"), index=False)
+    aisles.to_csv(os.path.join(out_dir, "aisles.csv"), index=False)
+    departments.to_csv(os.path.join(out_dir, "departments.csv"), index=False)
+
+    # Popularity rank -> product id, over a seeded shuffle of the catalog
+    catalog_rng = np.random.default_rng([seed, 3])
+    ranked_ids = products["product_id"].to_numpy()[catalog_rng.permutation(len(products))]
+    popularity = 1 / np.arange(1, len(products) + 1) ** zipf
+    popularity /= popularity.sum()
+    companion = catalog_rng.choice(len(products), len(products), p=popularity)
+
+    counts = orders_per_user(n_orders, seed, mean_orders)
+    order_id = order_id_map(n_orders, seed)
+    paths = {name: os.path.join(out_dir, f"{name}.csv")
+             for name in ("orders", "order_products__prior", "order_products__train")}
+    n_lines, first_order = 0, 0
+    for block, first_user in enumerate(range(0, len(counts), chunk_users)):
+        rng = np.random.default_rng([seed, 4, block])
+        block_counts = counts[first_user:first_user + chunk_users]
+        orders, lines = generate_block(
+            rng, block_counts, first_user + 1, first_order, popularity, companion, mean_basket, reorder_rate,
+            n_staples, pair_rate,
+        )
+        first_order += len(orders)
+
+        ids = order_id(orders["order_index"].to_numpy())
+        orders.insert(0, "order_id", ids)
+        in_train = (orders["eval_set"].to_numpy() == "train")[lines["order"].to_numpy()]
+        lines = pd.DataFrame({
+            "order_id": ids[lines["order"].to_numpy()],
+            "product_id": ranked_ids[lines["product"].to_numpy()],
+            "add_to_cart_order": lines["add_to_cart_order"].to_numpy(),
+            "reordered": lines["reordered"].to_numpy(),
+        })
+
+        mode, header = ("w", True) if block == 0 else ("a", False)
+        orders.drop(columns="order_index").to_csv(paths["orders"], mode=mode, header=header, index=False)
+        lines[~in_train].to_csv(paths["order_products__prior"], mode=mode, header=header, index=False)
+        lines[in_train].to_csv(paths["order_products__train"], mode=mode, header=header, index=False)
+        n_lines += len(lines)
+        if log:
+            log(f"{first_order:,} / {n_orders:,} orders, {n_lines:,} rows")
+    return n_orders, n_lines
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from core import data_store
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    # DATA_DIR is relative, so the tables are read from tmp_path/data
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(data_store.DATA_DIR)
+    data_store.clear()
+    yield data_store.DATA_DIR
+    data_store.clear()
+
+
+def write_aisles(data_dir, rows):
+    path = os.path.join(data_dir, "aisles.csv")
+    with open(path, "w") as f:
+        f.write("aisle_id,aisle\n" + "".join(f"{i},{name}\n" for i, name in rows))
+    return path
+
+
+def test_edited_csv_replaces_older_artifact(data_dir):
+    write_aisles(data_dir, [(1, "fresh fruits")])
+    data_store.build_artifacts(data_dir)
+    meta = os.path.join(data_store.artifact_path("aisles", data_dir), "meta.json")
+    assert data_store._source("aisles")[0] == meta
+    assert list(data_store.get_table("aisles")["aisle"]) == ["fresh fruits"]
+
+    path = write_aisles(data_dir, [(1, "fresh fruits"), (2, "fresh herbs")])
+    mtime = os.stat(meta).st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(mtime, mtime))
+    assert list(data_store.get_table("aisles")["aisle"]) == ["fresh fruits", "fresh herbs"]
+
+    # Rebuilding the artifact makes it the source again
+    data_store.build_artifacts(data_dir)
+    os.utime(meta, ns=(mtime + 1, mtime + 1))
+    assert data_store._source("aisles")[0] == meta
+    assert list(data_store.get_table("aisles")["aisle"]) == ["fresh fruits", "fresh herbs"]
+
+
+def test_missing_table_raises(data_dir):
+    with pytest.raises(FileNotFoundError):
+        data_store.get_table("aisles")
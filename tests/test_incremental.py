@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import data_store
+from pipeline.cli import main
+from pipeline.synthetic import generate
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Small synthetic raw files whose last prior orders are held back as a batch."""
+    monkeypatch.chdir(tmp_path)
+    generate("raw", 2000, seed=1, n_products=60)
+    prior = pd.read_csv(os.path.join("raw", "order_products__prior.csv"))
+    new = prior["order_id"].isin(prior["order_id"].drop_duplicates().iloc[-500:])
+    prior[~new].to_csv(os.path.join("raw", "order_products__prior.csv"), index=False)
+    prior[new].to_csv("batch.csv", index=False)
+    orders = pd.read_csv(os.path.join("raw", "orders.csv"))
+    orders[orders["order_id"].isin(prior["order_id"][new])].to_csv("batch_orders.csv", index=False)
+    os.makedirs(data_store.DATA_DIR)
+    data_store.clear()
+    yield tmp_path
+    data_store.clear()
+
+
+def incremental(command, *args, state_dir="state", out_dir=data_store.DATA_DIR):
+    if command == "init":
+        args = ("--raw-dir", "raw", *args)
+    main([command, "--state-dir", state_dir, "--out-dir", out_dir, *args])
+
+
+def test_update_write_rules_refreshes_rules_artifact(workdir):
+    incremental("init", "--write-rules", "--support-point", "0.01", "--min-lift", "1.0", "--list-department-id")
+    data_store.build_artifacts()
+    before = data_store.get_table("rules").copy()
+    assert len(before)
+
+    incremental("update", "--write-rules", "--batch", "batch.csv", "--orders", "batch_orders.csv")
+    assert data_store._source("rules")[0] == os.path.join(data_store.artifact_path("rules"), "meta.json")
+    after = data_store.get_table("rules")
+    assert not after.equals(before)
+    pd.testing.assert_frame_equal(after, data_store.load_csv("rules"), check_dtype=False, check_categorical=False)
+
+
+def test_batches_match_a_full_init(workdir):
+    params = ("--support-point", "0.005", "--min-lift", "1.0", "--list-department-id", "1", "2", "3", "4", "5")
+    incremental("init", *params)
+    batch = pd.read_csv("batch.csv")
+    # Consecutive batches: the first purchase of a (user, product) depends on the order
+    order_ids = batch["order_id"].drop_duplicates()
+    for i, chunk in enumerate(np.array_split(order_ids.to_numpy(), 5)):
+        batch[batch["order_id"].isin(chunk)].to_csv(f"batch{i}.csv", index=False)
+        incremental("update", "--batch", f"batch{i}.csv", "--orders", "batch_orders.csv")
+
+    # The same rows as one history
+    os.makedirs("full")
+    full = pd.concat([pd.read_csv(os.path.join("raw", "order_products__prior.csv")), batch])
+    full.to_csv(os.path.join("raw", "order_products__prior.csv"), index=False)
+    incremental("init", *params, state_dir="full_state", out_dir="full")
+
+    state, full_state = incremental_state("state"), incremental_state("full_state")
+    assert state["n_orders"] == full_state["n_orders"]
+    np.testing.assert_array_equal(state["frequent_keys"], full_state["frequent_keys"])
+    np.testing.assert_array_equal(state["frequent_counts"], full_state["frequent_counts"])
+    for group_col in ("department", "aisle"):
+        ranked = pd.read_csv(os.path.join(data_store.DATA_DIR, f"bundle_top10_by_{group_col}.csv"))
+        expected = pd.read_csv(os.path.join("full", f"bundle_top10_by_{group_col}.csv"))
+        key = [group_col, "product_name_base", "product_name_recommended"]
+        assert sorted(map(tuple, ranked[key].values)) == sorted(map(tuple, expected[key].values))
+
+
+def incremental_state(state_dir):
+    with np.load(os.path.join(state_dir, "counts.npz")) as f:
+        return {name: f[name] for name in ("n_orders", "frequent_keys", "frequent_counts")}
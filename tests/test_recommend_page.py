@@ -0,0 +1,23 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # The app reads data/ relative to the repository root
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setenv("APP_WARMUP", "0")
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    at.query_params["page"] = "RECOMMEND"
+    return at
+
+
+def test_typed_ids_ignore_non_ascii_digits(app):
+    app.run()
+    app.text_input(key="rec_ids").input("², ①, ٣, 17948").run()
+    assert not app.exception
+    assert "Based on <strong>1</strong> product(s)" in "".join(m.value for m in app.markdown)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from pipeline.segmentation import OrderShards
+
+
+def test_shards_match_the_in_memory_matrix(tmp_path):
+    rng = np.random.default_rng(0)
+    lines = pd.DataFrame({"order_id": rng.integers(0, 300, 5000), "product_id": rng.integers(1, 80, 5000)})
+    lines["user_id"] = lines["order_id"] % 70
+
+    shards = OrderShards(str(tmp_path), 7)
+    for rows in np.array_split(np.arange(len(lines)), 4):
+        chunk = lines.iloc[rows]
+        shards.append(chunk["order_id"].to_numpy(), chunk["product_id"].to_numpy(), chunk["user_id"].to_numpy())
+    shards.build(min_df=20)
+
+    # First purchase of every (user, product), then products in >= min_df orders
+    clean = lines.drop_duplicates(["user_id", "product_id"]).drop_duplicates(["order_id", "product_id"])
+    df = clean["product_id"].value_counts()
+    vocabulary = np.sort(df.index[df >= 20].to_numpy())
+    np.testing.assert_array_equal(shards.vocabulary, vocabulary)
+
+    order_ids = shards.order_ids()
+    np.testing.assert_array_equal(np.sort(order_ids), np.unique(clean["order_id"]))
+    assert shards.shape == (len(order_ids), len(vocabulary))
+    X = pd.DataFrame(
+        np.vstack([shards[i].toarray() for i in range(len(shards))]), index=order_ids, columns=vocabulary
+    ).sort_index()
+    expected = pd.crosstab(clean["order_id"], clean["product_id"]).reindex(columns=vocabulary, fill_value=0)
+    np.testing.assert_array_equal(X.to_numpy(), (expected.to_numpy() > 0).astype(np.float32))
@@ -0,0 +1,11 @@
+import pytest
+
+from pipeline.simulation import write_scenarios
+
+
+@pytest.mark.parametrize("names", [["base", "base"], ["Promo", "promo"]])
+def test_duplicate_scenario_names_are_rejected(tmp_path, names):
+    # Names are checked before the simulator runs, so no counts are needed
+    with pytest.raises(ValueError, match="duplicate scenario name"):
+        write_scenarios(None, None, [{"name": name} for name in names], str(tmp_path))
+    assert not list(tmp_path.iterdir())